@@ -0,0 +1,112 @@
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+from django.views import View
+
+from jeonse.exports import EXPORT_FIELDS
+from jeonse.filters import filter_listings
+from jeonse.mixins import UserIsAuthenticatedMixin
+from jeonse.models import Listing, ListingCounter
+from jeonse.paginators import KeysetPaginator
+from jeonse.tables import ListingTable, order_listings
+
+# Every column ListingTable can sort on must be selected for keyset cursors.
+API_FIELDS = [*EXPORT_FIELDS, "creator_id", "cost_rank"]
+API_MAX_PER_PAGE = 100
+
+MAP_FIELDS = [
+    "id",
+    "latitude",
+    "longitude",
+    "district",
+    "jeonse_deposit_amount",
+    "wolse_deposit_amount",
+    "wolse_monthly_payment",
+    "total_monthly_payment",
+    "total_area",
+]
+MAP_MAX_MARKERS = 500
+
+
+class ListingApiMixin(UserIsAuthenticatedMixin):
+    # Answer 403 instead of redirecting API clients to the login page.
+    raise_exception = True
+
+
+class ListingApiListView(ListingApiMixin, View):
+    """
+    Read-only JSON listing of the user's listings. Accepts the same filter and
+    sort parameters as listing_list and pages with keyset cursors. Rows go
+    straight from values() to JSON; no Listing instances are built.
+    """
+
+    def get(self, request, *args, **kwargs):
+        filterset, queryset = filter_listings(request, request.user.listings.all())
+        queryset = order_listings(request, queryset)
+        # Annotations such as search_rank are sortable, so they are returned.
+        queryset = queryset.values(*API_FIELDS, *queryset.query.annotation_select)
+
+        try:
+            per_page = int(request.GET.get("per_page", ListingTable._meta.per_page))
+        except ValueError:
+            per_page = ListingTable._meta.per_page
+        per_page = max(1, min(per_page, API_MAX_PER_PAGE))
+
+        bucket = filterset.counter_bucket()
+        count = None
+        if bucket is not None:
+            count = ListingCounter.objects.count_for(request.user, bucket)
+
+        paginator = KeysetPaginator(
+            queryset, per_page, cursor=request.GET.get("cursor"), count=count
+        )
+        page = paginator.page()
+        return JsonResponse(
+            {
+                "count": count,
+                "next": self.page_url(page.next_cursor),
+                "previous": self.page_url(page.previous_cursor),
+                "results": page.object_list,
+            }
+        )
+
+    def page_url(self, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params["cursor"] = cursor
+        return self.request.build_absolute_uri(f"?{params.urlencode()}")
+
+
+class ListingApiDetailView(ListingApiMixin, View):
+    def get(self, request, pk, *args, **kwargs):
+        listing = request.user.listings.filter(pk=pk).values(*API_FIELDS).first()
+        if listing is None:
+            if Listing.objects.filter(pk=pk).exists():
+                raise PermissionDenied
+            raise Http404("No listing found matching the query")
+        return JsonResponse(listing)
+
+
+class ListingMapView(ListingApiMixin, View):
+    """
+    Markers for a map viewport, given as bbox=south,west,north,east alongside
+    any listing_list filters. Up to MAP_MAX_MARKERS listings are returned in
+    R*Tree order, unsorted so the index scan can stop early; "truncated" tells
+    the client to zoom in for the rest.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not request.GET.get("bbox"):
+            return JsonResponse(
+                {"errors": {"bbox": ["지도 영역을 입력하세요."]}}, status=400
+            )
+        filterset, queryset = filter_listings(request, request.user.listings.all())
+        if not filterset.is_valid():
+            return JsonResponse({"errors": filterset.errors}, status=400)
+        rows = list(queryset.order_by().values(*MAP_FIELDS)[: MAP_MAX_MARKERS + 1])
+        return JsonResponse(
+            {
+                "truncated": len(rows) > MAP_MAX_MARKERS,
+                "results": rows[:MAP_MAX_MARKERS],
+            }
+        )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class JeonseConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "jeonse"
+
+    def ready(self):
+        from jeonse import checks, signals  # noqa: F401
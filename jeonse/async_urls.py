@@ -0,0 +1,30 @@
+from django.urls import URLPattern
+
+from jeonse import urls
+from jeonse.async_views import (
+    AsyncListingCreateView,
+    AsyncListingDetailView,
+    AsyncListingListView,
+)
+
+# jeonse.urls with the listing pages served by their async views; every other
+# route is shared, so the two tables cannot drift apart.
+ASYNC_VIEWS = {
+    "listing_list": AsyncListingListView,
+    "listing_detail": AsyncListingDetailView,
+    "listing_create": AsyncListingCreateView,
+}
+
+urlpatterns = [
+    (
+        URLPattern(
+            pattern.pattern,
+            ASYNC_VIEWS[pattern.name].as_view(),
+            pattern.default_args,
+            pattern.name,
+        )
+        if pattern.name in ASYNC_VIEWS
+        else pattern
+    )
+    for pattern in urls.urlpatterns
+]
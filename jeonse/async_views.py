@@ -0,0 +1,184 @@
+from asgiref.sync import sync_to_async
+from django.contrib import auth
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.shortcuts import render
+from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views import View
+from django_tables2 import RequestConfig
+
+from jeonse.cache import (
+    get_table_fragment,
+    record_table_cache,
+    set_table_fragment,
+    table_fragment_key,
+)
+from jeonse.filters import filter_listings, filter_params
+from jeonse.forms import ListingForm
+from jeonse.mixins import ConditionalGetMixin, set_validators
+from jeonse.models import Listing, ListingCounter
+from jeonse.paginators import KeysetPaginator
+from jeonse.tables import ListingTable
+from jeonse.views import ListingDetailView, ListingListView
+
+# Template rendering is CPU-bound and touches no database once the context is
+# resolved, so it runs on the default executor instead of the event loop.
+arender = sync_to_async(render, thread_sensitive=False)
+
+
+async def aget_user(request):
+    """
+    Resolve request.user once, off the event loop. Django 4.2 has no
+    request.auser(); the lazy user would otherwise hit the session and user
+    tables synchronously from the view.
+    """
+    user = await sync_to_async(auth.get_user)(request)
+    request.user = user
+    return user
+
+
+class AsyncUserIsAuthenticatedMixin:
+    async def dispatch(self, request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncConditionalGetMixin(ConditionalGetMixin):
+    """ConditionalGetMixin for async views, after aget_validators()."""
+
+    async def aget_validators(self):
+        return self.get_validators()
+
+    async def dispatch(self, request, *args, **kwargs):
+        # View.dispatch, past ConditionalGetMixin's sync one.
+        dispatch = super(ConditionalGetMixin, self).dispatch
+        if request.method not in ("GET", "HEAD"):
+            return await dispatch(request, *args, **kwargs)
+
+        etag, last_modified = await self.aget_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = await dispatch(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+
+class AsyncListingListView(
+    AsyncUserIsAuthenticatedMixin, AsyncConditionalGetMixin, View
+):
+    template_name = "jeonse/listing_list.html"
+
+    # The same validators as the sync view, from the resolved request.user.
+    get_etag = ListingListView.get_etag
+    get_last_modified = ListingListView.get_last_modified
+
+    async def dispatch(self, request, *args, **kwargs):
+        response = await super().dispatch(request, *args, **kwargs)
+        patch_vary_headers(response, ["HX-Request"])
+        return response
+
+    async def get(self, request, *args, **kwargs):
+        if not request.htmx:
+            return await self.render_list(request)
+
+        key = await sync_to_async(table_fragment_key)(request)
+        content = await sync_to_async(get_table_fragment)(key)
+        if content is not None:
+            outcome = "hit"
+            response = HttpResponse(content)
+        else:
+            outcome = "miss"
+            response = await self.render_list(request)
+            if response.status_code == 200:
+                await sync_to_async(set_table_fragment)(key, response.content)
+        await sync_to_async(record_table_cache)(outcome)
+        response["X-Table-Cache"] = outcome
+        return response
+
+    async def render_list(self, request):
+        user = request.user
+        filterset, object_list = filter_listings(request, user.listings.all())
+        table = ListingTable(object_list)
+        RequestConfig(request, paginate=False).configure(table)
+
+        bucket = filterset.counter_bucket()
+        count = None
+        if bucket is not None:
+            count = await ListingCounter.objects.acount_for(user, bucket)
+        table.paginator = KeysetPaginator(
+            table.rows,
+            table._meta.per_page,
+            cursor=request.GET.get("cursor"),
+            count=count,
+        )
+        table.page = await table.paginator.apage()
+
+        template_name = self.template_name
+        if request.htmx:
+            template_name = "htmx/listing_list.html"
+        context = {"filter": filterset, "table": table, "object_list": object_list}
+        return await arender(request, template_name, context)
+
+
+class AsyncListingDetailView(
+    AsyncUserIsAuthenticatedMixin, AsyncConditionalGetMixin, View
+):
+    template_name = "jeonse/listing_detail.html"
+
+    get_etag = ListingDetailView.get_etag
+    get_last_modified = ListingDetailView.get_last_modified
+
+    async def aget_validators(self):
+        # Fetched once, before the validators need it, and reused by get().
+        pk = self.kwargs["pk"]
+        self.object = await self.request.user.listings.filter(pk=pk).afirst()
+        if self.object is None:
+            if await Listing.objects.filter(pk=pk).aexists():
+                raise PermissionDenied
+            raise Http404("No listing found matching the query")
+        return self.get_validators()
+
+    def get_object(self):
+        return self.object
+
+    async def get(self, request, pk, *args, **kwargs):
+        context = {"object": self.object, "listing": self.object}
+        return await arender(request, self.template_name, context)
+
+
+class AsyncListingCreateView(AsyncUserIsAuthenticatedMixin, View):
+    template_name = "jeonse/listing_create.html"
+    success_url = reverse_lazy("listing_list")
+
+    def get_template_name(self):
+        return "htmx/listing_create.html" if self.request.htmx else self.template_name
+
+    async def get(self, request, *args, **kwargs):
+        return await arender(request, self.get_template_name(), {"form": ListingForm()})
+
+    async def post(self, request, *args, **kwargs):
+        form = ListingForm(request.POST)
+        if not form.is_valid():
+            return await arender(request, self.get_template_name(), {"form": form})
+        form.instance.creator = request.user
+        await form.instance.asave()
+        if not request.htmx:
+            return HttpResponseRedirect(self.success_url)
+
+        filterset, queryset = filter_listings(
+            request, request.user.listings.all(), filter_params(request.POST)
+        )
+        rows = [listing async for listing in queryset.filter(pk=form.instance.pk)]
+        bucket = filterset.counter_bucket()
+        count = None
+        if bucket is not None:
+            count = await ListingCounter.objects.acount_for(request.user, bucket)
+        context = {"form": ListingForm(), "table": ListingTable(rows), "count": count}
+        response = await arender(request, "htmx/listing_created.html", context)
+        response["HX-Trigger"] = "listingsChanged"
+        return response
@@ -0,0 +1,31 @@
+from allauth.account.auth_backends import AuthenticationBackend
+from django.contrib.auth.backends import ModelBackend
+
+from jeonse.cache import cache_user, get_cached_user
+
+
+class CachedUserMixin:
+    """
+    Resolve the session's user from the cache instead of the database.
+
+    The cached copy is dropped whenever the user row is saved or deleted, and
+    by mark_listings_changed(), so password changes, deactivation and
+    listings_changed_at are seen on the next request.
+    """
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache_user(user)
+            return user
+        return user if self.user_can_authenticate(user) else None
+
+
+class CachedModelBackend(CachedUserMixin, ModelBackend):
+    pass
+
+
+class CachedAuthenticationBackend(CachedUserMixin, AuthenticationBackend):
+    pass
@@ -0,0 +1,124 @@
+import threading
+from collections import deque
+
+from django.db.backends.sqlite3 import base
+from django.db.utils import OperationalError
+
+# Applied to every new connection; override any of them with
+# DATABASES[...]["OPTIONS"]["pragmas"].
+DEFAULT_PRAGMAS = {
+    # Readers no longer block the writer, nor the writer readers.
+    "journal_mode": "wal",
+    # Durable across crashes of the app in WAL mode; only an OS crash or power
+    # loss can roll back the last commits.
+    "synchronous": "normal",
+    # Wait this many ms for the write lock instead of failing with
+    # "database is locked".
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    # Negative values are KiB, so about 64 MiB of page cache per connection.
+    "cache_size": -64000,
+    "temp_store": "memory",
+}
+
+
+class FairLock:
+    """A lock handed to waiting threads in the order they asked for it."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.waiting = deque()
+        self.held = False
+
+    def acquire(self, timeout):
+        with self.condition:
+            ticket = object()
+            self.waiting.append(ticket)
+            if not self.condition.wait_for(
+                lambda: not self.held and self.waiting[0] is ticket, timeout
+            ):
+                self.waiting.remove(ticket)
+                self.condition.notify_all()
+                return False
+            self.waiting.popleft()
+            self.held = True
+            return True
+
+    def release(self):
+        with self.condition:
+            self.held = False
+            self.condition.notify_all()
+
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(name):
+    with _write_locks_guard:
+        return _write_locks.setdefault(str(name), FairLock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Django's SQLite backend tuned for a multi-threaded or multi-process web
+    server: WAL journaling and the pragmas above on every connection, and
+    write transactions that take the lock when they start.
+
+    Threads of one process queue in order for a database file's write lock
+    before asking SQLite for it. SQLite's busy handler polls with growing
+    sleeps, so under many writer threads some of them starve past
+    busy_timeout; the queue hands over as soon as the lock is released.
+    busy_timeout still covers waiting on other processes.
+    """
+
+    holds_write_lock = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **params.pop("pragmas", {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if not self.is_in_memory_db():
+            lock = write_lock(self.settings_dict["NAME"])
+            if not lock.acquire(timeout=int(self.pragmas["busy_timeout"]) / 1000):
+                raise OperationalError("database is locked")
+            self.holds_write_lock = True
+        try:
+            # A deferred transaction that reads before it writes has to
+            # upgrade its lock, and SQLite fails that upgrade at once rather
+            # than waiting out busy_timeout when another connection writes.
+            self.cursor().execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.release_write_lock()
+            raise
+
+    def release_write_lock(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            write_lock(self.settings_dict["NAME"]).release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_write_lock()
@@ -0,0 +1,124 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+
+from jeonse.models import CustomUser, Listing
+
+BENCH_PASSWORD = "bench-password"
+
+COMMENT_WORDS = [
+    "역세권",
+    "남향",
+    "신축",
+    "풀옵션",
+    "주차가능",
+    "반려동물",
+    "조용한",
+    "채광좋음",
+    "엘리베이터",
+    "베란다",
+    "학군",
+    "공원",
+    "리모델링",
+    "관리비포함",
+    "즉시입주",
+]
+
+# Seoul's districts and their rough centres; bench listings are scattered
+# around them.
+DISTRICTS = {
+    "강남구": (37.5172, 127.0473),
+    "강동구": (37.5301, 127.1238),
+    "강북구": (37.6396, 127.0257),
+    "강서구": (37.5509, 126.8495),
+    "관악구": (37.4784, 126.9516),
+    "광진구": (37.5385, 127.0823),
+    "구로구": (37.4954, 126.8874),
+    "금천구": (37.4569, 126.8955),
+    "노원구": (37.6542, 127.0568),
+    "도봉구": (37.6688, 127.0471),
+    "동대문구": (37.5744, 127.0396),
+    "동작구": (37.5124, 126.9393),
+    "마포구": (37.5663, 126.9019),
+    "서대문구": (37.5791, 126.9368),
+    "서초구": (37.4837, 127.0324),
+    "성동구": (37.5633, 127.0371),
+    "성북구": (37.5894, 127.0167),
+    "송파구": (37.5145, 127.1066),
+    "양천구": (37.5169, 126.8665),
+    "영등포구": (37.5264, 126.8962),
+    "용산구": (37.5324, 126.9900),
+    "은평구": (37.6027, 126.9291),
+    "종로구": (37.5735, 126.9790),
+    "중구": (37.5641, 126.9979),
+    "중랑구": (37.6066, 127.0927),
+}
+
+
+def bench_email(number):
+    return f"bench{number}@example.com"
+
+
+def create_bench_users(count, using="default"):
+    """
+    ``count`` users sharing BENCH_PASSWORD, hashed once rather than per user.
+    """
+    password = make_password(BENCH_PASSWORD)
+    return CustomUser.objects.using(using).bulk_create(
+        CustomUser(username=f"bench{i}", email=bench_email(i), password=password)
+        for i in range(count)
+    )
+
+
+def generate_listings(users, count, seed=0):
+    """
+    Deterministic stream of unsaved listings. The first user owns a tenth of
+    them, the heaviest account a real deployment is likely to see; the rest
+    are spread evenly.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        if i % 10 == 0 or len(users) == 1:
+            creator = users[0]
+        else:
+            creator = users[1 + i % (len(users) - 1)]
+        if rng.random() < 0.4:
+            jeonse, deposit, wolse = rng.randrange(100, 600) * 1000000, 0, 0
+        else:
+            jeonse = 0
+            deposit = rng.randrange(5, 100) * 1000000
+            wolse = rng.randrange(30, 200) * 10000
+        district = rng.choice(list(DISTRICTS))
+        latitude, longitude = DISTRICTS[district]
+        yield Listing(
+            creator=creator,
+            jeonse_deposit_amount=jeonse,
+            wolse_deposit_amount=deposit,
+            wolse_monthly_payment=wolse,
+            gwanlibi_monthly_payment=rng.randrange(5, 30) * 10000,
+            annual_interest_rate=rng.choice([3.5, 4.0, 4.5, 5.0, 5.5]),
+            total_area=round(rng.uniform(15, 130), 1),
+            number_of_rooms=rng.randint(1, 4),
+            number_of_bathrooms=rng.randint(1, 2),
+            comment=" ".join(rng.sample(COMMENT_WORDS, rng.randint(0, 5))) or None,
+            district=district,
+            latitude=round(rng.gauss(latitude, 0.01), 6),
+            longitude=round(rng.gauss(longitude, 0.012), 6),
+        )
+
+
+def load_bench_data(listings, users, seed=0, batch_size=10000):
+    bench_users = create_bench_users(users)
+    stream = generate_listings(bench_users, listings, seed)
+    while True:
+        batch = [listing for _, listing in zip(range(batch_size), stream)]
+        if not batch:
+            break
+        Listing.objects.bulk_create(batch, rank=False)
+    Listing.objects.rank_by_cost()
+    return bench_users
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
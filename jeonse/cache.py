@@ -0,0 +1,75 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+STATS_KEYS = {"hit": "listings:table:hits", "miss": "listings:table:misses"}
+
+
+def _incr(key, initial):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, initial, timeout=None)
+        return cache.incr(key)
+
+
+def _version_key(user_id):
+    return f"listings:version:{user_id}"
+
+
+def listings_version(user_id):
+    # Seed with the clock rather than 0 so a version key that was evicted
+    # never comes back at a value that old fragments were stored under.
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_listings_version(user_id):
+    return _incr(_version_key(user_id), time.time_ns())
+
+
+def table_fragment_key(request):
+    params = sorted(
+        (key, value) for key, values in request.GET.lists() for value in values
+    )
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    version = listings_version(request.user.pk)
+    return f"listings:table:{request.user.pk}:{version}:{digest}"
+
+
+def record_table_cache(outcome):
+    _incr(STATS_KEYS[outcome], 0)
+
+
+def table_cache_stats():
+    return {outcome: cache.get(key, 0) for outcome, key in STATS_KEYS.items()}
+
+
+def get_table_fragment(key):
+    return cache.get(key)
+
+
+def set_table_fragment(key, content):
+    cache.set(key, content, settings.LISTING_TABLE_CACHE_TIMEOUT)
+
+
+def _user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def get_cached_user(user_id):
+    return cache.get(_user_key(user_id))
+
+
+def cache_user(user):
+    cache.set(_user_key(user.pk), user, settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+def forget_users(user_ids):
+    cache.delete_many([_user_key(user_id) for user_id in user_ids])
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries only the process that wrote them can see.
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Sessions, logged in users, replica pins and throttle buckets are kept in
+    the default cache, and invalidated there. A cache each worker process
+    keeps to itself serves logged out sessions and stale users.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            f"The default cache, {backend}, is not shared between processes.",
+            hint=(
+                "Set JEONSE_CACHE_DIR to a directory every worker can write, or "
+                "configure a shared backend (Redis, Memcached) in CACHES."
+            ),
+            id="jeonse.E001",
+        )
+    ]
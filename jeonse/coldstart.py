@@ -0,0 +1,183 @@
+"""
+Measure how long a fresh worker takes to boot and serve its first request.
+
+Each measurement runs this module in a new interpreter with ``-X importtime``,
+so nothing the profiling process has already imported skews it. Only the
+standard library is imported here at module level: the boot itself, Django
+included, is what is being timed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from wsgiref.util import setup_testing_defaults
+
+# Written to stderr between phases, among the -X importtime lines.
+PHASE_MARKER = "coldstart phase: "
+
+# Phases of a boot, in order, each timed from the end of the previous one.
+# "interpreter" runs from spawning the process to this module starting.
+PHASES = ["interpreter", "setup", "application", "first_request", "second_request"]
+
+BOOT_PASSWORD = "coldstart-password"
+
+
+def prepare_database(path):
+    """
+    Migrate a new SQLite database at path, with one user and their session,
+    for boot() to serve requests from. Returns the session key.
+    """
+    return run(["prepare"], path)["session_key"]
+
+
+def profile_boot(path, session_key, url="/"):
+    """
+    Boot a worker against the database at path and send it two requests for
+    url as the prepared user. Returns the duration of each phase in ms, the
+    responses' statuses and every module imported, with the phase that
+    imported it.
+    """
+    spawned = time.time()
+    output, stderr = run(["boot", url], path, session_key, importtime=True)
+    marks = [spawned] + [output["marks"][phase] for phase in PHASES]
+    return {
+        "phases": {
+            phase: (end - start) * 1000
+            for phase, start, end in zip(PHASES, marks, marks[1:])
+        },
+        "status": output["status"],
+        "imports": parse_importtime(stderr.splitlines()),
+    }
+
+
+def parse_importtime(lines):
+    """
+    Rows of -X importtime output as dicts of module, phase, depth (0 for an
+    import not nested in another), self_ms and cumulative_ms. A row's phase is
+    the one during which the import finished.
+    """
+    phase = PHASES[0]
+    imports = []
+    for line in lines:
+        if line.startswith(PHASE_MARKER):
+            ended = PHASES.index(line[len(PHASE_MARKER) :])
+            phase = PHASES[min(ended + 1, len(PHASES) - 1)]
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        imports.append(
+            {
+                "module": name.strip(),
+                "phase": phase,
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return imports
+
+
+def run(args, path, session_key="", importtime=False):
+    """
+    Run this module in a new interpreter, from the project directory and
+    against the database at path. Returns its JSON output, and with
+    importtime also its stderr.
+    """
+    process = subprocess.run(
+        [sys.executable, *(["-X", "importtime"] if importtime else []), "-m"]
+        + [__name__, *args],
+        env={
+            **os.environ,
+            "JEONSE_DATABASE": str(path),
+            "JEONSE_COLDSTART_SESSION": session_key,
+        },
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    output = json.loads(process.stdout)
+    return (output, process.stderr) if importtime else output
+
+
+def prepare():
+    import django
+
+    django.setup()
+
+    from django.contrib.auth import (
+        BACKEND_SESSION_KEY,
+        HASH_SESSION_KEY,
+        SESSION_KEY,
+        get_user_model,
+    )
+    from django.contrib.sessions.backends.cached_db import SessionStore
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+    user = get_user_model().objects.create_user(
+        username="coldstart", email="coldstart@example.com", password=BOOT_PASSWORD
+    )
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = "jeonse.auth.CachedModelBackend"
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return {"session_key": session.session_key}
+
+
+def boot(url):
+    """What a WSGI server does to load settings.wsgi, then two requests."""
+    marks = {}
+
+    def mark(phase):
+        marks[phase] = time.time()
+        print(f"{PHASE_MARKER}{phase}", file=sys.stderr, flush=True)
+
+    mark("interpreter")
+
+    import django
+
+    django.setup(set_prefix=False)
+    mark("setup")
+
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+
+    application = WSGIHandler()
+    mark("application")
+
+    host = next(
+        (host for host in settings.ALLOWED_HOSTS if "*" not in host),
+        "localhost",
+    ).lstrip(".")
+    status = []
+    for phase in ["first_request", "second_request"]:
+        environ = {
+            "HTTP_HOST": host,
+            "PATH_INFO": url,
+            "HTTP_COOKIE": (
+                f"{settings.SESSION_COOKIE_NAME}="
+                f"{os.environ['JEONSE_COLDSTART_SESSION']}"
+            ),
+        }
+        setup_testing_defaults(environ)
+        response = application(environ, lambda s, headers, exc_info=None: None)
+        status.append(response.status_code)
+        for _ in response:
+            pass
+        response.close()
+        mark(phase)
+    return {"marks": marks, "status": status}
+
+
+if __name__ == "__main__":
+    # As settings/wsgi.py does.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.settings")
+    command, *args = sys.argv[1:]
+    result = {"prepare": prepare, "boot": boot}[command](*args)
+    print(json.dumps(result))
@@ -0,0 +1,158 @@
+import csv
+import re
+import zipfile
+from html import escape
+
+from jeonse.models import Listing
+
+EXPORT_FIELDS = [
+    "id",
+    "jeonse_deposit_amount",
+    "wolse_deposit_amount",
+    "wolse_monthly_payment",
+    "gwanlibi_monthly_payment",
+    "total_monthly_payment",
+    "annual_interest_rate",
+    "total_area",
+    "number_of_rooms",
+    "number_of_bathrooms",
+    "comment",
+    "created_at",
+    "updated_at",
+    "monthly_cost_per_area",
+    "monthly_cost_per_room",
+    "district",
+    "latitude",
+    "longitude",
+]
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_header():
+    return [str(Listing._meta.get_field(name).verbose_name) for name in EXPORT_FIELDS]
+
+
+def export_rows(queryset):
+    """
+    Plain tuples in EXPORT_FIELDS order, fetched from the database in chunks so
+    memory stays flat regardless of how many listings are exported.
+    """
+    return queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def csv_chunks(header, rows):
+    writer = csv.writer(Echo())
+    # Byte order mark so spreadsheet apps detect UTF-8 for the Korean text.
+    yield "\ufeff" + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class ChunkStream:
+    """Unseekable sink for zipfile whose output is drained between rows."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+        'relationships"><Relationship Id="rId1" Type="http://schemas.'
+        "openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+        '" Target="xl/workbook.xml"/></Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+        ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/'
+        'relationships"><sheets><sheet name="Listings" sheetId="1" r:id="rId1"/>'
+        "</sheets></workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+        'relationships"><Relationship Id="rId1" Type="http://schemas.'
+        'openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/></Relationships>'
+    ),
+}
+
+ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value!r}</v></c>"
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    # The same &, < and > escaping as xml.sax.saxutils.escape(), without
+    # importing xml.sax and urllib into every worker's first request.
+    text = escape(ILLEGAL_XML_CHARS.sub("", str(value)), quote=False)
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def xlsx_row(row):
+    return ("<row>" + "".join(xlsx_cell(value) for value in row) + "</row>").encode()
+
+
+def xlsx_chunks(header, rows):
+    stream = ChunkStream()
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in XLSX_PARTS.items():
+            workbook.writestr(name, content)
+        with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/'
+                b'spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(xlsx_row(header))
+            for number, row in enumerate(rows, start=1):
+                sheet.write(xlsx_row(row))
+                if number % EXPORT_CHUNK_SIZE == 0:
+                    yield stream.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield stream.drain()
+
+
+EXPORT_FORMATS = {
+    "csv": (csv_chunks, "text/csv; charset=utf-8"),
+    "xlsx": (
+        xlsx_chunks,
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+}
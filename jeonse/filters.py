@@ -1,7 +1,80 @@
+import math
+
 import django_filters
 from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.http import QueryDict
+
+from jeonse.geo import within_bbox, within_radius
+from jeonse.models import (
+    LISTING_COUNTER_BUCKETS,
+    Listing,
+    compared_listing_count,
+    value_percentile,
+)
+from jeonse.search import search_listings, search_query
+
+
+def range_filters(field_name, label, method=None):
+    return [
+        django_filters.NumberFilter(
+            field_name=field_name,
+            lookup_expr=lookup_expr,
+            method=method and f"{method}_{bound}",
+            label=f"{label} {bound}",
+            widget=forms.widgets.TextInput(
+                attrs={
+                    "class": "form-control form-control-sm",
+                    "placeholder": f"{label} {bound}",
+                }
+            ),
+        )
+        for lookup_expr, bound in [("gte", "min"), ("lte", "max")]
+    ]
+
+
+# Radius of a "near" search without one, in km.
+DEFAULT_RADIUS_KM = 1
+
+
+class CoordinatesField(forms.CharField):
+    """
+    Comma-separated latitude,longitude pairs, e.g. "37.5,127.0", cleaned into
+    a flat list of floats. Two points are a box's south-west and north-east
+    corners.
+    """
+
+    default_error_messages = {"invalid": "위도,경도 순서의 좌표를 입력하세요."}
+
+    def __init__(self, *, points=1, **kwargs):
+        self.points = points
+        super().__init__(**kwargs)
 
-from jeonse.models import Listing
+    def to_python(self, value):
+        value = super().to_python(value)
+        if not value:
+            return None
+        try:
+            numbers = [float(part) for part in value.split(",")]
+        except ValueError:
+            raise ValidationError(self.error_messages["invalid"], code="invalid")
+        if (
+            len(numbers) != self.points * 2
+            or not all(map(math.isfinite, numbers))
+            or any(abs(lat) > 90 for lat in numbers[::2])
+            or any(abs(lng) > 180 for lng in numbers[1::2])
+        ):
+            raise ValidationError(self.error_messages["invalid"], code="invalid")
+        if self.points == 2 and (numbers[0] > numbers[2] or numbers[1] > numbers[3]):
+            raise ValidationError(
+                "남서쪽, 북동쪽 모서리 순서로 입력하세요.", code="invalid"
+            )
+        return numbers
+
+
+class CoordinatesFilter(django_filters.Filter):
+    field_class = CoordinatesField
 
 
 class ListingFilter(django_filters.FilterSet):
@@ -10,7 +83,175 @@ class ListingFilter(django_filters.FilterSet):
         lookup_expr="lte",
         widget=forms.widgets.TextInput(attrs={"class": "form-control form-control-sm"}),
     )
+    contract_type = django_filters.ChoiceFilter(
+        choices=[("jeonse", "전세"), ("wolse", "월세")],
+        method="filter_contract_type",
+        empty_label="전세/월세",
+        widget=forms.widgets.Select(attrs={"class": "form-select form-select-sm"}),
+    )
+    search = django_filters.CharFilter(
+        method="filter_search",
+        label="코멘트 검색",
+        widget=forms.widgets.TextInput(
+            attrs={
+                "class": "form-control form-control-sm",
+                "placeholder": "코멘트 검색",
+            }
+        ),
+    )
+    district = django_filters.CharFilter(
+        field_name="district",
+        label="지역",
+        widget=forms.widgets.TextInput(
+            attrs={"class": "form-control form-control-sm", "placeholder": "지역"}
+        ),
+    )
+    # The map viewport, as "south,west,north,east".
+    bbox = CoordinatesFilter(
+        method="filter_bbox", points=2, label="지도 영역", widget=forms.HiddenInput
+    )
+    near = CoordinatesFilter(
+        method="filter_near",
+        label="중심 좌표",
+        widget=forms.widgets.TextInput(
+            attrs={
+                "class": "form-control form-control-sm",
+                "placeholder": "위도,경도",
+            }
+        ),
+    )
+    radius = django_filters.NumberFilter(
+        method="filter_near",
+        label="반경(km)",
+        min_value=0,
+        max_value=100,
+        widget=forms.widgets.TextInput(
+            attrs={"class": "form-control form-control-sm", "placeholder": "반경(km)"}
+        ),
+    )
+    total_area_min, total_area_max = range_filters("total_area", "전용면적")
+    number_of_rooms_min, number_of_rooms_max = range_filters(
+        "number_of_rooms", "방개수"
+    )
+    number_of_bathrooms_min, number_of_bathrooms_max = range_filters(
+        "number_of_bathrooms", "욕실개수"
+    )
+    jeonse_deposit_amount_min, jeonse_deposit_amount_max = range_filters(
+        "jeonse_deposit_amount", "전세금"
+    )
+    wolse_deposit_amount_min, wolse_deposit_amount_max = range_filters(
+        "wolse_deposit_amount", "월세금"
+    )
+    monthly_cost_per_area_min, monthly_cost_per_area_max = range_filters(
+        "monthly_cost_per_area", "㎡당 월비용"
+    )
+    monthly_cost_per_room_min, monthly_cost_per_room_max = range_filters(
+        "monthly_cost_per_room", "방당 월비용"
+    )
+    value_percentile_min, value_percentile_max = range_filters(
+        "value_percentile", "가성비 백분위", method="filter_value_percentile"
+    )
 
     class Meta:
         model = Listing
         fields = ["total_monthly_payment"]
+
+    def filter_contract_type(self, queryset, name, value):
+        return queryset.filter(LISTING_COUNTER_BUCKETS[value])
+
+    def filter_search(self, queryset, name, value):
+        query = search_query(value)
+        if not query:
+            return queryset
+        # Most relevant first, unless the table is sorted by a column.
+        return search_listings(queryset, query).order_by("search_rank")
+
+    def filter_bbox(self, queryset, name, value):
+        return within_bbox(queryset, *value, creator_id=self.creator_id())
+
+    def filter_near(self, queryset, name, value):
+        # Applied once, for near, with the radius given alongside it.
+        if name != "near":
+            return queryset
+        radius = self.form.cleaned_data.get("radius")
+        if radius is None:
+            radius = DEFAULT_RADIUS_KM
+        return within_radius(
+            queryset, *value, float(radius), creator_id=self.creator_id()
+        )
+
+    def creator_id(self):
+        # The filtered listings are the requesting user's, as for cost_rank.
+        return self.request.user.pk if self.request is not None else None
+
+    def filter_value_percentile_min(self, queryset, name, value):
+        return self.filter_cost_rank(queryset, "gte", value)
+
+    def filter_value_percentile_max(self, queryset, name, value):
+        return self.filter_cost_rank(queryset, "lte", value)
+
+    def filter_cost_rank(self, queryset, lookup, percentile):
+        if self.request is None:
+            return queryset
+        # A bound on cost_rank, computed once from the user's listing count,
+        # rather than on value_percentile, so the cost_rank index is used.
+        bound = models.ExpressionWrapper(
+            models.Value(float(percentile) / 100)
+            * compared_listing_count(self.request.user.pk),
+            output_field=models.FloatField(),
+        )
+        return queryset.filter(**{f"cost_rank__{lookup}": bound})
+
+    def counter_bucket(self):
+        """
+        The ListingCounter bucket holding the size of this filter's result,
+        or None when the active filters have no precomputed count.
+        """
+        if not self.is_bound:
+            return "all"
+        if not self.form.is_valid():
+            return None
+        active = [
+            name
+            for name, value in self.form.cleaned_data.items()
+            if value not in (None, "")
+        ]
+        if not active:
+            return "all"
+        if active == ["contract_type"]:
+            return self.form.cleaned_data["contract_type"]
+        return None
+
+    def filter_queryset(self, queryset):
+        if self.request is not None:
+            queryset = queryset.annotate(
+                value_percentile=value_percentile(self.request.user.pk)
+            )
+        return super().filter_queryset(queryset)
+
+
+def filter_listings(request, queryset, data=None):
+    """
+    Apply ListingFilter the way ListingListView does: invalid input matches
+    nothing rather than everything. The filters are read from data, by
+    default the query string.
+    """
+    if data is None:
+        data = request.GET
+    filterset = ListingFilter(data or None, queryset=queryset, request=request)
+    if filterset.is_bound and not filterset.is_valid():
+        return filterset, filterset.queryset.none()
+    return filterset, filterset.qs
+
+
+def filter_params(data):
+    """
+    The ListingFilter parameters in data, e.g. a form posted with the filter
+    form's fields included.
+    """
+    params = QueryDict(mutable=True)
+    for name in ListingFilter.base_filters:
+        values = [value for value in data.getlist(name) if value]
+        if values:
+            params.setlist(name, values)
+    return params
@@ -1,6 +1,13 @@
+import os
+import uuid
+
 from django import forms
 
-from jeonse.models import Listing
+from jeonse.exports import EXPORT_FORMATS
+from jeonse.filters import filter_params
+from jeonse.jobs import job_file
+from jeonse.models import Job, Listing
+from jeonse.sensitivity import SENSITIVITY_MAX_RATES, rate_range
 
 
 class ListingForm(forms.ModelForm):
@@ -16,9 +23,77 @@ class ListingForm(forms.ModelForm):
             "number_of_rooms",
             "number_of_bathrooms",
             "comment",
+            "district",
+            "latitude",
+            "longitude",
         ]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         for _, field in self.fields.items():
             field.widget.attrs.update({"class": "form-control"})
+
+
+class SensitivityForm(forms.Form):
+    rate_from = forms.FloatField(label="최저 이자율", initial=0.0, min_value=0)
+    rate_to = forms.FloatField(label="최고 이자율", initial=10.0, min_value=0)
+    steps = forms.IntegerField(
+        label="구간 수", initial=21, min_value=1, max_value=SENSITIVITY_MAX_RATES
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for _, field in self.fields.items():
+            field.widget.attrs.update({"class": "form-control"})
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("rate_from", 0) > cleaned_data.get("rate_to", 0):
+            self.add_error("rate_to", "최고 이자율은 최저 이자율보다 커야 합니다.")
+        return cleaned_data
+
+    def rates(self):
+        data = self.cleaned_data
+        return rate_range(data["rate_from"], data["rate_to"], data["steps"])
+
+
+class JobForm(forms.Form):
+    kind = forms.ChoiceField(label="작업", choices=Job.Kind.choices)
+    format = forms.ChoiceField(
+        label="형식",
+        choices=[(name, name.upper()) for name in EXPORT_FORMATS],
+        required=False,
+    )
+    file = forms.FileField(label="파일", required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for _, field in self.fields.items():
+            field.widget.attrs.update({"class": "form-control form-control-sm"})
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("kind") == Job.Kind.IMPORT and not cleaned_data.get("file"):
+            self.add_error("file", "가져올 파일을 선택하세요.")
+        return cleaned_data
+
+    def enqueue(self, user):
+        kind = self.cleaned_data["kind"]
+        params = {}
+        if kind == Job.Kind.EXPORT:
+            params["format"] = self.cleaned_data["format"] or "csv"
+            query = filter_params(self.data)
+            # The listing table's sort, so the file lists rows as shown.
+            if self.data.get("sort"):
+                query["sort"] = self.data["sort"]
+            params["query"] = query.urlencode()
+        elif kind == Job.Kind.IMPORT:
+            upload = self.cleaned_data["file"]
+            _, ext = os.path.splitext(upload.name)
+            ext = ".jsonl" if ext.lower() in (".jsonl", ".ndjson") else ".csv"
+            path = job_file(f"import-{uuid.uuid4().hex}{ext}")
+            with open(path, "wb") as f:
+                for chunk in upload.chunks():
+                    f.write(chunk)
+            params["path"] = path
+        return Job.objects.enqueue(user, kind, **params)
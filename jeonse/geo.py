@@ -0,0 +1,147 @@
+import math
+
+from django.db.models import F
+
+LISTING_TABLE = "jeonse_listing"
+LISTING_RTREE_TABLE = "jeonse_listing_rtree"
+
+# Kilometres per degree of latitude, and of longitude at the equator.
+KM_PER_DEGREE = 111.32
+
+CREATOR_PADDING = 0.25
+
+# R*Tree over the listings that have coordinates, keyed by listing id and kept
+# in sync by triggers like the comment search index. Each listing is a point,
+# a box with equal bounds. The creator is the first dimension, so one user's
+# viewport only visits their own points, as a (creator, lat, lng) index would.
+# It spans creator_id ± CREATOR_PADDING: with no extent in one dimension every
+# box has zero volume, which defeats the R*Tree's insertion heuristics and
+# leaves a heavy user's points spread over most of the tree. Bounds are stored
+# as 32-bit floats rounded outwards, so large ids only add candidates.
+LISTING_RTREE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {LISTING_RTREE_TABLE} USING rtree(
+        id, min_creator, max_creator, min_lat, max_lat, min_lng, max_lng
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {LISTING_RTREE_TABLE}_insert
+    AFTER INSERT ON {LISTING_TABLE}
+    WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+        INSERT INTO {LISTING_RTREE_TABLE}
+        VALUES (new.id, new.creator_id - {CREATOR_PADDING},
+                new.creator_id + {CREATOR_PADDING}, new.latitude, new.latitude,
+                new.longitude, new.longitude);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {LISTING_RTREE_TABLE}_delete
+    AFTER DELETE ON {LISTING_TABLE} BEGIN
+        DELETE FROM {LISTING_RTREE_TABLE} WHERE id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {LISTING_RTREE_TABLE}_update
+    AFTER UPDATE OF id, latitude, longitude, creator_id ON {LISTING_TABLE} BEGIN
+        DELETE FROM {LISTING_RTREE_TABLE} WHERE id = old.id;
+        INSERT INTO {LISTING_RTREE_TABLE}
+        SELECT new.id, new.creator_id - {CREATOR_PADDING},
+               new.creator_id + {CREATOR_PADDING}, new.latitude, new.latitude,
+               new.longitude, new.longitude
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    END
+    """,
+]
+
+DROP_LISTING_RTREE_SQL = [
+    f"DROP TRIGGER IF EXISTS {LISTING_RTREE_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {LISTING_RTREE_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {LISTING_RTREE_TABLE}_update",
+    f"DROP TABLE IF EXISTS {LISTING_RTREE_TABLE}",
+]
+
+
+def install_listing_geo(connection):
+    """
+    Create the index and its triggers if missing. Like the search index's,
+    the triggers are dropped whenever a migration rebuilds the listing table,
+    so this also runs after every migrate.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for sql in LISTING_RTREE_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_listing_geo(connection):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {LISTING_RTREE_TABLE}")
+        cursor.execute(f"""
+            INSERT INTO {LISTING_RTREE_TABLE}
+            SELECT id, creator_id - {CREATOR_PADDING},
+                   creator_id + {CREATOR_PADDING}, latitude, latitude, longitude,
+                   longitude
+            FROM {LISTING_TABLE}
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            """)
+
+
+def within_bbox(queryset, south, west, north, east, creator_id=None):
+    """
+    Listings inside the box, found through the R*Tree, restricted to one
+    creator's points with creator_id. The index is joined rather than queried
+    in a subquery so SQLite streams its matches and a LIMIT stops the scan
+    early; boxes applied more than once are intersected.
+    """
+    where = [
+        f"{LISTING_RTREE_TABLE}.min_lat <= %s",
+        f"{LISTING_RTREE_TABLE}.max_lat >= %s",
+        f"{LISTING_RTREE_TABLE}.min_lng <= %s",
+        f"{LISTING_RTREE_TABLE}.max_lng >= %s",
+    ]
+    params = [north, south, east, west]
+    if creator_id is not None:
+        where += [
+            f"{LISTING_RTREE_TABLE}.min_creator <= %s",
+            f"{LISTING_RTREE_TABLE}.max_creator >= %s",
+        ]
+        params += [creator_id, creator_id]
+        queryset = queryset.filter(creator_id=creator_id)
+    tables = []
+    if LISTING_RTREE_TABLE not in queryset.query.extra_tables:
+        tables = [LISTING_RTREE_TABLE]
+        # As with the search index, the unary + keeps SQLite from scanning
+        # listings and searching the R*Tree once per row.
+        where.insert(0, f"+{LISTING_RTREE_TABLE}.id = {LISTING_TABLE}.id")
+    # The index holds 32-bit floats rounded outwards; the exact bounds are
+    # checked again on the listing rows it returns.
+    return queryset.extra(tables=tables, where=where, params=params).filter(
+        latitude__range=(south, north), longitude__range=(west, east)
+    )
+
+
+def bbox_around(latitude, longitude, km):
+    """(south, west, north, east) of the box enclosing a circle."""
+    dlat = km / KM_PER_DEGREE
+    dlng = km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+    return latitude - dlat, longitude - dlng, latitude + dlat, longitude + dlng
+
+
+def within_radius(queryset, latitude, longitude, km, creator_id=None):
+    """
+    Listings within km of the point: the enclosing box from the R*Tree, then
+    the exact distance on an equirectangular projection, which is accurate to
+    well under a percent at city scale and needs no SQL math functions.
+    """
+    queryset = within_bbox(
+        queryset, *bbox_around(latitude, longitude, km), creator_id=creator_id
+    )
+    scale = math.cos(math.radians(latitude))
+    dy = (F("latitude") - latitude) * KM_PER_DEGREE
+    dx = (F("longitude") - longitude) * (KM_PER_DEGREE * scale)
+    return queryset.alias(distance_squared=dx * dx + dy * dy).filter(
+        distance_squared__lte=km * km
+    )
@@ -0,0 +1,269 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+
+from jeonse.cache import bump_listings_version
+from jeonse.exports import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FIELDS,
+    EXPORT_FORMATS,
+    export_header,
+)
+from jeonse.filters import filter_listings
+from jeonse.models import (
+    Job,
+    JobCancelled,
+    Listing,
+    ListingCounter,
+    ListingStats,
+    mark_listings_changed,
+)
+from jeonse.paginators import keyset_chunks
+from jeonse.tables import order_listings
+
+logger = logging.getLogger(__name__)
+
+RECALCULATE_BATCH_SIZE = 1000
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+
+    return register
+
+
+def job_file(name):
+    os.makedirs(settings.JOB_FILES_DIR, exist_ok=True)
+    return os.path.join(settings.JOB_FILES_DIR, name)
+
+
+def listing_request(user, query):
+    """
+    A bare request carrying a listing_list query string, so filter_listings()
+    and order_listings() select the same rows outside of a request.
+    """
+    request = HttpRequest()
+    request.GET = QueryDict(query)
+    request.user = user
+    return request
+
+
+@job_handler(Job.Kind.EXPORT)
+def export_listings(job):
+    export_format = job.params.get("format", "csv")
+    chunks, _ = EXPORT_FORMATS[export_format]
+    request = listing_request(job.user, job.params.get("query", ""))
+    _, queryset = filter_listings(request, job.user.listings.all())
+    queryset = order_listings(request, queryset)
+    total = queryset.count()
+    job.report(0, total)
+
+    def rows():
+        # Progress is written between chunks: under WAL, a write from a
+        # connection still reading an older snapshot fails with "database is
+        # locked" once other workers have committed.
+        done = 0
+        for chunk in keyset_chunks(queryset, EXPORT_CHUNK_SIZE):
+            for listing in chunk:
+                yield tuple(getattr(listing, name) for name in EXPORT_FIELDS)
+            done += len(chunk)
+            job.report(done)
+
+    name = f"listings-{job.pk}.{export_format}"
+    try:
+        with open(job_file(name), "wb") as f:
+            for chunk in chunks(export_header(), rows()):
+                f.write(chunk.encode() if isinstance(chunk, str) else chunk)
+    except BaseException:
+        os.remove(job_file(name))
+        raise
+    job.report(total)
+    return {"file": name, "rows": total}
+
+
+@job_handler(Job.Kind.IMPORT)
+def import_listings(job):
+    path = job.params["path"]
+    rejects = job_file(f"rejects-{job.pk}.jsonl")
+    out = StringIO()
+    # Progress is the last committed input row, so a retry resumes after it.
+    call_command(
+        "import_listings",
+        path,
+        creator_id=job.user.pk,
+        skip=job.progress,
+        rejects=rejects,
+        progress=job.report,
+        stdout=out,
+    )
+    os.remove(path)
+    result = {"output": out.getvalue().strip()}
+    if os.path.getsize(rejects):
+        result["rejects"] = os.path.basename(rejects)
+    else:
+        os.remove(rejects)
+    return result
+
+
+@job_handler(Job.Kind.RECALCULATE)
+def recalculate_listings(job):
+    """
+    Recompute the stored derived fields, cost ranks and counters of all the
+    user's listings, e.g. after the formulas behind them change.
+    """
+    listings = job.user.listings.order_by("pk")
+    total = listings.count()
+    job.report(0, total)
+    done = last_pk = 0
+    while batch := list(listings.filter(pk__gt=last_pk)[:RECALCULATE_BATCH_SIZE]):
+        # As auto_now would, so detail pages' ETags change with the values.
+        updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        rows = []
+        for listing in batch:
+            listing.set_derived_fields()
+            rows.append(
+                (
+                    listing.total_monthly_payment,
+                    listing.monthly_cost_per_area,
+                    listing.monthly_cost_per_room,
+                    updated_at,
+                    listing.pk,
+                )
+            )
+        # One prepared UPDATE per row; bulk_update()'s CASE per column grows
+        # with the batch and is several times slower on SQLite.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                "UPDATE jeonse_listing SET total_monthly_payment = %s,"
+                " monthly_cost_per_area = %s, monthly_cost_per_room = %s,"
+                " updated_at = %s WHERE id = %s",
+                rows,
+            )
+        done += len(batch)
+        last_pk = batch[-1].pk
+        job.report(done)
+
+    with transaction.atomic():
+        # Dropped counters and stats are recomputed on first read;
+        # rank_by_cost() refreshes the "ranked" counter.
+        ListingCounter.objects.filter(user=job.user).delete()
+        ListingStats.objects.filter(user=job.user).delete()
+        Listing.objects.rank_by_cost([job.user.pk])
+        mark_listings_changed([job.user.pk])
+    bump_listings_version(job.user.pk)
+    return {"rows": done}
+
+
+def run_job(job):
+    """Run a claimed job, then mark it done, or retry it later, or fail it."""
+    jobs = Job.objects.filter(pk=job.pk)
+    try:
+        result = JOB_HANDLERS[job.kind](job)
+    except JobCancelled:
+        jobs.set_status(Job.Status.CANCELLED, finished_at=timezone.now())
+    except Exception:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        error = traceback.format_exc()
+        retried = False
+        if job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            retried = jobs.filter(cancel_requested=False).set_status(
+                Job.Status.QUEUED,
+                worker="",
+                error=error,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        if not retried:
+            jobs.set_status(Job.Status.FAILED, error=error, finished_at=timezone.now())
+    else:
+        jobs.set_status(
+            Job.Status.SUCCEEDED,
+            result=result,
+            error="",
+            finished_at=timezone.now(),
+        )
+
+
+class Worker:
+    """
+    Claim due jobs from the Job table and run them, on a thread pool when
+    concurrency is above one. Several workers, in one or more processes,
+    can share the queue.
+    """
+
+    def __init__(self, concurrency=1, poll_interval=1.0, name=None):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self.processed = 0
+
+    def stop(self):
+        self.stopping.set()
+
+    def claim(self):
+        try:
+            Job.objects.requeue_stale(timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT))
+            job = Job.objects.claim(self.name)
+        except DatabaseError:
+            logger.exception("Could not claim a job")
+            return None
+        if job is not None:
+            self.processed += 1
+        return job
+
+    def run(self, burst=False):
+        """
+        Run jobs until stop() is called or, with burst, until no job is due.
+        Returns how many jobs were run.
+        """
+        if self.concurrency == 1:
+            while not self.stopping.is_set():
+                job = self.claim()
+                if job is not None:
+                    run_job(job)
+                elif burst:
+                    break
+                else:
+                    self.stopping.wait(self.poll_interval)
+            return self.processed
+
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="job") as pool:
+            running = set()
+            while not self.stopping.is_set():
+                while len(running) < self.concurrency:
+                    job = self.claim()
+                    if job is None:
+                        break
+                    running.add(pool.submit(self.run_in_thread, job))
+                if burst and not running:
+                    break
+                if running:
+                    _, running = wait(
+                        running, self.poll_interval, return_when=FIRST_COMPLETED
+                    )
+                else:
+                    self.stopping.wait(self.poll_interval)
+            wait(running)
+        return self.processed
+
+    def run_in_thread(self, job):
+        try:
+            run_job(job)
+        finally:
+            connections.close_all()
@@ -0,0 +1,93 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from jeonse.benchdata import percentile
+from jeonse.models import Listing
+
+QUERIES = ["", "sort=-total_area", "total_area_min=50", "per_page=100"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare response size and time of the JSON listing API against the "
+        "HTML listing_list page (full page and htmx partial). Runs against a "
+        "throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--listings", type=int, default=1000)
+        parser.add_argument("--output", help="Also write the results here as JSON.")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"], THROTTLE_RATES={}):
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{'path':<8}{'query':<20}{'bytes':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['path']:<8}{result['query'] or '-':<20}"
+                f"{result['bytes']:>10}{result['p50_ms']:>10.2f}"
+                f"{result['p99_ms']:>10.2f}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def run(self, options):
+        user = get_user_model().objects.create_user(
+            username="bench", email="bench@example.com", password="bench"
+        )
+        Listing.objects.bulk_create(
+            Listing(
+                creator=user,
+                jeonse_deposit_amount=i * 1000000,
+                total_area=20 + i % 80,
+                number_of_rooms=1 + i % 4,
+                comment=f"Listing {i}",
+            )
+            for i in range(options["listings"])
+        )
+        client = Client()
+        client.force_login(user)
+
+        paths = {
+            "api": (reverse("api_listing_list"), {}),
+            "html": (reverse("listing_list"), {}),
+            "htmx": (reverse("listing_list"), {"HTTP_HX_REQUEST": "true"}),
+        }
+        results = []
+        for query in QUERIES:
+            for name, (path, headers) in paths.items():
+                latencies = []
+                for _ in range(options["requests"]):
+                    # Measure rendering, not the table fragment cache.
+                    cache.clear()
+                    started = time.perf_counter()
+                    response = client.get(f"{path}?{query}", **headers)
+                    latencies.append(time.perf_counter() - started)
+                    assert response.status_code == 200, (path, response.status_code)
+                results.append(
+                    {
+                        "path": name,
+                        "query": query,
+                        "bytes": len(response.content),
+                        "p50_ms": statistics.median(latencies) * 1000,
+                        "p99_ms": percentile(latencies, 0.99) * 1000,
+                    }
+                )
+        return results
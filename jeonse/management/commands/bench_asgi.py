@@ -0,0 +1,134 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from jeonse.benchdata import percentile
+from jeonse.models import Listing
+
+URLCONFS = {"wsgi": "jeonse.urls", "asgi": "jeonse.async_urls"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare in-process throughput and latency of the listing views through "
+        "the WSGI handler (sync views) and the ASGI handler (async views). "
+        "Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[50, 200, 1000]
+        )
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--listings", type=int, default=1000)
+        parser.add_argument("--output", help="Also write the results here as JSON.")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"], THROTTLE_RATES={}):
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{'mode':<6}{'clients':>8}{'requests':>10}{'req/s':>10}"
+            f"{'p50 ms':>10}{'p99 ms':>10}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<6}{result['concurrency']:>8}"
+                f"{result['requests']:>10}{result['throughput']:>10.1f}"
+                f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def run(self, options):
+        user = get_user_model().objects.create_user(
+            username="bench", email="bench@example.com", password="bench"
+        )
+        Listing.objects.bulk_create(
+            Listing(
+                creator=user,
+                jeonse_deposit_amount=i * 1000000,
+                total_area=20 + i % 80,
+                number_of_rooms=1 + i % 4,
+            )
+            for i in range(options["listings"])
+        )
+        login = Client()
+        login.force_login(user)
+        listing_pk = user.listings.values_list("pk", flat=True).first()
+
+        results = []
+        for concurrency in options["concurrency"]:
+            for mode, urlconf in URLCONFS.items():
+                with override_settings(ROOT_URLCONF=urlconf):
+                    paths = [
+                        reverse("listing_list"),
+                        reverse("listing_list") + "?sort=-total_area",
+                        reverse("listing_list") + "?total_area_min=50",
+                        reverse("listing_detail", kwargs={"pk": listing_pk}),
+                    ]
+                    paths = list(islice(cycle(paths), options["requests"]))
+                    runner = self.run_wsgi if mode == "wsgi" else self.run_asgi
+                    elapsed, latencies = runner(paths, concurrency, login.cookies)
+                results.append(
+                    {
+                        "mode": mode,
+                        "concurrency": concurrency,
+                        "requests": len(latencies),
+                        "throughput": len(latencies) / elapsed,
+                        "p50_ms": statistics.median(latencies) * 1000,
+                        "p99_ms": percentile(latencies, 0.99) * 1000,
+                    }
+                )
+        return results
+
+    def run_wsgi(self, paths, concurrency, cookies):
+        local = threading.local()
+
+        def fetch(path):
+            if not hasattr(local, "client"):
+                local.client = Client()
+                local.client.cookies = cookies
+            started = time.perf_counter()
+            response = local.client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(fetch, paths))
+        return time.perf_counter() - started, latencies
+
+    def run_asgi(self, paths, concurrency, cookies):
+        async def main():
+            client = AsyncClient()
+            client.cookies = cookies
+            slots = asyncio.Semaphore(concurrency)
+
+            async def fetch(path):
+                async with slots:
+                    started = time.perf_counter()
+                    response = await client.get(path)
+                    assert response.status_code == 200, (path, response.status_code)
+                    return time.perf_counter() - started
+
+            started = time.perf_counter()
+            latencies = await asyncio.gather(*(fetch(path) for path in paths))
+            return time.perf_counter() - started, latencies
+
+        return asyncio.run(main())
@@ -0,0 +1,247 @@
+import json
+import platform
+import resource
+import sqlite3
+import statistics
+import time
+import tracemalloc
+from itertools import cycle
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from jeonse.benchdata import BENCH_PASSWORD, load_bench_data, percentile
+
+SIZES = {"10k": 10000, "100k": 100000, "1m": 1000000}
+
+FILTERS = {"total_area_min": 50, "contract_type": "wolse", "number_of_rooms_min": 2}
+HTMX = {"HTTP_HX_REQUEST": "true"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark login, listing_list (plain, htmx, filtered, sorted), "
+        "listing_detail and listing_create in-process against deterministic "
+        "data in a throwaway test database. Records p50/p95/p99 latency, "
+        "queries per request and peak allocation per request, with the cache "
+        "cleared before every request. Compare against an earlier --output "
+        "with --baseline to catch regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", nargs="+", choices=SIZES, default=["10k"])
+        parser.add_argument(
+            "--users", type=int, help="Defaults to one user per 100 listings."
+        )
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument(
+            "--memory-requests",
+            type=int,
+            default=5,
+            help="Requests per scenario replayed under tracemalloc.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the results here as JSON.")
+        parser.add_argument("--baseline", help="Results JSON to compare against.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative p95 slowdown counted as a regression.",
+        )
+
+    def handle(self, *args, **options):
+        report = {
+            "meta": {
+                "started_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "seed": options["seed"],
+                "requests": options["requests"],
+            },
+            "runs": [],
+        }
+        for size in options["size"]:
+            listings = SIZES[size]
+            users = options["users"] or max(1, listings // 100)
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                with override_settings(ALLOWED_HOSTS=["testserver"], THROTTLE_RATES={}):
+                    started = time.perf_counter()
+                    bench_users = load_bench_data(listings, users, options["seed"])
+                    loaded = time.perf_counter() - started
+                    results = self.run(bench_users[0], options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            report["runs"].append(
+                {
+                    "size": size,
+                    "listings": listings,
+                    "users": users,
+                    "load_seconds": loaded,
+                    "results": results,
+                }
+            )
+            self.print_run(report["runs"][-1])
+        report["meta"]["max_rss_kib"] = resource.getrusage(
+            resource.RUSAGE_SELF
+        ).ru_maxrss
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                self.compare(json.load(fh), report, options["threshold"])
+
+    def scenarios(self, user):
+        list_url = reverse("listing_list")
+        detail_urls = cycle(
+            reverse("listing_detail", kwargs={"pk": pk})
+            for pk in user.listings.values_list("pk", flat=True)[:1000]
+        )
+        login = {"login": user.email, "password": BENCH_PASSWORD}
+        create = {
+            "jeonse_deposit_amount": 300000000,
+            "wolse_deposit_amount": 0,
+            "wolse_monthly_payment": 0,
+            "gwanlibi_monthly_payment": 100000,
+            "annual_interest_rate": 4.5,
+            "total_area": 59.9,
+            "number_of_rooms": 3,
+            "number_of_bathrooms": 2,
+            "comment": "역세권 남향",
+        }
+        # name: (logged in, request, expected status)
+        return {
+            "login": (
+                False,
+                lambda client: client.post(reverse("account_login"), login),
+                302,
+            ),
+            "list": (True, lambda client: client.get(list_url), 200),
+            "list_htmx": (True, lambda client: client.get(list_url, **HTMX), 200),
+            "list_filtered": (
+                True,
+                lambda client: client.get(list_url, FILTERS),
+                200,
+            ),
+            "list_filtered_htmx": (
+                True,
+                lambda client: client.get(list_url, FILTERS, **HTMX),
+                200,
+            ),
+            "list_sorted": (
+                True,
+                lambda client: client.get(list_url, {"sort": "-total_monthly_payment"}),
+                200,
+            ),
+            "detail": (True, lambda client: client.get(next(detail_urls)), 200),
+            "create": (
+                True,
+                lambda client: client.post(reverse("listing_create"), create),
+                302,
+            ),
+        }
+
+    def run(self, user, options):
+        results = []
+        for name, (logged_in, request, status) in self.scenarios(user).items():
+            client = Client()
+            if logged_in:
+                client.force_login(user)
+
+            def fetch():
+                # Logging in again needs a fresh session each time.
+                if not logged_in:
+                    client.cookies.clear()
+                cache.clear()
+                started = time.perf_counter()
+                response = request(client)
+                elapsed = time.perf_counter() - started
+                assert response.status_code == status, (name, response.status_code)
+                return elapsed
+
+            latencies, queries = [], []
+            for _ in range(options["requests"]):
+                with CaptureQueriesContext(connection) as captured:
+                    latencies.append(fetch())
+                queries.append(len(captured))
+
+            peaks = []
+            tracemalloc.start()
+            try:
+                for _ in range(options["memory_requests"]):
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+                    fetch()
+                    peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            finally:
+                tracemalloc.stop()
+
+            results.append(
+                {
+                    "scenario": name,
+                    "requests": len(latencies),
+                    "p50_ms": statistics.median(latencies) * 1000,
+                    "p95_ms": percentile(latencies, 0.95) * 1000,
+                    "p99_ms": percentile(latencies, 0.99) * 1000,
+                    "queries_mean": statistics.mean(queries),
+                    "queries_max": max(queries),
+                    "peak_kib": max(peaks, default=0) / 1024,
+                }
+            )
+        return results
+
+    def print_run(self, run):
+        self.stdout.write(
+            f"{run['listings']} listings, {run['users']} users "
+            f"(loaded in {run['load_seconds']:.1f}s)"
+        )
+        self.stdout.write(
+            f"{'scenario':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>9}{'peak KiB':>10}"
+        )
+        for result in run["results"]:
+            self.stdout.write(
+                f"{result['scenario']:<20}{result['p50_ms']:>10.2f}"
+                f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['queries_max']:>9}{result['peak_kib']:>10.0f}"
+            )
+
+    def compare(self, baseline, report, threshold):
+        previous = {
+            (run["size"], result["scenario"]): result
+            for run in baseline["runs"]
+            for result in run["results"]
+        }
+        regressions = []
+        self.stdout.write(
+            f"{'size':<6}{'scenario':<20}{'p95 ms':>18}{'change':>9}{'queries':>10}"
+        )
+        for run in report["runs"]:
+            for result in run["results"]:
+                old = previous.get((run["size"], result["scenario"]))
+                if old is None:
+                    continue
+                change = result["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0
+                self.stdout.write(
+                    f"{run['size']:<6}{result['scenario']:<20}"
+                    f"{old['p95_ms']:>8.2f} -> {result['p95_ms']:>6.2f}"
+                    f"{change:>+9.0%}"
+                    f"{old['queries_max']:>5} -> {result['queries_max']}"
+                )
+                if change > threshold:
+                    regressions.append(f"{run['size']} {result['scenario']} p95")
+                if result["queries_max"] > old["queries_max"]:
+                    regressions.append(f"{run['size']} {result['scenario']} queries")
+        if regressions:
+            raise CommandError(f"Regressions: {', '.join(regressions)}")
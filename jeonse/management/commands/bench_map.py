@@ -0,0 +1,101 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpRequest, QueryDict
+
+from jeonse.api_views import MAP_FIELDS, MAP_MAX_MARKERS
+from jeonse.benchdata import DISTRICTS, load_bench_data, percentile
+from jeonse.filters import filter_listings
+from jeonse.geo import bbox_around
+
+# Viewports around one district centre, by half-width in km: a few blocks,
+# a neighbourhood, and the whole city.
+VIEWPORTS = {"street": 0.3, "district": 2, "city": 20}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare map viewport queries through the R*Tree against plain "
+        "latitude/longitude range filters: latency of fetching the markers the "
+        "map endpoint returns and of counting all listings in view, in ms, for "
+        "the heaviest bench user. Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=1000000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument("--output", help="Also write the results here as JSON.")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{'mode':<8}{'viewport':<10}{'in view':>8}"
+            f"{'map p50':>10}{'map p99':>10}{'count p50':>10}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<8}{result['viewport']:<10}{result['matches']:>8}"
+                f"{result['map_p50_ms']:>10.2f}{result['map_p99_ms']:>10.2f}"
+                f"{result['count_p50_ms']:>10.2f}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def run(self, options):
+        started = time.perf_counter()
+        user = load_bench_data(options["listings"], options["users"])[0]
+        self.stdout.write(
+            f"Inserted {options['listings']} listings with the index in "
+            f"{time.perf_counter() - started:.1f}s."
+        )
+
+        latitude, longitude = DISTRICTS["강남구"]
+        results = []
+        for viewport, km in VIEWPORTS.items():
+            south, west, north, east = bbox_around(latitude, longitude, km)
+            for mode in ("rtree", "scan"):
+                markers, count = [], []
+                for _ in range(options["requests"]):
+                    queryset = self.viewport(user, mode, south, west, north, east)
+                    started = time.perf_counter()
+                    list(queryset.values(*MAP_FIELDS)[: MAP_MAX_MARKERS + 1])
+                    markers.append(time.perf_counter() - started)
+                    started = time.perf_counter()
+                    matches = queryset.count()
+                    count.append(time.perf_counter() - started)
+                results.append(
+                    {
+                        "mode": mode,
+                        "viewport": viewport,
+                        "matches": matches,
+                        "map_p50_ms": statistics.median(markers) * 1000,
+                        "map_p99_ms": percentile(markers, 0.99) * 1000,
+                        "count_p50_ms": statistics.median(count) * 1000,
+                    }
+                )
+        return results
+
+    def viewport(self, user, mode, south, west, north, east):
+        """
+        The bbox filter as the map endpoint applies it, or the same bounds as
+        range filters on the columns, which only the creator index can serve.
+        """
+        queryset = user.listings.order_by()
+        if mode == "scan":
+            return queryset.filter(
+                latitude__range=(south, north), longitude__range=(west, east)
+            )
+        request = HttpRequest()
+        request.GET = QueryDict(f"bbox={south},{west},{north},{east}")
+        request.user = user
+        return filter_listings(request, queryset)[1]
@@ -0,0 +1,116 @@
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from jeonse.benchdata import COMMENT_WORDS, percentile
+from jeonse.filters import ListingFilter
+from jeonse.models import Listing
+
+# Appears in roughly one listing in a thousand.
+RARE_WORD = "복층"
+TERMS = ["역세권", "남향 신축", "풀옵션 주차가능 공원", RARE_WORD]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the FTS5 comment search against an icontains scan, alone and "
+        "combined with a numeric filter: latency of the first page and of "
+        "counting all matches, in ms. Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=1000000)
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument("--page-size", type=int, default=25)
+        parser.add_argument("--output", help="Also write the results here as JSON.")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{'mode':<10}{'terms':<24}{'filter':<8}{'matches':>8}"
+            f"{'page p50':>10}{'page p99':>10}{'count p50':>10}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<10}{result['terms']:<24}"
+                f"{'yes' if result['filtered'] else 'no':<8}{result['matches']:>8}"
+                f"{result['page_p50_ms']:>10.2f}{result['page_p99_ms']:>10.2f}"
+                f"{result['count_p50_ms']:>10.2f}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def run(self, options):
+        user = get_user_model().objects.create_user(
+            username="bench", email="bench@example.com", password="bench"
+        )
+        rng = random.Random(0)
+        started = time.perf_counter()
+        for offset in range(0, options["listings"], 10000):
+            Listing.objects.bulk_create(
+                Listing(
+                    creator=user,
+                    total_area=20 + i % 80,
+                    comment=" ".join(
+                        rng.sample(COMMENT_WORDS, rng.randint(1, 5))
+                        + ([RARE_WORD] if rng.random() < 0.001 else [])
+                    ),
+                )
+                for i in range(offset, min(offset + 10000, options["listings"]))
+            )
+        self.stdout.write(
+            f"Inserted {options['listings']} listings with the index in "
+            f"{time.perf_counter() - started:.1f}s."
+        )
+
+        results = []
+        for terms in TERMS:
+            for filtered in (False, True):
+                params = {"total_area_min": 50} if filtered else {}
+                for mode in ("fts", "icontains"):
+                    page, count = [], []
+                    for _ in range(options["requests"]):
+                        queryset = self.search(user, mode, terms, params)
+                        started = time.perf_counter()
+                        list(queryset.values_list("pk")[: options["page_size"]])
+                        page.append(time.perf_counter() - started)
+                        started = time.perf_counter()
+                        matches = queryset.count()
+                        count.append(time.perf_counter() - started)
+                    results.append(
+                        {
+                            "mode": mode,
+                            "terms": terms,
+                            "filtered": filtered,
+                            "matches": matches,
+                            "page_p50_ms": statistics.median(page) * 1000,
+                            "page_p99_ms": percentile(page, 0.99) * 1000,
+                            "count_p50_ms": statistics.median(count) * 1000,
+                        }
+                    )
+        return results
+
+    def search(self, user, mode, terms, params):
+        """
+        The ranked FTS search, or the same terms as icontains scans in id
+        order, which is all an unindexed search can offer.
+        """
+        queryset = user.listings.all()
+        if mode == "fts":
+            params = {**params, "search": terms}
+        else:
+            for term in terms.split():
+                queryset = queryset.filter(comment__icontains=term)
+            queryset = queryset.order_by("pk")
+        return ListingFilter(params, queryset=queryset).qs
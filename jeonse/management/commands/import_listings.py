@@ -0,0 +1,177 @@
+import csv
+import itertools
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from jeonse.forms import ListingForm
+from jeonse.models import Listing
+
+
+def read_csv(fh):
+    yield from csv.DictReader(fh)
+
+
+class MalformedLine:
+    """A JSONL line that is not a JSON object, rejected like an invalid row."""
+
+    def __init__(self, line, error):
+        self.line = line
+        self.errors = {"__all__": [{"message": error, "code": "malformed"}]}
+
+
+def read_jsonl(fh):
+    for line in fh:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield MalformedLine(line, f"Invalid JSON: {e}")
+            continue
+        if isinstance(row, dict):
+            yield row
+        else:
+            yield MalformedLine(line, "Expected a JSON object.")
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+class Command(BaseCommand):
+    help = "Stream listings from a CSV or JSONL file into the database in batches."
+    # Called with the last committed row number after each batch.
+    stealth_options = ("progress",)
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or '-' for stdin.")
+        creator = parser.add_mutually_exclusive_group(required=True)
+        creator.add_argument("--creator", help="Email of the user owning the listings.")
+        creator.add_argument(
+            "--creator-id", type=int, help="Id of the user owning the listings."
+        )
+        parser.add_argument("--format", choices=READERS, default=None)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--skip",
+            type=int,
+            default=0,
+            help="Number of input rows already committed by a previous run.",
+        )
+        parser.add_argument(
+            "--rejects", help="Write rejected rows and their errors as JSONL here."
+        )
+
+    def handle(self, *args, **options):
+        if options["creator_id"] is not None:
+            lookup = {"pk": options["creator_id"]}
+            described = f"id {options['creator_id']}"
+        else:
+            lookup = {"email": options["creator"]}
+            described = f"email {options['creator']!r}"
+        try:
+            creator = get_user_model().objects.get(**lookup)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with {described}.")
+        except get_user_model().MultipleObjectsReturned:
+            raise CommandError(f"Several users have {described}; use --creator-id.")
+
+        fmt = options["format"] or (
+            "jsonl" if options["path"].endswith((".jsonl", ".ndjson")) else "csv"
+        )
+        if options["path"] == "-":
+            fh = sys.stdin
+        else:
+            fh = open(options["path"], newline="", encoding="utf-8")
+        rejects = None
+        if options["rejects"]:
+            rejects = open(options["rejects"], "a", encoding="utf-8")
+
+        failed = True
+        try:
+            rows = enumerate(READERS[fmt](fh), start=1)
+            rows = itertools.islice(rows, options["skip"], None)
+            self._import(creator, rows, options, rejects)
+            failed = False
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+            if rejects:
+                rejects.close()
+            # Ranked once for the whole import rather than after every batch,
+            # including the batches committed before a failure. A ranking
+            # error after a failed batch must not hide that batch's error.
+            try:
+                Listing.objects.rank_by_cost([creator.pk])
+            except Exception as e:
+                if not failed:
+                    raise
+                self.stderr.write(f"Ranking the imported listings failed: {e}")
+
+    def _import(self, creator, rows, options, rejects):
+        committed = options["skip"]
+        imported = rejected = 0
+        started = time.perf_counter()
+
+        while True:
+            chunk = list(itertools.islice(rows, options["batch_size"]))
+            if not chunk:
+                break
+
+            # Rejects are written once their batch commits, so resuming a
+            # failed batch with --skip does not write them twice.
+            listings, batch_rejects = [], []
+            for number, row in chunk:
+                if isinstance(row, MalformedLine):
+                    data, errors = row.line, row.errors
+                else:
+                    form = ListingForm(data=row)
+                    if form.is_valid():
+                        form.instance.creator = creator
+                        listings.append(form.instance)
+                        continue
+                    data, errors = row, form.errors.get_json_data()
+                batch_rejects.append(
+                    json.dumps(
+                        {"row": number, "data": data, "errors": errors},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+                if options["verbosity"] > 1:
+                    self.stderr.write(f"Row {number} rejected: {json.dumps(errors)}")
+
+            try:
+                with transaction.atomic():
+                    Listing.objects.bulk_create(listings, rank=False)
+            except Exception as e:
+                raise CommandError(
+                    f"Batch after row {committed} failed: {e}. "
+                    f"Resume with --skip {committed}."
+                ) from e
+
+            committed = chunk[-1][0]
+            imported += len(listings)
+            rejected += len(batch_rejects)
+            if rejects:
+                rejects.writelines(batch_rejects)
+                rejects.flush()
+            if options.get("progress"):
+                options["progress"](committed)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Committed through row {committed}.")
+
+        elapsed = time.perf_counter() - started
+        processed = imported + rejected
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} listings, rejected {rejected} rows "
+                f"in {elapsed:.2f}s ({rate:.0f} rows/sec)."
+            )
+        )
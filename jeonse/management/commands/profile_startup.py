@@ -0,0 +1,151 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from jeonse.coldstart import PHASES, prepare_database, profile_boot
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot fresh worker processes and time each step up to their first "
+        "listing_list response: interpreter start, django.setup(), loading the "
+        "WSGI application and the first and second requests, with the modules "
+        "each step imports and the slowest imports. Runs against a throwaway "
+        "database. Compare against an earlier --output with --baseline to "
+        "catch boot time regressions in CI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument(
+            "--top", type=int, default=15, help="Number of slowest imports to list."
+        )
+        parser.add_argument("--output", help="Write the results here as JSON.")
+        parser.add_argument("--baseline", help="Results JSON to compare against.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative slowdown of the first response counted as a regression.",
+        )
+
+    def handle(self, *args, **options):
+        url = reverse("listing_list")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "db.sqlite3")
+            try:
+                session_key = prepare_database(path)
+                runs = [
+                    profile_boot(path, session_key, url) for _ in range(options["runs"])
+                ]
+            except subprocess.CalledProcessError as e:
+                raise CommandError(f"Worker failed:\n{e.stderr}")
+        for run in runs:
+            if run["status"] != [200, 200]:
+                raise CommandError(f"{url} answered {run['status']}.")
+
+        report = {
+            "meta": {
+                "started_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "platform": platform.platform(),
+                "runs": options["runs"],
+                "url": url,
+            },
+            "first_response_ms": statistics.median(first_response(run) for run in runs),
+            "phases": {
+                phase: {
+                    "p50_ms": statistics.median(run["phases"][phase] for run in runs),
+                    "imports": len(phase_imports(runs[0], phase)),
+                    "import_ms": statistics.median(
+                        sum(row["self_ms"] for row in phase_imports(run, phase))
+                        for run in runs
+                    ),
+                }
+                for phase in PHASES
+            },
+            "slowest_imports": slowest_imports(runs, options["top"]),
+        }
+        self.print_report(report)
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                self.compare(json.load(fh), report, options["threshold"])
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{'phase':<16}{'p50 ms':>10}{'imports':>10}{'import ms':>11}"
+        )
+        for phase, result in report["phases"].items():
+            self.stdout.write(
+                f"{phase:<16}{result['p50_ms']:>10.1f}{result['imports']:>10}"
+                f"{result['import_ms']:>11.1f}"
+            )
+        self.stdout.write(
+            f"{'first response':<16}{report['first_response_ms']:>10.1f}\n"
+        )
+        self.stdout.write(f"{'slowest imports':<48}{'phase':<16}{'ms':>8}")
+        for row in report["slowest_imports"]:
+            self.stdout.write(
+                f"{row['module']:<48}{row['phase']:<16}{row['cumulative_ms']:>8.1f}"
+            )
+
+    def compare(self, baseline, report, threshold):
+        regressions = []
+        old, new = baseline["first_response_ms"], report["first_response_ms"]
+        change = new / old - 1 if old else 0
+        self.stdout.write(f"\nfirst response {old:.1f} -> {new:.1f} ms ({change:+.0%})")
+        if change > threshold:
+            regressions.append("first response")
+        for phase, result in report["phases"].items():
+            previous = baseline["phases"].get(phase)
+            if previous is None:
+                continue
+            self.stdout.write(
+                f"{phase:<16}imports {previous['imports']:>5} -> {result['imports']}"
+            )
+            if result["imports"] > previous["imports"]:
+                regressions.append(f"{phase} imports")
+        if regressions:
+            raise CommandError(f"Regressions: {', '.join(regressions)}")
+
+
+def first_response(run):
+    return sum(
+        run["phases"][phase] for phase in PHASES[: PHASES.index("first_request") + 1]
+    )
+
+
+def phase_imports(run, phase):
+    return [row for row in run["imports"] if row["phase"] == phase]
+
+
+def slowest_imports(runs, top):
+    """
+    Imports not nested in another that ran before the first response, by
+    their median cumulative time over the runs.
+    """
+    times = {}
+    for run in runs:
+        for row in run["imports"]:
+            if row["depth"] == 0 and row["phase"] != "second_request":
+                times.setdefault((row["module"], row["phase"]), []).append(
+                    row["cumulative_ms"]
+                )
+    rows = [
+        {"module": module, "phase": phase, "cumulative_ms": statistics.median(ms)}
+        for (module, phase), ms in times.items()
+    ]
+    return sorted(rows, key=lambda row: -row["cumulative_ms"])[:top]
@@ -0,0 +1,30 @@
+from django.db.models import Count
+
+from jeonse.management.rebuild import RebuildCommand
+from jeonse.models import LISTING_COUNTER_BUCKETS, Listing, ListingCounter
+
+
+class Command(RebuildCommand):
+    help = "Recount ListingCounter rows from the listings table and report drift."
+    model = ListingCounter
+    key_fields = ["user_id", "bucket"]
+    value_field = "count"
+    noun = "counters"
+
+    def actual_values(self):
+        annotations = {
+            bucket: Count("pk", filter=q) if q else Count("pk")
+            for bucket, q in LISTING_COUNTER_BUCKETS.items()
+        }
+        counts = {}
+        for row in Listing.objects.values("creator").annotate(**annotations):
+            for bucket in LISTING_COUNTER_BUCKETS:
+                counts[row["creator"], bucket] = row[bucket]
+        return counts
+
+    def empty_value(self):
+        return 0
+
+    def describe_drift(self, key, stored, actual):
+        if stored != actual:
+            return f"User {key[0]} bucket {key[1]!r}: stored {stored}, actual {actual}"
@@ -0,0 +1,30 @@
+from jeonse.management.rebuild import RebuildCommand
+from jeonse.models import Listing, ListingStats
+from jeonse.stats import (
+    empty_stats,
+    stats_aggregates,
+    stats_drift,
+    stats_from_aggregates,
+)
+
+
+class Command(RebuildCommand):
+    help = "Recompute ListingStats rows from the listings table and report drift."
+    model = ListingStats
+    value_field = "data"
+    noun = "stats"
+
+    def actual_values(self):
+        """Every user's stats, in one grouped aggregate query."""
+        rows = Listing.objects.values("creator").annotate(**stats_aggregates())
+        return {
+            (row["creator"],): stats_from_aggregates(row) for row in rows.order_by()
+        }
+
+    def empty_value(self):
+        return empty_stats()
+
+    def describe_drift(self, key, stored, actual):
+        drift = stats_drift(stored, actual)
+        if drift:
+            return f"User {key[0]}: {', '.join(drift)} drifted"
@@ -0,0 +1,53 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jeonse.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (exports, imports, recalculations) from "
+        "the database, until interrupted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=2,
+            help="Jobs run at once, each on its own thread.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before looking for new jobs when idle.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(options["concurrency"], options["poll_interval"])
+        # Finish the running jobs on SIGTERM/Ctrl-C; a second Ctrl-C aborts.
+        handlers = {
+            signum: signal.signal(signum, self.stop_handler(worker))
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            processed = worker.run(burst=options["burst"])
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(f"Ran {processed} jobs.")
+
+    def stop_handler(self, worker):
+        def stop(signum, frame):
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            self.stderr.write("Stopping after the running jobs finish.")
+            worker.stop()
+
+        return stop
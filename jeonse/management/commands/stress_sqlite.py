@@ -0,0 +1,135 @@
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from jeonse.benchdata import create_bench_users, generate_listings, percentile
+from jeonse.filters import ListingFilter
+from jeonse.models import Listing
+
+ALIAS = "stress"
+
+READER_FILTERS = [
+    {},
+    {"total_area_min": 50},
+    {"contract_type": "wolse", "number_of_rooms_min": 2},
+    {"search": "역세권"},
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer the Listing table of a scratch SQLite file with concurrent "
+        "writer and reader threads and report throughput, latency and errors. "
+        "Fails if any operation errored, e.g. with 'database is locked'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=16)
+        parser.add_argument("--readers", type=int, default=16)
+        parser.add_argument("--operations", type=int, default=200, help="Per thread.")
+        parser.add_argument(
+            "--engine",
+            default="jeonse.backends.sqlite3",
+            help="Database backend to stress, e.g. django.db.backends.sqlite3 "
+            "to compare with SQLite defaults.",
+        )
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        connections.settings[ALIAS] = {
+            **connections.settings["default"],
+            "ENGINE": options["engine"],
+            "NAME": str(Path(directory) / "stress.sqlite3"),
+            "OPTIONS": {},
+            "TEST": {},
+        }
+        try:
+            call_command("migrate", database=ALIAS, verbosity=0)
+            results = self.run(options)
+        finally:
+            connections[ALIAS].close()
+            del connections.settings[ALIAS]
+            shutil.rmtree(directory)
+
+        self.stdout.write(
+            f"{'role':<8}{'ops':>8}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+            f"{'errors':>8}"
+        )
+        for role, result in results.items():
+            self.stdout.write(
+                f"{role:<8}{result['operations']:>8}{result['throughput']:>10.1f}"
+                f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{len(result['errors']):>8}"
+            )
+        errors = [error for result in results.values() for error in result["errors"]]
+        if errors:
+            raise CommandError(f"{len(errors)} operations failed, first: {errors[0]}")
+
+    def run(self, options):
+        users = create_bench_users(max(options["writers"], 1), using=ALIAS)
+        Listing.objects.using(ALIAS).bulk_create(generate_listings(users, 1000))
+
+        def write(number, record):
+            user = users[number]
+            listings = generate_listings([user], options["operations"], seed=number)
+            for listing in listings:
+                listing.save(using=ALIAS)
+                record()
+
+        def read(number, record):
+            user = users[number % len(users)]
+            for i in range(options["operations"]):
+                params = READER_FILTERS[i % len(READER_FILTERS)]
+                queryset = user.listings.using(ALIAS).all()
+                queryset = ListingFilter(params, queryset=queryset).qs
+                list(queryset.values_list("pk", "total_area")[:25])
+                record()
+
+        results = {}
+        threads = []
+        for role, target, count in [
+            ("write", write, options["writers"]),
+            ("read", read, options["readers"]),
+        ]:
+            result = results[role] = {"latencies": [], "errors": []}
+            for number in range(count):
+                threads.append(
+                    threading.Thread(target=self.worker, args=(target, number, result))
+                )
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        for result in results.values():
+            latencies = result.pop("latencies")
+            result["operations"] = len(latencies)
+            result["throughput"] = len(latencies) / elapsed
+            result["p50_ms"] = statistics.median(latencies or [0]) * 1000
+            result["p99_ms"] = percentile(latencies or [0], 0.99) * 1000
+        return results
+
+    def worker(self, target, number, result):
+        last = [time.perf_counter()]
+
+        def record():
+            now = time.perf_counter()
+            result["latencies"].append(now - last[0])
+            last[0] = now
+
+        try:
+            target(number, record)
+        except OperationalError as e:
+            result["errors"].append(str(e))
+        finally:
+            connections[ALIAS].close()
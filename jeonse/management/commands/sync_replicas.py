@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over each read replica with the "
+        "SQLite backup API, standing in for replication when testing locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "replicas",
+            nargs="*",
+            help="Aliases to refresh; defaults to settings.DATABASE_REPLICAS.",
+        )
+
+    def handle(self, *args, **options):
+        replicas = options["replicas"] or settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError("No read replicas are configured.")
+
+        primary = connections["default"]
+        primary.ensure_connection()
+        for alias in replicas:
+            if alias not in connections:
+                raise CommandError(f"Unknown database {alias!r}.")
+            replica = connections[alias]
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f"Copied the primary to {alias}.")
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class RebuildCommand(BaseCommand):
+    """
+    Recompute a model's denormalized rows from the listings table in one
+    transaction, and report or fix those that drifted. Rows are keyed by
+    key_fields and hold their value in value_field.
+    """
+
+    model = None
+    key_fields = ["user_id"]
+    value_field = None
+    noun = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Report drift without fixing it."
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            actual = self.actual_values()
+            stored = {
+                tuple(row[1:-1]): (row[0], row[-1])
+                for row in self.model.objects.values_list(
+                    "pk", *self.key_fields, self.value_field
+                )
+            }
+
+            drifted, created = [], []
+            for key in stored.keys() | actual.keys():
+                pk, value = stored.get(key, (None, None))
+                expected = actual[key] if key in actual else self.empty_value()
+                if pk is None:
+                    created.append(
+                        self.model(
+                            **dict(zip(self.key_fields, key)),
+                            **{self.value_field: expected},
+                        )
+                    )
+                    continue
+                drift = self.describe_drift(key, value, expected)
+                if drift:
+                    drifted.append(self.model(pk=pk, **{self.value_field: expected}))
+                    self.stdout.write(drift)
+
+            if not options["dry_run"]:
+                self.model.objects.bulk_update(
+                    drifted, [self.value_field], batch_size=500
+                )
+                self.model.objects.bulk_create(created, batch_size=500)
+
+        verb = "found" if options["dry_run"] else "fixed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(drifted)} drifted and {len(created)} missing {self.noun} {verb}."
+            )
+        )
+
+    def actual_values(self):
+        """Every key's value computed from the listings, as {key tuple: value}."""
+        raise NotImplementedError
+
+    def empty_value(self):
+        raise NotImplementedError
+
+    def describe_drift(self, key, stored, actual):
+        """A line reporting how stored differs from actual, or None."""
+        raise NotImplementedError
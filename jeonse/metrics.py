@@ -0,0 +1,108 @@
+import threading
+from bisect import bisect_left
+
+from jeonse.cache import table_cache_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """
+    Per-process latency histograms and time totals keyed by URL name. An
+    observation is a lock and a handful of additions, cheap enough to leave
+    on for every request.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def observe(self, view, duration, timings):
+        with self.lock:
+            entry = self.views.get(view)
+            if entry is None:
+                entry = self.views[view] = {
+                    "buckets": [0] * len(self.buckets),
+                    "count": 0,
+                    "sum": 0.0,
+                    "sql_queries": 0,
+                    "sql_seconds": 0.0,
+                    "template_seconds": 0.0,
+                }
+            index = bisect_left(self.buckets, duration)
+            if index < len(self.buckets):
+                entry["buckets"][index] += 1
+            entry["count"] += 1
+            entry["sum"] += duration
+            entry["sql_queries"] += timings.sql_count
+            entry["sql_seconds"] += timings.sql_time
+            entry["template_seconds"] += timings.spans.get("template", 0.0)
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def render(self):
+        """The metrics in Prometheus text exposition format."""
+        with self.lock:
+            views = {
+                view: {**entry, "buckets": list(entry["buckets"])}
+                for view, entry in sorted(self.views.items())
+            }
+
+        lines = [
+            "# HELP jeonse_request_duration_seconds Request latency by URL name.",
+            "# TYPE jeonse_request_duration_seconds histogram",
+        ]
+        for view, entry in views.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["buckets"]):
+                cumulative += count
+                lines.append(
+                    f'jeonse_request_duration_seconds_bucket{{view="{_label(view)}",'
+                    f'le="{bound}"}} {cumulative}'
+                )
+            lines += [
+                f'jeonse_request_duration_seconds_bucket{{view="{_label(view)}",'
+                f'le="+Inf"}} {entry["count"]}',
+                f'jeonse_request_duration_seconds_sum{{view="{_label(view)}"}} '
+                f'{entry["sum"]}',
+                f'jeonse_request_duration_seconds_count{{view="{_label(view)}"}} '
+                f'{entry["count"]}',
+            ]
+        for name, key, help_text in [
+            ("sql_queries_total", "sql_queries", "SQL queries run by requests."),
+            ("sql_seconds_total", "sql_seconds", "Time requests spent in SQL."),
+            (
+                "template_seconds_total",
+                "template_seconds",
+                "Time requests spent rendering templates.",
+            ),
+        ]:
+            lines += [
+                f"# HELP jeonse_request_{name} {help_text}",
+                f"# TYPE jeonse_request_{name} counter",
+            ]
+            lines += [
+                f'jeonse_request_{name}{{view="{_label(view)}"}} {entry[key]}'
+                for view, entry in views.items()
+            ]
+
+        lines += [
+            "# HELP jeonse_listing_table_cache_total Listing table fragment cache "
+            "lookups.",
+            "# TYPE jeonse_listing_table_cache_total counter",
+        ]
+        lines += [
+            f'jeonse_listing_table_cache_total{{outcome="{outcome}"}} {count}'
+            for outcome, count in table_cache_stats().items()
+        ]
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,255 @@
+import math
+import mimetypes
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+
+from jeonse.metrics import request_metrics
+from jeonse.routers import RequestRouting
+from jeonse.staticfiles import find_variant
+from jeonse.throttle import parse_rate, take_token
+from jeonse.timing import RequestTimings
+
+# Server-Timing metrics in the order they are reported.
+SERVER_TIMING = [
+    ("db", "SQL"),
+    ("view", "View"),
+    ("template", "Templates"),
+    ("table", "Listing table"),
+    ("total", "Total"),
+]
+
+
+class ServerTimingMiddleware:
+    """
+    Report how each request's time split between SQL, the view, template
+    rendering and the listing table in a Server-Timing header, and feed the
+    per-URL-name histograms served at /metrics/.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = timings.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings.stop(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = timings.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings.stop(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total = time.perf_counter() - timings.started
+        durations = {
+            "db": timings.sql_time,
+            "view": total - timings.spans.get("template", 0.0),
+            "template": timings.spans.get("template"),
+            "table": timings.spans.get("table"),
+            "total": total,
+        }
+        metrics = []
+        for name, description in SERVER_TIMING:
+            if durations[name] is None:
+                continue
+            if name == "db":
+                description = f"{timings.sql_count} queries"
+            metrics.append(
+                f'{name};dur={durations[name] * 1000:.2f};desc="{description}"'
+            )
+        response["Server-Timing"] = ", ".join(metrics)
+
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else "unmatched"
+        request_metrics.observe(view, total, timings)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let jeonse.routers.PrimaryReplicaRouter see the request being handled,
+    to route its listing reads to a replica or to the primary.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        routing = RequestRouting(request)
+        token = routing.start()
+        try:
+            return self.get_response(request)
+        finally:
+            routing.stop(token)
+
+    async def __acall__(self, request):
+        routing = RequestRouting(request)
+        token = routing.start()
+        try:
+            return await self.get_response(request)
+        finally:
+            routing.stop(token)
+
+
+class ThrottleMiddleware:
+    """
+    Limit how often each user, or each client IP when logged out, may request
+    the views named in THROTTLE_RATES, with a token bucket per user and view
+    in the cache. Requests past the limit get a 429 with Retry-After.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            # Django would call a sync process_view in a thread under ASGI;
+            # keep the check for views without a rate on the event loop.
+            self.process_view = self.aprocess_view
+        self.rates = {
+            name: parse_rate(rate) for name, rate in settings.THROTTLE_RATES.items()
+        }
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.url_name
+        if name not in self.rates:
+            return None
+        return self.throttle(request, name)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.url_name
+        if name not in self.rates:
+            return None
+        return await sync_to_async(self.throttle)(request, name)
+
+    def throttle(self, request, name):
+        if request.user.is_authenticated:
+            client = f"user:{request.user.pk}"
+        else:
+            client = f"ip:{request.META.get('REMOTE_ADDR')}"
+        wait = take_token(f"throttle:{name}:{client}", *self.rates[name])
+        if not wait:
+            return None
+        response = HttpResponse(
+            "요청이 너무 많습니다. 잠시 후 다시 시도하세요.",
+            content_type="text/plain; charset=utf-8",
+            status=429,
+        )
+        response["Retry-After"] = str(math.ceil(wait))
+        return response
+
+
+# Hashed file names change with their content, so they can be cached forever.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_CACHE_CONTROL = "public, max-age=60"
+
+
+class StaticFilesMiddleware:
+    """
+    Serve files collected into STATIC_ROOT, picking the brotli or gzip copy
+    the client accepts, before any other middleware runs for them. Requests
+    for files that were not collected fall through, so runserver still serves
+    straight from the apps in development.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.prefix = "/" + settings.STATIC_URL.lstrip("/")
+        self.immutable = None
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = self.serve(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def serve(self, request):
+        if (
+            not settings.STATIC_ROOT
+            or request.method not in ("GET", "HEAD")
+            or not request.path.startswith(self.prefix)
+        ):
+            return None
+        name = request.path[len(self.prefix) :]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            raise Http404
+        if not os.path.isfile(path):
+            return None
+
+        variant, encoding = find_variant(
+            path, request.headers.get("Accept-Encoding", "")
+        )
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        response = FileResponse(
+            open(variant, "rb"),
+            content_type=content_type,
+            filename=os.path.basename(path),
+        )
+        if encoding:
+            response["Content-Encoding"] = encoding
+        response["Vary"] = "Accept-Encoding"
+        if self.immutable is None:
+            immutable_names = getattr(staticfiles_storage, "immutable_names", None)
+            self.immutable = immutable_names() if immutable_names else set()
+        response["Cache-Control"] = (
+            IMMUTABLE_CACHE_CONTROL if name in self.immutable else STATIC_CACHE_CONTROL
+        )
+        return response
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.4 on 2026-10-18 12:46
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jeonse", "0002_listing"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "total_monthly_payment"],
+                name="listing_creator_payment_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "total_area"], name="listing_creator_area_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "number_of_rooms"], name="listing_creator_rooms_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "number_of_bathrooms"],
+                name="listing_creator_baths_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "jeonse_deposit_amount"],
+                name="listing_creator_jeonse_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "wolse_deposit_amount"],
+                name="listing_creator_wolse_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                models.F("creator"),
+                models.ExpressionWrapper(
+                    django.db.models.expressions.CombinedExpression(
+                        models.F("total_monthly_payment"), "/", models.F("total_area")
+                    ),
+                    output_field=models.FloatField(),
+                ),
+                name="listing_creator_cost_area_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.4 on 2026-10-18 12:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jeonse", "0003_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ListingCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.CharField(max_length=32)),
+                ("count", models.BigIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="listing_counters",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="listingcounter",
+            constraint=models.UniqueConstraint(
+                fields=("user", "bucket"), name="listing_counter_user_bucket_unique"
+            ),
+        ),
+    ]
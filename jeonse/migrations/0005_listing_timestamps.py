@@ -0,0 +1,33 @@
+# Generated by Django 4.2.4 on 2026-10-18 13:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jeonse", "0004_listingcounter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="listings_changed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name="등록일",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="수정일"),
+        ),
+    ]
@@ -0,0 +1,70 @@
+from django.db import migrations
+
+# The comment search index and its triggers as jeonse.search created them
+# when this migration was written.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS jeonse_listing_fts USING fts5(
+        comment,
+        content='jeonse_listing',
+        content_rowid='id',
+        tokenize='unicode61',
+        prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jeonse_listing_fts_insert
+    AFTER INSERT ON jeonse_listing BEGIN
+        INSERT INTO jeonse_listing_fts(rowid, comment)
+        VALUES (new.id, new.comment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jeonse_listing_fts_delete
+    AFTER DELETE ON jeonse_listing BEGIN
+        INSERT INTO jeonse_listing_fts(jeonse_listing_fts, rowid, comment)
+        VALUES ('delete', old.id, old.comment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jeonse_listing_fts_update
+    AFTER UPDATE OF id, comment ON jeonse_listing BEGIN
+        INSERT INTO jeonse_listing_fts(jeonse_listing_fts, rowid, comment)
+        VALUES ('delete', old.id, old.comment);
+        INSERT INTO jeonse_listing_fts(rowid, comment)
+        VALUES (new.id, new.comment);
+    END
+    """,
+    "INSERT INTO jeonse_listing_fts(jeonse_listing_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS jeonse_listing_fts_insert",
+    "DROP TRIGGER IF EXISTS jeonse_listing_fts_delete",
+    "DROP TRIGGER IF EXISTS jeonse_listing_fts_update",
+    "DROP TABLE IF EXISTS jeonse_listing_fts",
+]
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jeonse", "0005_listing_timestamps"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 4.2.4 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+def compute_value_metrics(apps, schema_editor):
+    Listing = apps.get_model("jeonse", "Listing")
+    db = schema_editor.connection.alias
+    total = models.F("total_monthly_payment") * 1.0
+    Listing.objects.using(db).update(
+        monthly_cost_per_area=models.Case(
+            models.When(total_area__gt=0, then=total / models.F("total_area")),
+            output_field=models.FloatField(),
+        ),
+        monthly_cost_per_room=models.Case(
+            models.When(
+                number_of_rooms__gt=0, then=total / models.F("number_of_rooms")
+            ),
+            output_field=models.FloatField(),
+        ),
+    )
+    # As rank_listings_by_cost() did when this migration was written, for
+    # every user.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE jeonse_listing SET cost_rank = ranked.cost_rank FROM ("
+            "  SELECT id, RANK() OVER ("
+            "    PARTITION BY creator_id ORDER BY monthly_cost_per_area DESC"
+            "  ) - 1 AS cost_rank"
+            "  FROM jeonse_listing"
+            "  WHERE monthly_cost_per_area IS NOT NULL"
+            ") AS ranked WHERE jeonse_listing.id = ranked.id"
+        )
+        cursor.execute(
+            "INSERT INTO jeonse_listingcounter (user_id, bucket, count)"
+            " SELECT creator_id, 'ranked', COUNT(*) FROM jeonse_listing"
+            " WHERE monthly_cost_per_area IS NOT NULL"
+            " GROUP BY creator_id"
+            " ON CONFLICT (user_id, bucket) DO UPDATE SET count = excluded.count"
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jeonse", "0006_listing_search"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="listing",
+            name="listing_creator_cost_area_idx",
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="cost_rank",
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="monthly_cost_per_area",
+            field=models.FloatField(
+                editable=False, null=True, verbose_name="㎡당 월비용"
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="monthly_cost_per_room",
+            field=models.FloatField(
+                editable=False, null=True, verbose_name="방당 월비용"
+            ),
+        ),
+        migrations.RunPython(compute_value_metrics, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "monthly_cost_per_area"],
+                name="listing_creator_cost_area_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "monthly_cost_per_room"],
+                name="listing_creator_cost_room_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "cost_rank"], name="listing_creator_cost_rank_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.4 on 2026-10-18 14:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jeonse", "0007_listing_value_metrics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("export", "내보내기"),
+                            ("import", "가져오기"),
+                            ("recalculate", "재계산"),
+                        ],
+                        max_length=32,
+                        verbose_name="작업",
+                    ),
+                ),
+                ("params", models.JSONField(default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "대기"),
+                            ("running", "실행 중"),
+                            ("succeeded", "완료"),
+                            ("failed", "실패"),
+                            ("cancelled", "취소"),
+                        ],
+                        default="queued",
+                        max_length=16,
+                        verbose_name="상태",
+                    ),
+                ),
+                ("progress", models.BigIntegerField(default=0)),
+                ("progress_total", models.BigIntegerField(null=True)),
+                ("result", models.JSONField(null=True)),
+                ("error", models.TextField(blank=True)),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("max_attempts", models.PositiveSmallIntegerField(default=3)),
+                ("cancel_requested", models.BooleanField(default=False)),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now)),
+                ("worker", models.CharField(blank=True, max_length=64)),
+                ("heartbeat_at", models.DateTimeField(null=True)),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="등록일"),
+                ),
+                ("started_at", models.DateTimeField(null=True)),
+                ("finished_at", models.DateTimeField(null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "run_after"], name="job_status_due_idx"
+                    ),
+                    models.Index(
+                        fields=["user", "-created_at"], name="job_user_created_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 4.2.4 on 2026-10-18 14:42
+
+import django.core.validators
+from django.db import migrations, models
+
+# The listing R*Tree and its triggers as jeonse.geo created them when this
+# migration was written, with creators padded by 0.25.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS jeonse_listing_rtree USING rtree(
+        id, min_creator, max_creator, min_lat, max_lat, min_lng, max_lng
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jeonse_listing_rtree_insert
+    AFTER INSERT ON jeonse_listing
+    WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+        INSERT INTO jeonse_listing_rtree
+        VALUES (new.id, new.creator_id - 0.25, new.creator_id + 0.25,
+                new.latitude, new.latitude, new.longitude, new.longitude);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jeonse_listing_rtree_delete
+    AFTER DELETE ON jeonse_listing BEGIN
+        DELETE FROM jeonse_listing_rtree WHERE id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jeonse_listing_rtree_update
+    AFTER UPDATE OF id, latitude, longitude, creator_id ON jeonse_listing BEGIN
+        DELETE FROM jeonse_listing_rtree WHERE id = old.id;
+        INSERT INTO jeonse_listing_rtree
+        SELECT new.id, new.creator_id - 0.25, new.creator_id + 0.25,
+               new.latitude, new.latitude, new.longitude, new.longitude
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    END
+    """,
+    "DELETE FROM jeonse_listing_rtree",
+    """
+    INSERT INTO jeonse_listing_rtree
+    SELECT id, creator_id - 0.25, creator_id + 0.25, latitude, latitude,
+           longitude, longitude
+    FROM jeonse_listing
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS jeonse_listing_rtree_insert",
+    "DROP TRIGGER IF EXISTS jeonse_listing_rtree_delete",
+    "DROP TRIGGER IF EXISTS jeonse_listing_rtree_update",
+    "DROP TABLE IF EXISTS jeonse_listing_rtree",
+]
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jeonse", "0009_listingstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="district",
+            field=models.CharField(
+                blank=True, default="", max_length=50, verbose_name="지역"
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="latitude",
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-90),
+                    django.core.validators.MaxValueValidator(90),
+                ],
+                verbose_name="위도",
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="longitude",
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-180),
+                    django.core.validators.MaxValueValidator(180),
+                ],
+                verbose_name="경도",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["creator", "district"], name="listing_creator_district_idx"
+            ),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,4 +1,7 @@
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
 
 class UserIsAuthenticatedMixin(LoginRequiredMixin):
@@ -6,5 +9,67 @@ class UserIsAuthenticatedMixin(LoginRequiredMixin):
 
 
 class UserIsCreatorMixin(UserPassesTestMixin):
+    """
+    Fetch the object once, scoped to the requesting user, and reuse it for the
+    rest of the request. Someone else's object is a 403, a missing one a 404.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(creator=self.request.user)
+
+    def get_object(self, queryset=None):
+        if queryset is None and getattr(self, "object", None) is not None:
+            return self.object
+        return super().get_object(queryset)
+
     def test_func(self):
-        return self.request.user == self.get_object().creator
+        try:
+            self.object = self.get_object()
+        except Http404:
+            pk = self.kwargs.get(self.pk_url_kwarg)
+            if not self.model._default_manager.filter(pk=pk).exists():
+                raise
+            return False
+        return True
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        if etag and not response.has_header("ETag"):
+            response.headers["ETag"] = etag
+        if last_modified and not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET/HEAD with 304 from get_etag()/get_last_modified() before the
+    view builds its queryset or renders anything.
+    """
+
+    def get_etag(self):
+        return None
+
+    def get_last_modified(self):
+        return None
+
+    def get_validators(self):
+        etag = self.get_etag()
+        last_modified = self.get_last_modified()
+        return (
+            quote_etag(etag) if etag else None,
+            int(last_modified.timestamp()) if last_modified else None,
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
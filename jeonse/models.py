@@ -1,14 +1,160 @@
+from collections import Counter, defaultdict
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import connections, models, router, transaction
+from django.db.models.functions import NullIf
 from django.urls import reverse_lazy
+from django.utils import timezone
+
+from jeonse.cache import bump_listings_version, forget_users
+from jeonse.routers import pin_to_primary
+from jeonse.stats import (
+    STATS_FIELDS,
+    add_values,
+    remove_values,
+    stats_aggregates,
+    stats_from_aggregates,
+    stats_values,
+)
 
 
 def monthly_interest_payment(loan_amount: int, annual_interest_rate: float):
     return round(loan_amount * (annual_interest_rate / 12 / 100))
 
 
+# Per-user listing counts are kept for these buckets; each maps to the
+# ListingFilter state it answers and to the rows it covers.
+LISTING_COUNTER_BUCKETS = {
+    "all": models.Q(),
+    "jeonse": models.Q(wolse_monthly_payment=0),
+    "wolse": models.Q(wolse_monthly_payment__gt=0),
+    # Listings with a cost per m², i.e. those given a cost_rank.
+    "ranked": models.Q(total_area__gt=0),
+}
+
+
+def listing_counter_buckets(listing):
+    buckets = ["all", "wolse" if listing.wolse_monthly_payment > 0 else "jeonse"]
+    if listing.total_area > 0:
+        buckets.append("ranked")
+    return buckets
+
+
 class CustomUser(AbstractUser):
-    pass
+    listings_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+
+def mark_listings_changed(user_ids, using="default"):
+    user_ids = list(user_ids)
+    CustomUser.objects.using(using).filter(pk__in=user_ids).update(
+        listings_changed_at=timezone.now()
+    )
+    # update() sends no signals, so drop the cached users here; again on
+    # commit in case a request cached the old row in between. The pin runs
+    # from the commit, which is when the replicas start lagging.
+    forget_users(user_ids)
+    transaction.on_commit(partial(forget_users, user_ids), using=using)
+    transaction.on_commit(partial(pin_to_primary, user_ids), using=using)
+
+
+def rank_listings_by_cost(connection, creator_ids=None):
+    """
+    Recompute cost_rank, the number of the same user's listings that cost more
+    per m², for all listings of the given users, or of everyone, and refresh
+    their "ranked" counters.
+    """
+    where, params = "", []
+    if creator_ids is not None:
+        creator_ids = list(creator_ids)
+        if not creator_ids:
+            return
+        where = f"AND creator_id IN ({', '.join(['%s'] * len(creator_ids))})"
+        params = creator_ids
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE jeonse_listing SET cost_rank = ranked.cost_rank FROM ("
+            "  SELECT id, RANK() OVER ("
+            "    PARTITION BY creator_id ORDER BY monthly_cost_per_area DESC"
+            "  ) - 1 AS cost_rank"
+            "  FROM jeonse_listing"
+            f"  WHERE monthly_cost_per_area IS NOT NULL {where}"
+            ") AS ranked WHERE jeonse_listing.id = ranked.id",
+            params,
+        )
+        cursor.execute(
+            "INSERT INTO jeonse_listingcounter (user_id, bucket, count)"
+            " SELECT creator_id, 'ranked', COUNT(*) FROM jeonse_listing"
+            f" WHERE monthly_cost_per_area IS NOT NULL {where}"
+            " GROUP BY creator_id"
+            " ON CONFLICT (user_id, bucket) DO UPDATE SET count = excluded.count",
+            params,
+        )
+
+
+class ListingQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, rank=True, **kwargs):
+        """
+        Also maintain counters and, unless rank is False, the cost ranks of
+        the creators' listings. Loaders inserting many batches pass False and
+        call rank_by_cost() once at the end.
+        """
+        objs = list(objs)
+        deltas = Counter()
+        added = defaultdict(list)
+        for obj in objs:
+            obj.set_derived_fields()
+            obj._counter_buckets = listing_counter_buckets(obj)
+            for bucket in obj._counter_buckets:
+                deltas[obj.creator_id, bucket] += 1
+            obj._stats_values = stats_values(obj)
+            added[obj.creator_id].append(obj._stats_values)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            ListingCounter.objects.using(self.db).adjust(deltas)
+            for creator_id, values in added.items():
+                ListingStats.objects.using(self.db).adjust(creator_id, added=values)
+            mark_listings_changed({obj.creator_id for obj in objs}, self.db)
+            if rank:
+                self.rank_by_cost({obj.creator_id for obj in objs})
+            for creator_id in {obj.creator_id for obj in objs}:
+                transaction.on_commit(
+                    partial(bump_listings_version, creator_id), using=self.db
+                )
+        return created
+
+    def rank_by_cost(self, creator_ids=None):
+        rank_listings_by_cost(connections[self.db], creator_ids)
+
+    def shift_cost_ranks(self, cost, delta):
+        """Move the rank of listings cheaper per m² than cost by delta."""
+        self.filter(monthly_cost_per_area__lt=cost).update(
+            cost_rank=models.F("cost_rank") + delta
+        )
+
+
+def compared_listing_count(user_id):
+    """
+    How many other listings each of the user's ranked listings is compared
+    with, read from their "ranked" counter; NULL when there are none.
+    """
+    ranked = ListingCounter.objects.filter(user_id=user_id, bucket="ranked").values(
+        "count"
+    )
+    return NullIf(models.Subquery(ranked) - 1, models.Value(0))
+
+
+def value_percentile(user_id):
+    """
+    Percentage of the user's other listings that cost more per m² than each
+    listing, from the stored cost_rank.
+    """
+    return models.ExpressionWrapper(
+        models.F("cost_rank") * 100.0 / compared_listing_count(user_id),
+        output_field=models.FloatField(),
+    )
 
 
 class Listing(models.Model):
@@ -31,6 +177,73 @@ class Listing(models.Model):
 
     comment = models.TextField("코멘트", blank=True, null=True)
 
+    district = models.CharField("지역", max_length=50, blank=True, default="")
+    # Also indexed, for map searches, by the R*Tree in jeonse.geo.
+    latitude = models.FloatField(
+        "위도",
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        "경도",
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+
+    # Derived on save; NULL when there is no area or no room to divide by.
+    monthly_cost_per_area = models.FloatField("㎡당 월비용", null=True, editable=False)
+    monthly_cost_per_room = models.FloatField("방당 월비용", null=True, editable=False)
+    # How many of the creator's listings cost more per m², kept up to date
+    # incrementally from the post_save and post_delete signals.
+    cost_rank = models.IntegerField(null=True, editable=False)
+
+    created_at = models.DateTimeField("등록일", auto_now_add=True)
+    updated_at = models.DateTimeField("수정일", auto_now=True)
+
+    objects = ListingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["creator", "total_monthly_payment"],
+                name="listing_creator_payment_idx",
+            ),
+            models.Index(
+                fields=["creator", "total_area"], name="listing_creator_area_idx"
+            ),
+            models.Index(
+                fields=["creator", "number_of_rooms"], name="listing_creator_rooms_idx"
+            ),
+            models.Index(
+                fields=["creator", "number_of_bathrooms"],
+                name="listing_creator_baths_idx",
+            ),
+            models.Index(
+                fields=["creator", "jeonse_deposit_amount"],
+                name="listing_creator_jeonse_idx",
+            ),
+            models.Index(
+                fields=["creator", "wolse_deposit_amount"],
+                name="listing_creator_wolse_idx",
+            ),
+            models.Index(
+                fields=["creator", "monthly_cost_per_area"],
+                name="listing_creator_cost_area_idx",
+            ),
+            models.Index(
+                fields=["creator", "monthly_cost_per_room"],
+                name="listing_creator_cost_room_idx",
+            ),
+            models.Index(
+                fields=["creator", "cost_rank"], name="listing_creator_cost_rank_idx"
+            ),
+            models.Index(
+                fields=["creator", "district"], name="listing_creator_district_idx"
+            ),
+        ]
+
     def _total_monthly_payment(self):
         interest_payment = monthly_interest_payment(
             self.jeonse_deposit_amount + self.wolse_deposit_amount,
@@ -45,9 +258,316 @@ class Listing(models.Model):
             ]
         )
 
+    def set_derived_fields(self):
+        total = self.total_monthly_payment = self._total_monthly_payment()
+        self.monthly_cost_per_area = (
+            total / self.total_area if self.total_area > 0 else None
+        )
+        self.monthly_cost_per_room = (
+            total / self.number_of_rooms if self.number_of_rooms > 0 else None
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {"wolse_monthly_payment", "total_area"} <= set(field_names):
+            instance._counter_buckets = listing_counter_buckets(instance)
+        if "monthly_cost_per_area" in field_names:
+            instance._ranked_cost = instance.monthly_cost_per_area
+        if set(STATS_FIELDS) <= set(field_names):
+            instance._stats_values = stats_values(instance)
+        return instance
+
     def save(self, *args, **kwargs):
-        self.total_monthly_payment = self._total_monthly_payment()
-        super().save(*args, **kwargs)
+        self.set_derived_fields()
+        # Counters and cost ranks are adjusted from post_save, inside this
+        # transaction.
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse_lazy("listing_detail", kwargs={"pk": self.pk})
+
+
+class ListingCounterQuerySet(models.QuerySet):
+    def adjust(self, deltas):
+        """
+        Apply {(user_id, bucket): delta} to existing counters. Missing
+        counters are left alone; they are computed on first read.
+        """
+        for (user_id, bucket), delta in deltas.items():
+            if delta:
+                self.filter(user_id=user_id, bucket=bucket).update(
+                    count=models.F("count") + delta
+                )
+
+    def count_for(self, user, bucket="all"):
+        count = self.filter(user=user, bucket=bucket).values_list("count", flat=True)
+        for value in count:
+            return value
+        return self.seed(user, bucket)
+
+    def seed(self, user, bucket):
+        """
+        Count and store a counter never read before, on the database it is
+        stored in: a count read from a lagging replica would stay wrong, as
+        later writes only adjust it. The count and the insert share a write
+        transaction, so no listing saved in between is left out of both.
+        """
+        using = router.db_for_write(ListingCounter)
+        with transaction.atomic(using=using):
+            listings = Listing.objects.using(using).filter(
+                LISTING_COUNTER_BUCKETS[bucket], creator=user
+            )
+            value = listings.count()
+            self.using(using).bulk_create(
+                [ListingCounter(user=user, bucket=bucket, count=value)],
+                ignore_conflicts=True,
+            )
+        return value
+
+    def ensure(self, user_id, bucket):
+        """Create the user's counter for bucket if it was never read."""
+        if not self.filter(user_id=user_id, bucket=bucket).exists():
+            value = Listing.objects.using(self.db).filter(
+                LISTING_COUNTER_BUCKETS[bucket], creator_id=user_id
+            )
+            self.bulk_create(
+                [ListingCounter(user_id=user_id, bucket=bucket, count=value.count())],
+                ignore_conflicts=True,
+            )
+
+    async def acount_for(self, user, bucket="all"):
+        count = self.filter(user=user, bucket=bucket).values_list("count", flat=True)
+        async for value in count:
+            return value
+        return await sync_to_async(self.seed)(user, bucket)
+
+
+class ListingCounter(models.Model):
+    """
+    A user's listing count per bucket, adjusted by Listing save and delete
+    and by Listing.objects.bulk_create(). QuerySet.update() and raw SQL send
+    no signals and bypass it; recount with rebuild_listing_counters after
+    using them.
+    """
+
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="listing_counters"
+    )
+    bucket = models.CharField(max_length=32)
+    count = models.BigIntegerField(default=0)
+
+    objects = ListingCounterQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "bucket"], name="listing_counter_user_bucket_unique"
+            )
+        ]
+
+
+class ListingStatsQuerySet(models.QuerySet):
+    def adjust(self, user_id, added=(), removed=()):
+        """
+        Apply listings' stats_values() added to and removed from the user's
+        portfolio to their stats. Stats never computed are left alone; they
+        are computed on first read.
+        """
+        with transaction.atomic(using=self.db):
+            row = self.select_for_update().filter(user_id=user_id).first()
+            if row is None:
+                return
+            for values in removed:
+                remove_values(row.data, values)
+            for values in added:
+                add_values(row.data, values)
+            row.save(update_fields=["data"])
+
+    def for_user(self, user):
+        """
+        The user's running stats, computed in one aggregate query the first
+        time. A min or max made unknown by removing the extreme is read back
+        from the (creator, field) index.
+        """
+        listings = Listing.objects.using(self.db).filter(creator=user)
+        row = self.filter(user=user).first()
+        if row is None:
+            # In one write transaction, so no listing saved between the
+            # aggregate and the insert is left out of both.
+            with transaction.atomic(using=self.db):
+                data = stats_from_aggregates(listings.aggregate(**stats_aggregates()))
+                self.bulk_create(
+                    [ListingStats(user=user, data=data)], ignore_conflicts=True
+                )
+            return data
+
+        stale = [
+            (field, bound)
+            for field in STATS_FIELDS
+            for bound in ("min", "max")
+            if row.data["count"] and row.data[field][bound] is None
+        ]
+        if not stale:
+            return row.data
+        with transaction.atomic(using=self.db):
+            row = self.select_for_update().get(pk=row.pk)
+            for field, bound in stale:
+                if row.data["count"] and row.data[field][bound] is None:
+                    aggregate = models.Min if bound == "min" else models.Max
+                    row.data[field][bound] = listings.aggregate(value=aggregate(field))[
+                        "value"
+                    ]
+            row.save(update_fields=["data"])
+        return row.data
+
+
+class ListingStats(models.Model):
+    """Per-user count, sum, min, max and histogram of STATS_FIELDS."""
+
+    user = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, related_name="listing_stats"
+    )
+    data = models.JSONField()
+
+    objects = ListingStatsQuerySet.as_manager()
+
+
+class JobCancelled(Exception):
+    """Raised by Job.report() in a job whose cancellation was requested."""
+
+
+class JobQuerySet(models.QuerySet):
+    def enqueue(self, user, kind, **params):
+        return self.create(user=user, kind=kind, params=params)
+
+    def claim(self, worker):
+        """
+        Mark the next due job as running for worker and return it, or None.
+        The status check in the UPDATE lets several workers, in threads or
+        separate processes, race for the same job safely.
+        """
+        now = timezone.now()
+        due = self.filter(status=Job.Status.QUEUED, run_after__lte=now)
+        for pk in due.order_by("run_after", "pk").values_list("pk", flat=True)[:10]:
+            with transaction.atomic(using=self.db):
+                claimed = self.filter(pk=pk, status=Job.Status.QUEUED).update(
+                    status=Job.Status.RUNNING,
+                    worker=worker,
+                    attempts=models.F("attempts") + 1,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+            if claimed:
+                return self.get(pk=pk)
+        return None
+
+    def requeue_stale(self, timeout):
+        """
+        Give running jobs whose worker stopped reporting to another worker,
+        unless they were cancelled or have used up their attempts, e.g. by
+        killing every worker that ran them. Returns the number requeued.
+        """
+        now = timezone.now()
+        stale = self.filter(status=Job.Status.RUNNING, heartbeat_at__lt=now - timeout)
+        with transaction.atomic(using=self.db):
+            stale.filter(cancel_requested=True).update(
+                status=Job.Status.CANCELLED, worker="", finished_at=now
+            )
+            stale.filter(attempts__gte=models.F("max_attempts")).update(
+                status=Job.Status.FAILED,
+                worker="",
+                error="The worker running the job stopped reporting progress.",
+                finished_at=now,
+            )
+            return stale.update(status=Job.Status.QUEUED, worker="")
+
+    def active(self):
+        return self.filter(status__in=[Job.Status.QUEUED, Job.Status.RUNNING])
+
+    def set_status(self, status, **fields):
+        # Job bookkeeping is written in a transaction, so it queues for the
+        # write lock with the jobs' own writes instead of polling for it.
+        with transaction.atomic(using=self.db):
+            return self.update(status=status, **fields)
+
+
+class Job(models.Model):
+    class Kind(models.TextChoices):
+        EXPORT = "export", "내보내기"
+        IMPORT = "import", "가져오기"
+        RECALCULATE = "recalculate", "재계산"
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "대기"
+        RUNNING = "running", "실행 중"
+        SUCCEEDED = "succeeded", "완료"
+        FAILED = "failed", "실패"
+        CANCELLED = "cancelled", "취소"
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="jobs")
+    kind = models.CharField("작업", max_length=32, choices=Kind.choices)
+    params = models.JSONField(default=dict)
+    status = models.CharField(
+        "상태", max_length=16, choices=Status.choices, default=Status.QUEUED
+    )
+    progress = models.BigIntegerField(default=0)
+    progress_total = models.BigIntegerField(null=True)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    cancel_requested = models.BooleanField(default=False)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=64, blank=True)
+    heartbeat_at = models.DateTimeField(null=True)
+
+    created_at = models.DateTimeField("등록일", auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_status_due_idx"),
+            models.Index(fields=["user", "-created_at"], name="job_user_created_idx"),
+        ]
+
+    @property
+    def is_active(self):
+        return self.status in (self.Status.QUEUED, self.Status.RUNNING)
+
+    @property
+    def percent(self):
+        if not self.progress_total:
+            return None
+        return min(100, round(self.progress * 100 / self.progress_total))
+
+    def report(self, progress, total=None):
+        """
+        Record progress and prove the worker is alive; raises JobCancelled
+        once cancellation was requested.
+        """
+        fields = {"progress": progress, "heartbeat_at": timezone.now()}
+        if total is not None:
+            fields["progress_total"] = total
+        running = Job.objects.filter(pk=self.pk, cancel_requested=False)
+        with transaction.atomic():
+            if not running.update(**fields):
+                raise JobCancelled
+        self.progress = progress
+        if total is not None:
+            self.progress_total = total
+
+    def cancel(self):
+        """Cancel a queued job now; a running one stops at its next report()."""
+        with transaction.atomic():
+            Job.objects.filter(pk=self.pk, status=self.Status.QUEUED).update(
+                status=self.Status.CANCELLED, finished_at=timezone.now()
+            )
+            Job.objects.filter(pk=self.pk).active().update(cancel_requested=True)
+        self.refresh_from_db()
@@ -0,0 +1,228 @@
+import base64
+import binascii
+import json
+from copy import copy
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django_tables2.rows import BoundRows
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def seek_filters(field, value, pk, descending):
+    """
+    Rows strictly after (value, pk) in an ordering of (field, pk) where NULLs
+    sort first when ascending and last when descending, as a list of filters
+    whose rows follow each other in that order.
+
+    SQLite cannot seek an index to "field > v OR (field = v AND pk > p)", nor
+    to an OR with "field IS NULL", so each filter carries a bound on the field
+    alone that starts an index range, and the NULLs are a filter of their own.
+    """
+    name = field.attname
+    op = "lt" if descending else "gt"
+    after_pk = Q(**{f"pk__{op}": pk})
+    if field.primary_key:
+        return [after_pk]
+    is_null = Q(**{f"{name}__isnull": True})
+    if value is None:
+        if descending:
+            return [is_null & after_pk]
+        return [is_null & after_pk, Q(**{f"{name}__isnull": False})]
+    bound = Q(**{f"{name}__{'lte' if descending else 'gte'}": value})
+    after = bound & (Q(**{f"{name}__{op}": value}) | (Q(**{name: value}) & after_pk))
+    # Annotations are not bound to a model and may be NULL.
+    if descending and (field.null or not hasattr(field, "model")):
+        return [after, is_null]
+    return [after]
+
+
+def seek_ordering(field, descending):
+    if descending:
+        return [F(field).desc(nulls_last=True), F("pk").desc()]
+    return [F(field).asc(nulls_first=True), F("pk").asc()]
+
+
+def sort_field(queryset):
+    """
+    Concrete model field or selected annotation the queryset is primarily
+    ordered on, with direction. Falls back to the primary key for unordered or
+    unsupported orderings.
+    """
+    for spec in queryset.query.order_by:
+        if not isinstance(spec, str):
+            break
+        name = spec.lstrip("-")
+        if name in queryset.query.annotation_select:
+            field = copy(queryset.query.annotation_select[name].output_field)
+            field.set_attributes_from_name(name)
+            return field, spec.startswith("-")
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            break
+        if not field.concrete:
+            break
+        return field, spec.startswith("-")
+    return queryset.model._meta.pk, False
+
+
+def keyset_ordering(queryset):
+    """Make the queryset's ordering total, in the order pages are walked."""
+    field, descending = sort_field(queryset)
+    return queryset.order_by(*seek_ordering(field.attname, descending))
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.number = 1
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __len__(self):
+        return len(getattr(self.object_list, "data", self.object_list))
+
+
+class KeysetPaginator:
+    """
+    Paginates a django_tables2 table, or a plain queryset of instances or
+    values() dicts, by seeking on (sort column, pk) instead of LIMIT/OFFSET,
+    so every page costs the same and no COUNT(*) is issued.
+
+    The position is carried in an opaque cursor; a cursor issued for another
+    ordering is ignored and the first page is returned. ``count`` is only
+    reported when the caller already knows it.
+    """
+
+    num_pages = None
+
+    def __init__(self, object_list, per_page, cursor=None, count=None, **kwargs):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.cursor = cursor
+        self.count = count
+
+    def get_position(self, field, order):
+        position = decode_cursor(self.cursor) if self.cursor else None
+        if not isinstance(position, dict) or position.get("o") != order:
+            return None
+        if not isinstance(position.get("pk"), int):
+            return None
+        try:
+            position["v"] = field.to_python(position.get("v"))
+        except ValidationError:
+            return None
+        return position
+
+    def seek(self):
+        """
+        Querysets whose rows, one after the other, follow the requested
+        position. The page is their first per_page rows, plus one extra that
+        tells whether there is more beyond it.
+        """
+        queryset = self.object_list
+        if isinstance(queryset, BoundRows):
+            queryset = queryset.data.data
+        self.field, descending = sort_field(queryset)
+        self.pk_name = queryset.model._meta.pk.attname
+        self.order = f"{'-' if descending else ''}{self.field.attname}"
+
+        self.position = self.get_position(self.field, self.order)
+        self.backwards = bool(self.position and self.position.get("b"))
+        seek_descending = descending != self.backwards
+
+        queryset = queryset.order_by(
+            *seek_ordering(self.field.attname, seek_descending)
+        )
+        if not self.position:
+            return [queryset]
+        return [
+            queryset.filter(after)
+            for after in seek_filters(
+                self.field,
+                self.position["v"],
+                self.position["pk"],
+                seek_descending,
+            )
+        ]
+
+    def cursor_for(self, record, backwards):
+        if isinstance(record, dict):
+            value, pk = record[self.field.attname], record[self.pk_name]
+        else:
+            value, pk = getattr(record, self.field.attname), record.pk
+        return encode_cursor({"o": self.order, "v": value, "pk": pk, "b": backwards})
+
+    def build_page(self, records):
+        has_more = len(records) > self.per_page
+        records = records[: self.per_page]
+        if self.backwards:
+            records.reverse()
+
+        next_cursor = previous_cursor = None
+        if records:
+            if has_more or self.backwards:
+                next_cursor = self.cursor_for(records[-1], False)
+            if self.position and (has_more or not self.backwards):
+                previous_cursor = self.cursor_for(records[0], True)
+
+        rows = self.object_list
+        if isinstance(rows, BoundRows):
+            records = BoundRows(records, table=rows.table, pinned_data=rows.pinned_data)
+        return KeysetPage(records, self, next_cursor, previous_cursor)
+
+    def page(self, number=1):
+        records = []
+        for queryset in self.seek():
+            records += queryset[: self.per_page + 1 - len(records)]
+            if len(records) > self.per_page:
+                break
+        return self.build_page(records)
+
+    async def apage(self):
+        records = []
+        for queryset in self.seek():
+            queryset = queryset[: self.per_page + 1 - len(records)]
+            records += [record async for record in queryset]
+            if len(records) > self.per_page:
+                break
+        return self.build_page(records)
+
+
+def keyset_chunks(queryset, size):
+    """
+    Every row of an ordered queryset, as lists of at most size rows fetched
+    one keyset page at a time, so no read stays open between chunks.
+    """
+    cursor = None
+    while True:
+        page = KeysetPaginator(queryset, size, cursor).page()
+        if page.object_list:
+            yield page.object_list
+        if not page.has_next():
+            return
+        cursor = page.next_cursor
@@ -0,0 +1,100 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Models whose reads may be served by a replica. Users, sessions and
+# everything else are always read from the primary.
+REPLICATED_MODELS = {"jeonse.listing", "jeonse.listingcounter"}
+# Writes that pin the user to the primary. Counters filled in on first read
+# are not the user's changes and do not pin.
+PINNING_MODELS = {"jeonse.listing"}
+
+_routing = ContextVar("replica_routing", default=None)
+
+
+def _pin_key(user_id):
+    return f"replica:pinned:{user_id}"
+
+
+def pin_to_primary(user_ids):
+    """
+    Read the users' listings from the primary for REPLICA_PIN_SECONDS, while
+    the replicas catch up with a write to them, wherever it was made.
+    """
+    if settings.DATABASE_REPLICAS:
+        cache.set_many(
+            {_pin_key(user_id): True for user_id in user_ids},
+            settings.REPLICA_PIN_SECONDS,
+        )
+
+
+class RequestRouting:
+    """Where the current request reads replicated models from."""
+
+    def __init__(self, request):
+        self.request = request
+        self.wrote = request.method not in ("GET", "HEAD", "OPTIONS")
+        self.replica = None
+
+    def user_id(self):
+        user = getattr(self.request, "user", None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+    def read_database(self):
+        if self.replica is None:
+            user_id = self.user_id()
+            if self.wrote or (user_id and cache.get(_pin_key(user_id))):
+                self.replica = "default"
+            else:
+                # One replica for the whole request, so its reads agree.
+                self.replica = random.choice(settings.DATABASE_REPLICAS)
+        return "default" if self.wrote else self.replica
+
+    def record_write(self):
+        self.wrote = True
+        user_id = self.user_id()
+        if user_id:
+            pin_to_primary([user_id])
+
+    def start(self):
+        return _routing.set(self)
+
+    def stop(self, token):
+        _routing.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send listing reads made while handling a GET request to one of
+    settings.DATABASE_REPLICAS, and every other query made by a request to
+    the primary. Queries outside a request are left to Django's defaults.
+
+    A user who writes is pinned to the primary for REPLICA_PIN_SECONDS, so
+    their own reads see their changes while the replicas catch up. So is the
+    creator of listings changed by jobs, commands or the admin, through
+    mark_listings_changed().
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or not settings.DATABASE_REPLICAS:
+            return None
+        if model._meta.label_lower not in REPLICATED_MODELS:
+            return "default"
+        return routing.read_database()
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or not settings.DATABASE_REPLICAS:
+            return None
+        if model._meta.label_lower in PINNING_MODELS:
+            routing.record_write()
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
@@ -0,0 +1,102 @@
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+LISTING_TABLE = "jeonse_listing"
+LISTING_FTS_TABLE = "jeonse_listing_fts"
+
+# External-content FTS5 index over Listing.comment, keyed by listing id and
+# kept in sync by triggers, so every write path (save, bulk_create, update,
+# delete) is covered. Prefix indexes make "term*" queries cheap, which is how
+# Korean words with particles attached ("역세권이고") are matched.
+LISTING_FTS_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {LISTING_FTS_TABLE} USING fts5(
+        comment,
+        content='{LISTING_TABLE}',
+        content_rowid='id',
+        tokenize='unicode61',
+        prefix='1 2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {LISTING_FTS_TABLE}_insert
+    AFTER INSERT ON {LISTING_TABLE} BEGIN
+        INSERT INTO {LISTING_FTS_TABLE}(rowid, comment)
+        VALUES (new.id, new.comment);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {LISTING_FTS_TABLE}_delete
+    AFTER DELETE ON {LISTING_TABLE} BEGIN
+        INSERT INTO {LISTING_FTS_TABLE}({LISTING_FTS_TABLE}, rowid, comment)
+        VALUES ('delete', old.id, old.comment);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {LISTING_FTS_TABLE}_update
+    AFTER UPDATE OF id, comment ON {LISTING_TABLE} BEGIN
+        INSERT INTO {LISTING_FTS_TABLE}({LISTING_FTS_TABLE}, rowid, comment)
+        VALUES ('delete', old.id, old.comment);
+        INSERT INTO {LISTING_FTS_TABLE}(rowid, comment)
+        VALUES (new.id, new.comment);
+    END
+    """,
+]
+
+DROP_LISTING_FTS_SQL = [
+    f"DROP TRIGGER IF EXISTS {LISTING_FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {LISTING_FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {LISTING_FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {LISTING_FTS_TABLE}",
+]
+
+
+def install_listing_search(connection):
+    """
+    Create the index and its triggers if missing. SQLite drops a table's
+    triggers whenever a migration rebuilds it, so this also runs after every
+    migrate.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for sql in LISTING_FTS_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_listing_search(connection):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {LISTING_FTS_TABLE}({LISTING_FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def search_query(text):
+    """
+    FTS5 query matching listings whose comment has every whitespace-separated
+    term of ``text`` as a word or word prefix. Empty when there are no terms.
+    """
+    terms = ['"{}"*'.format(term.replace('"', '""')) for term in text.split()]
+    return " ".join(terms)
+
+
+def search_listings(queryset, query):
+    """
+    Listings matching ``query``, annotated with their bm25 ``search_rank``
+    (lower is more relevant). The index is joined rather than queried per row,
+    so SQLite walks the matches once and looks each listing up by id.
+    """
+    # The unary + hides the rowid constraint from FTS5, which keeps SQLite from
+    # scanning listings and re-running the MATCH once per row.
+    return queryset.extra(
+        tables=[LISTING_FTS_TABLE],
+        where=[
+            f"+{LISTING_FTS_TABLE}.rowid = {LISTING_TABLE}.id",
+            f"{LISTING_FTS_TABLE} MATCH %s",
+        ],
+        params=[query],
+    ).annotate(
+        search_rank=RawSQL(f"{LISTING_FTS_TABLE}.rank", [], output_field=FloatField())
+    )
@@ -0,0 +1,110 @@
+import heapq
+from array import array
+from itertools import compress
+from operator import add, not_
+
+from django.db.models import F
+
+SENSITIVITY_MAX_RATES = 50
+
+# 1.5 * 2**52: floats between 2**52 and 2**53 are spaced exactly 1 apart.
+ROUNDING_MAGIC = 6755399441055744.0
+
+
+def rate_range(start, stop, steps):
+    if steps == 1:
+        return [start]
+    step = (stop - start) / (steps - 1)
+    return [round(start + step * i, 6) for i in range(steps)]
+
+
+class InterestRateSweep:
+    """
+    total_monthly_payment of every listing in a queryset at each of a range of
+    annual interest rates.
+
+    The columns are read once into flat arrays and each rate is a single pass
+    of C-level map() calls over them, rounded exactly like
+    monthly_interest_payment. ``matrix[i][j]`` is the payment of
+    ``pks[j]`` at ``rates[i]``, as an integral float.
+    """
+
+    def __init__(self, queryset, rates):
+        self.rates = list(rates)
+        rows = (
+            queryset.order_by("pk")
+            .annotate(
+                deposit=F("jeonse_deposit_amount") + F("wolse_deposit_amount"),
+                fixed=F("wolse_monthly_payment") + F("gwanlibi_monthly_payment"),
+            )
+            .values_list("pk", "deposit", "fixed", "wolse_monthly_payment")
+        )
+        pks, deposits, fixed, wolse = list(zip(*rows)) or [()] * 4
+        self.pks = array("q", pks)
+        self.deposits = array("d", deposits)
+        # Same split as the "jeonse" and "wolse" listing counter buckets.
+        self.wolse = bytes(map(bool, wolse))
+        self.jeonse = bytes(map(not_, wolse))
+
+        # Adding ROUNDING_MAGIC leaves no fractional bits, so the FPU rounds
+        # half to even exactly like round(); the fixed part is pre-shifted so
+        # the same addition that removes the offset adds it.
+        shifted_fixed = array("d", (value - ROUNDING_MAGIC for value in fixed))
+        self.matrix = [
+            array(
+                "d",
+                map(
+                    add,
+                    map(
+                        ROUNDING_MAGIC.__add__,
+                        map((rate / 12 / 100).__mul__, self.deposits),
+                    ),
+                    shifted_fixed,
+                ),
+            )
+            for rate in self.rates
+        ]
+
+    def __len__(self):
+        return len(self.pks)
+
+    def ranking(self, index, limit=None):
+        """pks ordered from cheapest to dearest at ``rates[index]``."""
+        row = self.matrix[index]
+        pks = self.pks
+        if limit is not None:
+            # Find the cut-off on the bare values first; only the few rows at
+            # or under it are paired up and sorted.
+            values = heapq.nsmallest(limit, row)
+            if not values:
+                return []
+            mask = bytes(map(values[-1].__ge__, row))
+            row, pks = compress(row, mask), compress(pks, mask)
+        return [pk for _, pk in sorted(zip(row, pks))[:limit]]
+
+    def cheapest(self, mask):
+        """Lowest payment per rate among the listings selected by ``mask``."""
+        if not any(mask):
+            return [None] * len(self.rates)
+        return [int(min(compress(row, mask))) for row in self.matrix]
+
+    def break_even_rates(self):
+        """
+        Rates at which the cheapest jeonse-heavy listing (no monthly rent) and
+        the cheapest wolse-heavy listing cost the same, interpolated linearly
+        between neighbouring rates of the sweep.
+        """
+        jeonse = self.cheapest(self.jeonse)
+        wolse = self.cheapest(self.wolse)
+        if None in jeonse or None in wolse:
+            return []
+        gaps = [j - w for j, w in zip(jeonse, wolse)]
+        rates = []
+        for i, gap in enumerate(gaps):
+            if gap == 0:
+                rates.append(self.rates[i])
+            elif i and gaps[i - 1] and (gaps[i - 1] < 0) != (gap < 0):
+                low, high = self.rates[i - 1], self.rates[i]
+                previous = gaps[i - 1]
+                rates.append(round(low + (high - low) * previous / (previous - gap), 6))
+        return rates
@@ -0,0 +1,128 @@
+from collections import Counter
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from jeonse.cache import bump_listings_version, forget_users
+from jeonse.geo import LISTING_RTREE_TABLE, install_listing_geo
+from jeonse.models import (
+    CustomUser,
+    Listing,
+    ListingCounter,
+    ListingStats,
+    listing_counter_buckets,
+    mark_listings_changed,
+)
+from jeonse.search import LISTING_FTS_TABLE, install_listing_search
+from jeonse.stats import stats_values
+from jeonse.timing import install_sql_timing
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def listing_changed(sender, instance, using, **kwargs):
+    mark_listings_changed([instance.creator_id], using)
+    transaction.on_commit(
+        partial(bump_listings_version, instance.creator_id), using=using
+    )
+
+
+@receiver(post_save, sender=Listing)
+def count_saved_listing(sender, instance, created, using, **kwargs):
+    new = listing_counter_buckets(instance)
+    old = [] if created else getattr(instance, "_counter_buckets", new)
+    deltas = Counter()
+    for bucket in old:
+        deltas[instance.creator_id, bucket] -= 1
+    for bucket in new:
+        deltas[instance.creator_id, bucket] += 1
+    ListingCounter.objects.using(using).adjust(deltas)
+    instance._counter_buckets = new
+
+
+@receiver(post_delete, sender=Listing)
+def count_deleted_listing(sender, instance, using, **kwargs):
+    buckets = getattr(instance, "_counter_buckets", None)
+    if buckets is None:
+        buckets = listing_counter_buckets(instance)
+    ListingCounter.objects.using(using).adjust(
+        Counter({(instance.creator_id, bucket): -1 for bucket in buckets})
+    )
+
+
+@receiver(post_save, sender=Listing)
+def rank_saved_listing(sender, instance, created, using, **kwargs):
+    # Moving a listing from one cost to another is removing it at the old
+    # cost and inserting it at the new one; only the listings cheaper than
+    # either cost change rank.
+    new = instance.monthly_cost_per_area
+    old = None if created else getattr(instance, "_ranked_cost", new)
+    if not created and old == new:
+        return
+    # value_percentile divides by the "ranked" counter, so it has to exist.
+    ListingCounter.objects.using(using).ensure(instance.creator_id, "ranked")
+    others = Listing.objects.using(using).filter(creator_id=instance.creator_id)
+    others = others.exclude(pk=instance.pk)
+    rank = None
+    if old is not None:
+        others.shift_cost_ranks(old, -1)
+    if new is not None:
+        others.shift_cost_ranks(new, 1)
+        rank = others.filter(monthly_cost_per_area__gt=new).count()
+    Listing.objects.using(using).filter(pk=instance.pk).update(cost_rank=rank)
+    instance.cost_rank = rank
+    instance._ranked_cost = new
+
+
+@receiver(post_delete, sender=Listing)
+def rank_deleted_listing(sender, instance, using, **kwargs):
+    cost = getattr(instance, "_ranked_cost", instance.monthly_cost_per_area)
+    if cost is not None:
+        Listing.objects.using(using).filter(
+            creator_id=instance.creator_id
+        ).shift_cost_ranks(cost, -1)
+
+
+@receiver(post_save, sender=Listing)
+def stats_saved_listing(sender, instance, created, using, **kwargs):
+    new = stats_values(instance)
+    old = None if created else getattr(instance, "_stats_values", new)
+    if old != new:
+        ListingStats.objects.using(using).adjust(
+            instance.creator_id, added=[new], removed=[old] if old else []
+        )
+    instance._stats_values = new
+
+
+@receiver(post_delete, sender=Listing)
+def stats_deleted_listing(sender, instance, using, **kwargs):
+    values = getattr(instance, "_stats_values", None) or stats_values(instance)
+    ListingStats.objects.using(using).adjust(instance.creator_id, removed=[values])
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, using, **kwargs):
+    forget_users([instance.pk])
+    transaction.on_commit(partial(forget_users, [instance.pk]), using=using)
+
+
+@receiver(post_migrate)
+def reinstall_listing_indexes(sender, using, **kwargs):
+    # Migrations that rebuild the listing table drop the index triggers.
+    connection = connections[using]
+    if sender.name != "jeonse":
+        return
+    tables = connection.introspection.table_names()
+    if LISTING_FTS_TABLE in tables:
+        install_listing_search(connection)
+    if LISTING_RTREE_TABLE in tables:
+        install_listing_geo(connection)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    install_sql_timing(connection)
@@ -0,0 +1,77 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".map", ".svg", ".txt", ".json")
+
+# Precompressed variants, in the order they are preferred when a client
+# accepts several.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def compress_file(path):
+    """
+    Write gzip and, with the brotli package installed, brotli variants next
+    to the file, keeping only the ones that come out smaller.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(content):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content-hashed file names, as ManifestStaticFilesStorage, plus gzip and
+    brotli copies of every hashed text file written by collectstatic for
+    StaticFilesMiddleware to serve.
+
+    Until collectstatic has run, e.g. under runserver or in tests, files are
+    linked by their plain names instead of failing the page.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if (
+                not dry_run
+                and hashed_name
+                and not isinstance(processed, Exception)
+                and hashed_name.endswith(COMPRESSIBLE_EXTENSIONS)
+            ):
+                compress_file(self.path(hashed_name))
+            yield name, hashed_name, processed
+
+    def immutable_names(self):
+        return set(self.hashed_files.values())
+
+
+def find_variant(path, accept_encoding):
+    """Best precompressed copy of path the client accepts, as (path, encoding)."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.strip().lower())
+    for encoding, suffix in ENCODINGS.items():
+        if encoding in accepted and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
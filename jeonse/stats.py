@@ -0,0 +1,184 @@
+import math
+from bisect import bisect_right
+
+from django.db.models import Count, Max, Min, Q, Sum
+
+# Columns summarised by the stats panel, with their label and the lower
+# edges of their histogram buckets; the last bucket is open ended.
+STATS_FIELDS = {
+    "total_monthly_payment": (
+        "총 월세",
+        [0, 300000, 500000, 700000, 1000000, 1500000, 2000000, 3000000],
+    ),
+    "jeonse_deposit_amount": (
+        "전세금",
+        [0, 50000000, 100000000, 200000000, 300000000, 500000000, 1000000000],
+    ),
+    "wolse_deposit_amount": (
+        "월세금",
+        [0, 5000000, 10000000, 20000000, 50000000, 100000000],
+    ),
+    "total_area": ("전용면적", [0, 20, 40, 60, 85, 100, 135]),
+}
+
+
+def stats_values(listing):
+    return {field: getattr(listing, field) for field in STATS_FIELDS}
+
+
+def bucket_index(edges, value):
+    # Negative values, which forms do not allow, count in the first bucket.
+    return max(bisect_right(edges, value) - 1, 0)
+
+
+def bucket_filter(field, edges, index):
+    q = Q(**{f"{field}__gte": edges[index]}) if index else Q()
+    if index + 1 < len(edges):
+        q &= Q(**{f"{field}__lt": edges[index + 1]})
+    return q
+
+
+def empty_stats():
+    stats = {"count": 0}
+    for field, (_, edges) in STATS_FIELDS.items():
+        stats[field] = {
+            "sum": 0,
+            "min": None,
+            "max": None,
+            "histogram": [0] * len(edges),
+        }
+    return stats
+
+
+def add_values(stats, values):
+    stats["count"] += 1
+    for field, (_, edges) in STATS_FIELDS.items():
+        value, summary = values[field], stats[field]
+        summary["sum"] += value
+        summary["histogram"][bucket_index(edges, value)] += 1
+        if stats["count"] == 1:
+            summary["min"] = summary["max"] = value
+        # A None min or max of a non-empty portfolio is stale and stays so
+        # until repaired from the database.
+        if summary["min"] is not None and value < summary["min"]:
+            summary["min"] = value
+        if summary["max"] is not None and value > summary["max"]:
+            summary["max"] = value
+
+
+def remove_values(stats, values):
+    stats["count"] -= 1
+    for field, (_, edges) in STATS_FIELDS.items():
+        value, summary = values[field], stats[field]
+        summary["sum"] -= value
+        summary["histogram"][bucket_index(edges, value)] -= 1
+        # Removing the extreme leaves the next one unknown.
+        if summary["min"] is not None and value <= summary["min"]:
+            summary["min"] = None
+        if summary["max"] is not None and value >= summary["max"]:
+            summary["max"] = None
+        if stats["count"] == 0:
+            summary["sum"] = 0
+
+
+def stats_aggregates():
+    """
+    Aggregates that compute the stats of a set of listings in one pass, for
+    aggregate() or, grouped by creator, annotate().
+    """
+    aggregates = {"count": Count("pk")}
+    for field, (_, edges) in STATS_FIELDS.items():
+        aggregates[f"{field}__sum"] = Sum(field)
+        aggregates[f"{field}__min"] = Min(field)
+        aggregates[f"{field}__max"] = Max(field)
+        for index in range(len(edges)):
+            q = bucket_filter(field, edges, index)
+            aggregates[f"{field}__h{index}"] = (
+                Count("pk", filter=q) if q else Count("pk")
+            )
+    return aggregates
+
+
+def stats_from_aggregates(row):
+    stats = {"count": row["count"]}
+    for field, (_, edges) in STATS_FIELDS.items():
+        stats[field] = {
+            "sum": row[f"{field}__sum"] or 0,
+            "min": row[f"{field}__min"],
+            "max": row[f"{field}__max"],
+            "histogram": [row[f"{field}__h{index}"] for index in range(len(edges))],
+        }
+    return stats
+
+
+def stats_drift(stored, actual):
+    """
+    Names of the entries of stored that disagree with actual. Sums are
+    compared with a tolerance for float rounding; a stale min or max is
+    not drift.
+    """
+    drifted = [] if stored["count"] == actual["count"] else ["count"]
+    for field in STATS_FIELDS:
+        old, new = stored[field], actual[field]
+        if not math.isclose(old["sum"], new["sum"], rel_tol=1e-9, abs_tol=1e-6):
+            drifted.append(f"{field}.sum")
+        for bound in ("min", "max"):
+            if old[bound] is not None and old[bound] != new[bound]:
+                drifted.append(f"{field}.{bound}")
+        if old["histogram"] != new["histogram"]:
+            drifted.append(f"{field}.histogram")
+    return drifted
+
+
+def estimate_median(histogram, edges, low, high):
+    """
+    Median interpolated within the histogram bucket holding it, assuming
+    values are spread evenly over the part of the bucket between low and high.
+    """
+    count = sum(histogram)
+    if not count:
+        return None
+    middle = count / 2
+    seen = 0
+    for index, n in enumerate(histogram):
+        if n and seen + n >= middle:
+            lower = max(edges[index], low)
+            upper = edges[index + 1] if index + 1 < len(edges) else high
+            upper = min(upper, high)
+            return lower + (upper - lower) * (middle - seen) / n
+        seen += n
+    return high
+
+
+def summarize(stats):
+    """Rows for the stats panel, one per STATS_FIELDS entry."""
+    rows = []
+    count = stats["count"]
+    for field, (label, edges) in STATS_FIELDS.items():
+        summary = stats[field]
+        histogram = summary["histogram"]
+        tallest = max(histogram) or 1
+        rows.append(
+            {
+                "field": field,
+                "label": label,
+                "min": summary["min"],
+                "max": summary["max"],
+                "avg": summary["sum"] / count if count else None,
+                "median": (
+                    estimate_median(histogram, edges, summary["min"], summary["max"])
+                    if count
+                    else None
+                ),
+                "histogram": [
+                    {
+                        "lower": lower,
+                        "upper": edges[index + 1] if index + 1 < len(edges) else None,
+                        "count": n,
+                        "height": round(n * 100 / tallest),
+                    }
+                    for index, (lower, n) in enumerate(zip(edges, histogram))
+                ],
+            }
+        )
+    return rows
@@ -1,17 +1,37 @@
 import django_tables2 as tables
+from django_tables2 import RequestConfig
 
 from jeonse.models import Listing
 
 
 class ListingTable(tables.Table):
+    # Annotated by ListingFilter; ordered by the indexed rank it comes from.
+    value_percentile = tables.Column(verbose_name="가성비 백분위", order_by="cost_rank")
     get_absolute_url = tables.Column(
         verbose_name="Detail", linkify=True, orderable=False
     )
 
     class Meta:
         model = Listing
-        template_name = "django_tables2/bootstrap5.html"
+        exclude = ["cost_rank", "latitude", "longitude"]
+        template_name = "tables/bootstrap5.html"
         attrs = {"class": "table table-striped table-bordered table-hover"}
 
+    def render_monthly_cost_per_area(self, value):
+        return f"{value:,.0f}"
+
+    def render_monthly_cost_per_room(self, value):
+        return f"{value:,.0f}"
+
+    def render_value_percentile(self, value):
+        return f"{value:.0f}%"
+
     def render_get_absolute_url(self, value):
         return "Detail"
+
+
+def order_listings(request, queryset):
+    """Order a queryset the way ListingTable sorts it for this request."""
+    table = ListingTable(queryset)
+    RequestConfig(request, paginate=False).configure(table)
+    return table.data.data
@@ -0,0 +1,22 @@
+from django import template
+from django_tables2.templatetags.django_tables2 import RenderTableNode
+from django_tables2.templatetags.django_tables2 import (
+    render_table as tables2_render_table,
+)
+
+from jeonse.timing import timed
+
+register = template.Library()
+
+
+class TimedRenderTableNode(RenderTableNode):
+    def render(self, context):
+        with timed("table"):
+            return super().render(context)
+
+
+@register.tag
+def render_table(parser, token):
+    """django_tables2's render_table, reported as "table" in Server-Timing."""
+    node = tables2_render_table(parser, token)
+    return TimedRenderTableNode(node.table, node.template_name)
@@ -1,8 +1,66 @@
+import csv
+import gzip
+import json
+import os
+import random
+import re
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from xml.etree import ElementTree
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.core.checks import Tags, run_checks
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import DatabaseError, connection, connections
+from django.db.models import QuerySet
+from django.http import HttpRequest
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from jeonse.models import Listing
+from jeonse.backends.sqlite3.base import DEFAULT_PRAGMAS, DatabaseWrapper
+from jeonse.benchdata import (
+    BENCH_PASSWORD,
+    bench_email,
+    create_bench_users,
+    generate_listings,
+)
+from jeonse.cache import table_cache_stats
+from jeonse.coldstart import PHASES, prepare_database, profile_boot
+from jeonse.filters import ListingFilter
+from jeonse.geo import LISTING_RTREE_TABLE
+from jeonse.metrics import request_metrics
+from jeonse.jobs import JOB_HANDLERS, run_job
+from jeonse.models import (
+    Job,
+    JobCancelled,
+    Listing,
+    ListingCounter,
+    ListingStats,
+    monthly_interest_payment,
+)
+from jeonse.paginators import KeysetPaginator, encode_cursor, seek_ordering
+from jeonse.routers import RequestRouting
+from jeonse.sensitivity import InterestRateSweep, rate_range
+from jeonse.staticfiles import brotli
+from jeonse.stats import (
+    STATS_FIELDS,
+    estimate_median,
+    stats_aggregates,
+    stats_drift,
+    stats_from_aggregates,
+)
+from jeonse.throttle import parse_rate, take_token
 
 
 class TestViews(TestCase):
@@ -184,3 +242,2076 @@ class TestViews(TestCase):
                 )
             ),
         )
+
+
+class TestInlineCreate(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.client.force_login(self.user)
+        Listing.objects.create(
+            creator=self.user, gwanlibi_monthly_payment=1000000, total_area=30
+        )
+        self.post_data = {
+            "jeonse_deposit_amount": 100000000,
+            "wolse_deposit_amount": 0,
+            "wolse_monthly_payment": 0,
+            "gwanlibi_monthly_payment": 100000,
+            "annual_interest_rate": 4.5,
+            "total_area": 59.9,
+            "number_of_rooms": 3,
+            "number_of_bathrooms": 2,
+            "comment": "역세권 신축",
+        }
+
+    def create(self, **filters):
+        return self.client.post(
+            reverse("listing_create"),
+            {**self.post_data, **filters},
+            HTTP_HX_REQUEST="true",
+        )
+
+    def test_form_fragment(self):
+        response = self.client.get(reverse("listing_create"), HTTP_HX_REQUEST="true")
+        self.assertTemplateUsed(response, "htmx/listing_create.html")
+        self.assertTemplateNotUsed(response, "_base.html")
+        self.assertContains(response, 'hx-include="#listing-filter"')
+
+        response = self.create(number_of_rooms="many")
+        self.assertTemplateUsed(response, "htmx/listing_create.html")
+        self.assertContains(response, "text-danger")
+        self.assertEqual(self.user.listings.count(), 1)
+
+    def test_row_and_count_swapped_out_of_band(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create(contract_type="jeonse")
+        self.assertEqual(response.status_code, 200)
+        listing = self.user.listings.latest("pk")
+        self.assertEqual(listing.comment, "역세권 신축")
+        self.assertContains(response, 'hx-swap-oob="afterbegin:#table tbody"')
+        self.assertContains(response, "역세권 신축")
+        self.assertContains(response, reverse("listing_detail", args=[listing.pk]))
+        # Cheaper per m² than the other listing.
+        self.assertContains(response, "100%")
+        self.assertContains(
+            response,
+            '<p class="text-muted small" id="listing-count" hx-swap-oob="true">'
+            "2 listings</p>",
+            html=True,
+        )
+        # Only the new row is fetched; the rest of the table is not queried.
+        selects = [
+            q["sql"]
+            for q in queries.captured_queries
+            if q["sql"].startswith('SELECT "jeonse_listing"."id"')
+        ]
+        self.assertEqual(len(selects), 1, selects)
+        self.assertTrue(selects[0].endswith(f'"id" = {listing.pk})'))
+
+    def test_filtered_out_row_not_inserted(self):
+        response = self.create(contract_type="wolse")
+        self.assertNotContains(response, "역세권 신축")
+        self.assertContains(response, "0 listings")
+
+        response = self.create(number_of_rooms_min=1)
+        self.assertContains(response, "역세권 신축")
+        self.assertNotContains(response, "listing-count")
+
+    def test_redirect_without_htmx(self):
+        response = self.client.post(reverse("listing_create"), self.post_data)
+        self.assertRedirects(response, reverse("listing_list"))
+
+    @override_settings(ROOT_URLCONF="jeonse.async_urls")
+    def test_async_view(self):
+        response = self.create(contract_type="jeonse")
+        self.assertContains(response, "역세권 신축")
+        self.assertContains(response, "2 listings")
+        response = self.client.post(reverse("listing_create"), self.post_data)
+        self.assertRedirects(response, reverse("listing_list"))
+
+
+class TestImportListings(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.row = {
+            "jeonse_deposit_amount": 100000000,
+            "wolse_deposit_amount": 0,
+            "wolse_monthly_payment": 0,
+            "gwanlibi_monthly_payment": 100000,
+            "annual_interest_rate": 4.5,
+            "total_area": 59.9,
+            "number_of_rooms": 3,
+            "number_of_bathrooms": 2,
+            "comment": "역세권",
+        }
+
+    def import_listings(self, lines, suffix, *args, creator=None):
+        with tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False) as fh:
+            fh.write("\n".join(lines) + "\n")
+        self.addCleanup(os.remove, fh.name)
+        out = StringIO()
+        call_command(
+            "import_listings",
+            fh.name,
+            *(creator or ["--creator", self.user.email]),
+            "--batch-size",
+            "2",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_import_jsonl(self):
+        bad_row = dict(self.row, number_of_rooms="many")
+        lines = [json.dumps(self.row)] * 3 + [json.dumps(bad_row)]
+        out = self.import_listings(lines, ".jsonl")
+
+        self.assertIn("Imported 3 listings, rejected 1 rows", out)
+        self.assertEqual(self.user.listings.count(), 3)
+        listing = self.user.listings.first()
+        self.assertEqual(
+            listing.total_monthly_payment,
+            monthly_interest_payment(100000000, 4.5) + 100000,
+        )
+
+    def test_import_csv_resume(self):
+        header = ",".join(self.row)
+        values = ",".join(str(v) for v in self.row.values())
+        out = self.import_listings([header] + [values] * 5, ".csv", "--skip", "3")
+
+        self.assertIn("Imported 2 listings, rejected 0 rows", out)
+        self.assertEqual(self.user.listings.count(), 2)
+
+    def test_creator(self):
+        twin = get_user_model().objects.create_user(
+            username="twin", email=self.user.email
+        )
+        lines = [json.dumps(self.row)]
+        with self.assertRaisesMessage(CommandError, "use --creator-id"):
+            self.import_listings(lines, ".jsonl")
+        self.import_listings(lines, ".jsonl", creator=["--creator-id", str(twin.pk)])
+        self.assertEqual(twin.listings.count(), 1)
+        self.assertFalse(self.user.listings.exists())
+
+    def test_rejects_written_after_commit(self):
+        bad_row = json.dumps(dict(self.row, number_of_rooms="many"))
+        failing_row = json.dumps(dict(self.row, comment="실패"))
+        lines = [json.dumps(self.row), bad_row, bad_row, failing_row]
+        rejects = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "r")
+        bulk_create = Listing.objects.bulk_create
+
+        def fail_second_batch(listings, **kwargs):
+            if listings[0].comment == "실패":
+                raise DatabaseError("disk I/O error")
+            return bulk_create(listings, **kwargs)
+
+        with mock.patch.object(
+            Listing.objects, "bulk_create", side_effect=fail_second_batch
+        ):
+            with self.assertRaisesMessage(CommandError, "--skip 2"):
+                self.import_listings(lines, ".jsonl", "--rejects", rejects)
+        with open(rejects) as fh:
+            self.assertEqual([json.loads(line)["row"] for line in fh], [2])
+
+        lines[3] = json.dumps(self.row)
+        self.import_listings(lines, ".jsonl", "--rejects", rejects, "--skip", "2")
+        with open(rejects) as fh:
+            self.assertEqual([json.loads(line)["row"] for line in fh], [2, 3])
+        self.assertEqual(self.user.listings.count(), 2)
+
+    def test_malformed_jsonl(self):
+        lines = [json.dumps(self.row), "{not json", "[1, 2]", json.dumps(self.row)]
+        rejects = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "r")
+        out = self.import_listings(lines, ".jsonl", "--rejects", rejects)
+
+        self.assertIn("Imported 2 listings, rejected 2 rows", out)
+        with open(rejects) as fh:
+            rejected = [json.loads(line) for line in fh]
+        self.assertEqual([r["row"] for r in rejected], [2, 3])
+        self.assertEqual(rejected[0]["data"], "{not json")
+        self.assertEqual(rejected[1]["errors"]["__all__"][0]["code"], "malformed")
+
+    def test_ranking_error_keeps_batch_error(self):
+        lines = [json.dumps(self.row)] * 3
+        bulk_create = mock.patch.object(
+            Listing.objects, "bulk_create", side_effect=DatabaseError("disk full")
+        )
+        rank = mock.patch.object(
+            Listing.objects, "rank_by_cost", side_effect=DatabaseError("locked")
+        )
+        with bulk_create, rank, self.assertRaisesMessage(CommandError, "disk full"):
+            self.import_listings(lines, ".jsonl")
+
+        with rank, self.assertRaisesMessage(DatabaseError, "locked"):
+            self.import_listings(lines, ".jsonl")
+
+
+class TestJobs(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.client.force_login(self.user)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        files = override_settings(JOB_FILES_DIR=directory.name, JOB_RETRY_DELAY=0)
+        files.enable()
+        self.addCleanup(files.disable)
+
+    def start_job(self, data):
+        response = self.client.post(reverse("job_status"), data, HTTP_HX_REQUEST="true")
+        self.assertRedirects(response, reverse("job_status"))
+        return self.user.jobs.latest("pk")
+
+    def run_jobs(self):
+        out = StringIO()
+        call_command("run_jobs", "--burst", "--concurrency", "1", stdout=out)
+        return out.getvalue()
+
+    def test_export(self):
+        for payment in [0, 500000, 600000]:
+            Listing.objects.create(creator=self.user, wolse_monthly_payment=payment)
+        job = self.start_job(
+            {"kind": "export", "format": "csv", "contract_type": "wolse"}
+        )
+        self.assertEqual(job.params, {"format": "csv", "query": "contract_type=wolse"})
+        self.assertEqual(job.status, "queued")
+
+        self.assertEqual(self.run_jobs(), "Ran 1 jobs.\n")
+        job.refresh_from_db()
+        self.assertEqual(job.status, "succeeded")
+        self.assertEqual((job.progress, job.progress_total, job.percent), (2, 2, 100))
+
+        response = self.client.get(reverse("job_download", args=[job.pk]))
+        self.assertEqual(response["Content-Disposition"].split(";")[0], "attachment")
+        rows = list(csv.reader(b"".join(response).decode("utf-8-sig").splitlines()))
+        self.assertEqual(len(rows), 3)
+
+    def test_export_sort(self):
+        for payment in [500000, 700000, 600000]:
+            Listing.objects.create(creator=self.user, wolse_monthly_payment=payment)
+        response = self.client.get(
+            reverse("listing_list"), {"sort": "-wolse_monthly_payment"}
+        )
+        self.assertContains(
+            response, '<input type="hidden" name="sort" value="-wolse_monthly_payment">'
+        )
+        job = self.start_job(
+            {"kind": "export", "format": "csv", "sort": "-wolse_monthly_payment"}
+        )
+        self.assertEqual(job.params["query"], "sort=-wolse_monthly_payment")
+
+        self.run_jobs()
+        response = self.client.get(reverse("job_download", args=[job.pk]))
+        rows = list(csv.reader(b"".join(response).decode("utf-8-sig").splitlines()))
+        self.assertEqual([row[3] for row in rows[1:]], ["700000", "600000", "500000"])
+
+    def test_import(self):
+        row = {
+            "jeonse_deposit_amount": 100000000,
+            "wolse_deposit_amount": 0,
+            "wolse_monthly_payment": 0,
+            "gwanlibi_monthly_payment": 100000,
+            "annual_interest_rate": 4.5,
+            "total_area": 59.9,
+            "number_of_rooms": 3,
+            "number_of_bathrooms": 2,
+        }
+        upload = SimpleUploadedFile(
+            "listings.jsonl", (json.dumps(row) + "\n").encode() * 3
+        )
+        job = self.start_job({"kind": "import", "file": upload})
+        # Emails are not unique; the job imports for its own user.
+        twin = get_user_model().objects.create_user(
+            username="twin", email=self.user.email
+        )
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "succeeded", job.error)
+        self.assertEqual(job.progress, 3)
+        self.assertIn("Imported 3 listings", job.result["output"])
+        self.assertFalse(os.path.exists(job.params["path"]))
+        self.assertEqual(self.user.listings.count(), 3)
+        self.assertFalse(twin.listings.exists())
+
+        response = self.client.post(
+            reverse("job_status"), {"kind": "import"}, HTTP_HX_REQUEST="true"
+        )
+        self.assertContains(response, "가져올 파일을 선택하세요.")
+
+    def test_recalculate(self):
+        Listing.objects.create(creator=self.user, wolse_monthly_payment=1, total_area=2)
+        Listing.objects.create(creator=self.user, wolse_monthly_payment=2, total_area=2)
+        Listing.objects.update(total_monthly_payment=0, monthly_cost_per_area=None)
+        detail = reverse("listing_detail", args=[self.user.listings.first().pk])
+        etag = self.client.get(detail)["ETag"]
+        self.assertEqual(
+            self.client.get(detail, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        self.start_job({"kind": "recalculate"})
+        self.run_jobs()
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            list(
+                self.user.listings.order_by("pk").values_list(
+                    "total_monthly_payment", "monthly_cost_per_area", "cost_rank"
+                )
+            ),
+            [(1, 0.5, 1), (2, 1.0, 0)],
+        )
+
+    def test_retries_then_fails(self):
+        calls = []
+
+        def failing(job):
+            calls.append(job.attempts)
+            raise RuntimeError("disk full")
+
+        job = Job.objects.enqueue(self.user, "export")
+        with mock.patch.dict(JOB_HANDLERS, {"export": failing}):
+            with self.assertLogs("jeonse.jobs", "ERROR"):
+                self.assertEqual(self.run_jobs(), "Ran 3 jobs.\n")
+        job.refresh_from_db()
+        self.assertEqual(calls, [1, 2, 3])
+        self.assertEqual(job.status, "failed")
+        self.assertIn("RuntimeError: disk full", job.error)
+
+    def test_cancel(self):
+        queued = Job.objects.enqueue(self.user, "recalculate")
+        response = self.client.post(
+            reverse("job_cancel", args=[queued.pk]), HTTP_HX_REQUEST="true"
+        )
+        self.assertRedirects(response, reverse("job_status"))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, "cancelled")
+
+        running = Job.objects.enqueue(self.user, "recalculate")
+        running = Job.objects.claim("test")
+        self.client.post(reverse("job_cancel", args=[running.pk]))
+        with self.assertRaises(JobCancelled):
+            running.report(1)
+        run_job(running)
+        running.refresh_from_db()
+        self.assertEqual(running.status, "cancelled")
+
+        other = get_user_model().objects.create_user(username="other")
+        self.client.force_login(other)
+        response = self.client.post(reverse("job_cancel", args=[running.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_stale_jobs_requeued(self):
+        Job.objects.enqueue(self.user, "recalculate")
+        job = Job.objects.claim("gone")
+        self.assertIsNone(Job.objects.claim("other"))
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_at=job.heartbeat_at - timedelta(hours=1)
+        )
+        self.assertEqual(Job.objects.requeue_stale(timedelta(minutes=5)), 1)
+        self.assertEqual(Job.objects.claim("other").attempts, 2)
+
+    def test_stale_jobs_not_requeued_forever(self):
+        stale = timezone.now() - timedelta(hours=1)
+        crashing = Job.objects.enqueue(self.user, "export")
+        for _ in range(crashing.max_attempts):
+            self.assertEqual(Job.objects.claim("gone").pk, crashing.pk)
+            Job.objects.filter(pk=crashing.pk).update(heartbeat_at=stale)
+            Job.objects.requeue_stale(timedelta(minutes=5))
+        crashing.refresh_from_db()
+        self.assertEqual((crashing.status, crashing.attempts), ("failed", 3))
+        self.assertIn("stopped reporting", crashing.error)
+        self.assertIsNotNone(crashing.finished_at)
+
+        cancelled = Job.objects.enqueue(self.user, "recalculate")
+        Job.objects.claim("gone").cancel()
+        Job.objects.filter(pk=cancelled.pk).update(heartbeat_at=stale)
+        self.assertEqual(Job.objects.requeue_stale(timedelta(minutes=5)), 0)
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, "cancelled")
+        self.assertIsNone(Job.objects.claim("other"))
+
+    def test_status_polls_while_active(self):
+        response = self.client.get(reverse("listing_list"))
+        self.assertContains(response, 'hx-get="/jobs/" hx-trigger="load"')
+
+        job = Job.objects.enqueue(self.user, "recalculate")
+        response = self.client.get(reverse("job_status"), HTTP_HX_REQUEST="true")
+        self.assertContains(response, 'hx-trigger="every 2s"')
+        self.assertContains(response, "재계산")
+        self.assertContains(response, reverse("job_cancel", args=[job.pk]))
+
+        self.run_jobs()
+        response = self.client.get(reverse("job_status"), HTTP_HX_REQUEST="true")
+        self.assertNotContains(response, "every 2s")
+        self.assertContains(response, "완료")
+
+
+class TestKeysetPagination(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        for i in range(60):
+            Listing.objects.create(
+                creator=self.user,
+                total_area=i % 7,
+                number_of_rooms=i % 3,
+                comment=None if i % 5 == 0 else f"comment{i % 4}",
+            )
+        self.client.force_login(self.user)
+
+    def walk(self, params):
+        endpoint = reverse("listing_list")
+        seen, pages = [], []
+        response = self.client.get(endpoint, params)
+        while True:
+            page = response.context["table"].page
+            ids = [row.record.pk for row in page.object_list]
+            seen += ids
+            pages.append((dict(params), ids))
+            if not page.has_next():
+                break
+            params = dict(params, cursor=page.next_cursor)
+            response = self.client.get(endpoint, params)
+
+        for params, ids in reversed(pages[:-1]):
+            params = dict(params, cursor=page.previous_cursor)
+            response = self.client.get(endpoint, params)
+            page = response.context["table"].page
+            self.assertEqual([row.record.pk for row in page.object_list], ids)
+        self.assertFalse(page.has_previous())
+        return seen
+
+    def test_walk_every_orderable_column(self):
+        for sort in ["total_area", "-total_area", "-comment", "comment", "-id"]:
+            field = sort.lstrip("-")
+            expected = sorted(
+                self.user.listings.all(),
+                key=lambda listing: (
+                    getattr(listing, field) is not None,
+                    getattr(listing, field),
+                    listing.pk,
+                ),
+                reverse=sort.startswith("-"),
+            )
+            seen = self.walk({"sort": sort})
+            self.assertEqual(seen, [listing.pk for listing in expected], sort)
+
+    def test_filtered_without_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            seen = self.walk({"total_monthly_payment": 0, "sort": "number_of_rooms"})
+        self.assertEqual(len(seen), 60)
+        self.assertFalse(
+            [q for q in queries.captured_queries if "COUNT(" in q["sql"].upper()]
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("listing_list"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["table"].page.has_previous())
+
+
+class TestListingIndexes(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+
+    def query_plan(self, params, sort=None):
+        queryset = ListingFilter(params, queryset=self.user.listings.all()).qs
+        if sort:
+            field = sort.lstrip("-")
+            queryset = queryset.order_by(*seek_ordering(field, sort.startswith("-")))
+        sql, sql_params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", sql_params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_filters_use_index(self):
+        for params in [
+            {"total_monthly_payment": 1000000},
+            {"total_area_min": 30, "total_area_max": 60},
+            {"number_of_rooms_min": 2},
+            {"number_of_bathrooms_max": 1},
+            {"jeonse_deposit_amount_min": 100000000},
+            {"wolse_deposit_amount_max": 10000000},
+            {"monthly_cost_per_area_max": 30000},
+            {"monthly_cost_per_room_min": 500000},
+            {"total_area_min": 30, "number_of_rooms_min": 2},
+        ]:
+            plan = self.query_plan(params)
+            self.assertTrue(plan[0].startswith("SEARCH jeonse_listing USING"), plan)
+            self.assertRegex(plan[0], r"creator_id=\? AND ", params)
+
+    def test_sorts_use_index(self):
+        for sort, index in [
+            ("total_monthly_payment", "listing_creator_payment_idx"),
+            ("-total_area", "listing_creator_area_idx"),
+            ("number_of_rooms", "listing_creator_rooms_idx"),
+            ("-jeonse_deposit_amount", "listing_creator_jeonse_idx"),
+            ("cost_rank", "listing_creator_cost_rank_idx"),
+        ]:
+            plan = self.query_plan({}, sort)
+            self.assertIn(index, plan[0], sort)
+            self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan, sort)
+
+    def test_later_pages_seek_index(self):
+        # Each page starts an index range at the cursor rather than scanning
+        # the user's listings up to it, so deep pages cost the same.
+        for sort, value, ranges in [
+            ("id", None, [r"rowid>\?"]),
+            ("total_area", 30.0, [r"total_area>\?"]),
+            ("-total_area", 30.0, [r"total_area<\?"]),
+            ("-cost_rank", 3, [r"cost_rank<\?", r"cost_rank=\?"]),
+            ("cost_rank", None, [r"cost_rank=\? AND rowid>\?", r"cost_rank>\?"]),
+        ]:
+            cursor = encode_cursor({"o": sort, "v": value, "pk": 100, "b": False})
+            queryset = self.user.listings.order_by(sort)
+            parts = KeysetPaginator(queryset, 25, cursor).seek()
+            self.assertEqual(len(parts), len(ranges), sort)
+            for part, expected in zip(parts, ranges):
+                sql, sql_params = part[:26].query.sql_with_params()
+                with connection.cursor() as db:
+                    db.execute(f"EXPLAIN QUERY PLAN {sql}", sql_params)
+                    plan = [row[-1] for row in db.fetchall()]
+                self.assertRegex(plan[0], rf"creator_id=\? AND {expected}", sort)
+                self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan, sort)
+
+
+class TestTableFragmentCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.listing = Listing.objects.create(creator=self.user, total_area=30)
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        return self.client.get(reverse("listing_list"), params, HTTP_HX_REQUEST="true")
+
+    def assertCache(self, outcome, **params):
+        response = self.get(**params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Table-Cache"], outcome)
+        return response
+
+    def test_hit_and_invalidation(self):
+        first = self.assertCache("miss")
+        with self.assertNumQueries(0):
+            second = self.assertCache("hit")
+        self.assertEqual(first.content, second.content)
+        self.assertCache("miss", sort="-total_area")
+        self.assertCache("hit", sort="-total_area")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.create(creator=self.user, total_area=40)
+        self.assertCache("miss")
+        self.assertCache("hit")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.bulk_create([Listing(creator=self.user)])
+        self.assertCache("miss")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.delete()
+        response = self.assertCache("miss")
+        self.assertNotContains(response, f"/{self.listing.pk}/")
+        self.assertEqual(table_cache_stats(), {"hit": 3, "miss": 5})
+
+    def test_users_do_not_share_fragments(self):
+        self.assertCache("miss")
+        other = get_user_model().objects.create_user(
+            username="other", email="other@gmail.com", password="testpassword"
+        )
+        self.client.force_login(other)
+        response = self.assertCache("miss")
+        self.assertNotContains(response, f"/{self.listing.pk}/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.create(creator=other)
+        self.client.force_login(self.user)
+        self.assertCache("hit")
+
+    def test_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                        "LOCATION": location,
+                    }
+                }
+            ):
+                self.assertCache("miss")
+                self.assertCache("hit")
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.listing.save()
+                self.assertCache("miss")
+
+
+class TestListingCounters(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        Listing.objects.create(creator=self.user)
+
+    def counts(self):
+        return {
+            bucket: ListingCounter.objects.count_for(self.user, bucket)
+            for bucket in ["all", "jeonse", "wolse"]
+        }
+
+    def test_counters_follow_writes(self):
+        self.assertEqual(self.counts(), {"all": 1, "jeonse": 1, "wolse": 0})
+
+        listing = Listing.objects.create(creator=self.user, wolse_monthly_payment=50)
+        Listing.objects.bulk_create(
+            [Listing(creator=self.user), Listing(creator=self.user)]
+        )
+        self.assertEqual(self.counts(), {"all": 4, "jeonse": 3, "wolse": 1})
+
+        listing.wolse_monthly_payment = 0
+        listing.save()
+        self.assertEqual(self.counts(), {"all": 4, "jeonse": 4, "wolse": 0})
+
+        Listing.objects.get(pk=listing.pk).delete()
+        self.user.listings.filter(pk__lt=listing.pk).delete()
+        self.assertEqual(self.counts(), {"all": 2, "jeonse": 2, "wolse": 0})
+        self.assertEqual(self.user.listings.count(), 2)
+
+    def test_list_view_reads_counter(self):
+        ListingCounter.objects.count_for(self.user, "all")
+        ListingCounter.objects.filter(user=self.user).update(count=42)
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("listing_list"))
+        self.assertEqual(response.context["table"].paginator.count, 42)
+        self.assertContains(response, "42 listings")
+        self.assertFalse(
+            [q for q in queries.captured_queries if "COUNT(" in q["sql"].upper()]
+        )
+
+        response = self.client.get(reverse("listing_list"), {"contract_type": "wolse"})
+        self.assertEqual(response.context["table"].paginator.count, 0)
+        response = self.client.get(reverse("listing_list"), {"number_of_rooms_min": 1})
+        self.assertIsNone(response.context["table"].paginator.count)
+
+    def test_rebuild_reports_drift(self):
+        self.counts()
+        ListingCounter.objects.filter(user=self.user, bucket="all").update(count=7)
+        out = StringIO()
+        call_command("rebuild_listing_counters", "--dry-run", stdout=out)
+        self.assertIn("bucket 'all': stored 7, actual 1", out.getvalue())
+        self.assertEqual(ListingCounter.objects.count_for(self.user), 7)
+
+        call_command("rebuild_listing_counters", stdout=StringIO())
+        self.assertEqual(self.counts(), {"all": 1, "jeonse": 1, "wolse": 0})
+
+
+class TestListingCountersFirstRead(TransactionTestCase):
+    def test_count_and_insert_share_a_transaction(self):
+        # Outside of one write transaction, a listing saved between the count
+        # and the insert finds no counter to adjust and is left out.
+        user = get_user_model().objects.create_user(username="testuser")
+        Listing.objects.create(creator=user)
+        count = QuerySet.count
+        in_transaction = []
+
+        def record(queryset):
+            in_transaction.append(connection.in_atomic_block)
+            return count(queryset)
+
+        with mock.patch.object(QuerySet, "count", record):
+            self.assertEqual(ListingCounter.objects.count_for(user), 1)
+        self.assertEqual(in_transaction, [True])
+        self.assertEqual(ListingCounter.objects.get(user=user, bucket="all").count, 1)
+
+
+class TestValueRanking(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.other = get_user_model().objects.create_user(
+            username="other", email="other@gmail.com", password="testpassword"
+        )
+
+    def ranks(self, user):
+        return dict(user.listings.values_list("pk", "cost_rank"))
+
+    def assertRanksCurrent(self):
+        for user in [self.user, self.other]:
+            ranks = self.ranks(user)
+            Listing.objects.rank_by_cost([user.pk])
+            self.assertEqual(ranks, self.ranks(user))
+
+    def test_ranks_follow_writes(self):
+        rng = random.Random(19)
+        for i in range(30):
+            Listing.objects.create(
+                creator=rng.choice([self.user, self.other]),
+                wolse_monthly_payment=rng.choice([0, 300000, 500000]),
+                gwanlibi_monthly_payment=rng.randrange(0, 200000, 50000),
+                total_area=rng.choice([0, 30, 45, 60]),
+                number_of_rooms=rng.choice([0, 1, 2]),
+            )
+        self.assertRanksCurrent()
+        listings = list(Listing.objects.all())
+        for listing in rng.sample(listings, 10):
+            listing.total_area = rng.choice([0, 30, 45, 60])
+            listing.gwanlibi_monthly_payment = rng.randrange(0, 200000, 50000)
+            listing.save()
+        self.assertRanksCurrent()
+        for listing in rng.sample(listings, 5):
+            listing.delete()
+        Listing.objects.bulk_create(
+            [Listing(creator=self.user, total_area=area) for area in [20, 0, 80]]
+        )
+        self.assertRanksCurrent()
+        self.assertEqual(
+            ListingCounter.objects.count_for(self.user, "ranked"),
+            self.user.listings.filter(total_area__gt=0).count(),
+        )
+
+        listing = self.user.listings.filter(total_area__gt=0).first()
+        self.assertEqual(
+            listing.monthly_cost_per_area,
+            listing.total_monthly_payment / listing.total_area,
+        )
+        self.assertEqual(
+            listing.cost_rank,
+            self.user.listings.filter(
+                monthly_cost_per_area__gt=listing.monthly_cost_per_area
+            ).count(),
+        )
+
+    def test_percentile_filter_and_column(self):
+        for payment in [100000, 200000, 300000, 400000, 500000]:
+            Listing.objects.create(
+                creator=self.user, wolse_monthly_payment=payment, total_area=50
+            )
+        Listing.objects.create(creator=self.user)
+        Listing.objects.create(creator=self.other, total_area=50)
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("listing_list"), {"value_percentile_min": 50, "sort": "cost_rank"}
+        )
+        self.assertEqual(
+            [
+                row.record.wolse_monthly_payment
+                for row in response.context["table"].rows
+            ],
+            [300000, 200000, 100000],
+        )
+        self.assertEqual(
+            [row.record.value_percentile for row in response.context["table"].rows],
+            [50, 75, 100],
+        )
+        self.assertContains(response, "가성비 백분위")
+        self.assertContains(response, "75%")
+
+        response = self.client.get(
+            reverse("listing_list"), {"value_percentile_max": 25}
+        )
+        self.assertEqual(len(response.context["table"].rows), 2)
+
+
+class TestListingStats(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.client.force_login(self.user)
+
+    def actual(self):
+        return stats_from_aggregates(self.user.listings.aggregate(**stats_aggregates()))
+
+    def assertStatsCurrent(self):
+        stats = ListingStats.objects.for_user(self.user)
+        self.assertEqual(stats_drift(stats, self.actual()), [])
+        for field in STATS_FIELDS:
+            self.assertEqual(stats[field]["min"], self.actual()[field]["min"])
+            self.assertEqual(stats[field]["max"], self.actual()[field]["max"])
+
+    def test_stats_follow_writes(self):
+        rng = random.Random(22)
+        Listing.objects.create(creator=self.user, total_area=59)
+        self.assertStatsCurrent()
+        for i in range(20):
+            Listing.objects.create(
+                creator=self.user,
+                jeonse_deposit_amount=rng.randrange(0, 600000000, 10000000),
+                wolse_monthly_payment=rng.choice([0, 300000, 500000]),
+                gwanlibi_monthly_payment=rng.randrange(0, 200000, 50000),
+                total_area=rng.choice([0, 30, 45, 60, 120]),
+            )
+        self.assertStatsCurrent()
+        listings = list(self.user.listings.all())
+        for listing in rng.sample(listings, 8):
+            listing.total_area = rng.choice([10, 30, 150])
+            listing.save()
+        highest = self.user.listings.order_by("-total_monthly_payment").first()
+        highest.delete()
+        self.assertIsNone(
+            ListingStats.objects.get(user=self.user).data["total_monthly_payment"][
+                "max"
+            ]
+        )
+        self.assertStatsCurrent()
+        Listing.objects.bulk_create(
+            [Listing(creator=self.user, total_area=area) for area in [20, 0, 80]]
+        )
+        self.assertStatsCurrent()
+        self.user.listings.all().delete()
+        self.assertEqual(ListingStats.objects.for_user(self.user)["count"], 0)
+
+    def test_median_estimate(self):
+        edges = [0, 10, 20]
+        self.assertEqual(estimate_median([0, 2, 0], edges, 12, 18), 15)
+        self.assertEqual(estimate_median([1, 1, 2], edges, 5, 40), 20)
+        self.assertIsNone(estimate_median([0, 0, 0], edges, None, None))
+
+    def test_panel(self):
+        for area in [30, 45, 60]:
+            Listing.objects.create(
+                creator=self.user, gwanlibi_monthly_payment=100000, total_area=area
+            )
+        response = self.client.get(reverse("listing_stats"))
+        self.assertTemplateUsed(response, "htmx/listing_stats.html")
+        self.assertContains(response, "3 listings")
+        self.assertContains(response, "전용면적")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("listing_stats"))
+        self.assertFalse(
+            [q for q in queries if 'FROM "jeonse_listing"' in q["sql"]],
+        )
+        etag = response["ETag"]
+        response = self.client.get(reverse("listing_stats"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(reverse("listing_list"))
+        self.assertContains(response, reverse("listing_stats"))
+
+    def test_created_listing_triggers_refresh(self):
+        response = self.client.post(
+            reverse("listing_create"),
+            {
+                "jeonse_deposit_amount": 100000000,
+                "wolse_deposit_amount": 0,
+                "wolse_monthly_payment": 0,
+                "gwanlibi_monthly_payment": 100000,
+                "annual_interest_rate": 4.5,
+                "total_area": 59.9,
+                "number_of_rooms": 3,
+                "number_of_bathrooms": 2,
+            },
+            HTTP_HX_REQUEST="true",
+        )
+        self.assertEqual(response["HX-Trigger"], "listingsChanged")
+
+    def test_rebuild_command(self):
+        Listing.objects.create(creator=self.user, total_area=30)
+        ListingStats.objects.for_user(self.user)
+        stats = ListingStats.objects.get(user=self.user)
+        stats.data["count"] = 5
+        stats.data["total_area"]["histogram"][0] = 3
+        stats.save()
+
+        out = StringIO()
+        call_command("rebuild_listing_stats", dry_run=True, stdout=out)
+        self.assertIn("count, total_area.histogram drifted", out.getvalue())
+        self.assertIn("1 drifted and 0 missing stats found", out.getvalue())
+        self.assertEqual(ListingStats.objects.get(user=self.user).data["count"], 5)
+
+        call_command("rebuild_listing_stats", stdout=StringIO())
+        self.assertStatsCurrent()
+        ListingStats.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_listing_stats", stdout=out)
+        self.assertIn("0 drifted and 1 missing stats fixed", out.getvalue())
+        self.assertStatsCurrent()
+
+
+class TestListingStatsFirstRead(TransactionTestCase):
+    def test_aggregate_and_insert_share_a_transaction(self):
+        # Outside of one write transaction, a listing saved between the
+        # aggregate and the insert finds no stats to adjust and is left out.
+        user = get_user_model().objects.create_user(username="testuser")
+        Listing.objects.create(creator=user, total_area=30)
+        aggregate = QuerySet.aggregate
+        in_transaction = []
+
+        def record(queryset, *args, **kwargs):
+            in_transaction.append(connection.in_atomic_block)
+            return aggregate(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "aggregate", record):
+            stats = ListingStats.objects.for_user(user)
+        self.assertEqual(in_transaction, [True])
+        self.assertEqual(stats["count"], 1)
+        self.assertEqual(ListingStats.objects.get(user=user).data, stats)
+
+
+class TestListingDetailQueries(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.listing = Listing.objects.create(creator=self.user)
+        self.endpoint = reverse("listing_detail", kwargs={"pk": self.listing.pk})
+
+    def test_owner_single_fetch(self):
+        self.client.force_login(self.user)
+        # user, cached for later requests, and listing
+        with self.assertNumQueries(2):
+            response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["object"], self.listing)
+
+    def test_non_owner_and_missing(self):
+        other = get_user_model().objects.create_user(
+            username="other", email="other@gmail.com", password="testpassword"
+        )
+        self.client.force_login(other)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.endpoint)
+        self.assertEqual(response.status_code, 403)
+
+        endpoint = reverse("listing_detail", kwargs={"pk": self.listing.pk + 1})
+        response = self.client.get(endpoint)
+        self.assertEqual(response.status_code, 404)
+
+
+class TestConditionalGet(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.listing = Listing.objects.create(creator=self.user)
+        self.client.force_login(self.user)
+
+    def test_listing_list(self):
+        endpoint = reverse("listing_list")
+        response = self.client.get(endpoint, {"sort": "total_area"})
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertIn("HX-Request", response["Vary"])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                endpoint, {"sort": "total_area"}, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        for params, headers in [
+            ({"sort": "-total_area"}, {}),
+            ({"sort": "total_area"}, {"HTTP_HX_REQUEST": "true"}),
+        ]:
+            response = self.client.get(
+                endpoint, params, HTTP_IF_NONE_MATCH=etag, **headers
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+
+        Listing.objects.create(creator=self.user)
+        response = self.client.get(
+            endpoint, {"sort": "total_area"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_listing_detail(self):
+        endpoint = reverse("listing_detail", kwargs={"pk": self.listing.pk})
+        response = self.client.get(endpoint)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        response = self.client.get(endpoint, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.content)
+        response = self.client.get(
+            endpoint, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.listing.comment = "남향"
+        self.listing.save()
+        response = self.client.get(endpoint, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "남향")
+
+        other = get_user_model().objects.create_user(
+            username="other", email="other@gmail.com", password="testpassword"
+        )
+        self.client.force_login(other)
+        response = self.client.get(endpoint, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(ROOT_URLCONF="jeonse.async_urls")
+class TestAsyncViews(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.listings = [
+            Listing.objects.create(creator=self.user, total_area=i) for i in range(30)
+        ]
+        self.client = self.async_client_class()
+
+    async def test_listing_list(self):
+        endpoint = reverse("listing_list")
+        response = await self.client.get(endpoint)
+        self.assertRedirects(
+            response,
+            reverse("account_login") + f"?next={endpoint}",
+            fetch_redirect_response=False,
+        )
+
+        await sync_to_async(self.client.force_login)(self.user)
+        response = await self.client.get(endpoint, {"sort": "-total_area"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "jeonse/listing_list.html")
+        page = response.context["table"].page
+        self.assertEqual(
+            [row.record.total_area for row in page.object_list],
+            list(range(29, 4, -1)),
+        )
+        self.assertEqual(response.context["table"].paginator.count, 30)
+
+        response = await self.client.get(
+            endpoint,
+            {"sort": "-total_area", "cursor": page.next_cursor},
+            HTTP_HX_REQUEST="true",
+        )
+        self.assertTemplateUsed(response, "htmx/listing_list.html")
+        page = response.context["table"].page
+        self.assertEqual(
+            [row.record.total_area for row in page.object_list], list(range(4, -1, -1))
+        )
+
+    async def test_listing_detail(self):
+        await sync_to_async(self.client.force_login)(self.user)
+        listing = self.listings[0]
+        response = await self.client.get(
+            reverse("listing_detail", kwargs={"pk": listing.pk})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["object"], listing)
+
+        response = await self.client.get(reverse("listing_detail", kwargs={"pk": 0}))
+        self.assertEqual(response.status_code, 404)
+
+        other = await get_user_model().objects.acreate(username="other")
+        await sync_to_async(self.client.force_login)(other)
+        response = await self.client.get(
+            reverse("listing_detail", kwargs={"pk": listing.pk})
+        )
+        self.assertEqual(response.status_code, 403)
+
+    async def test_listing_create(self):
+        await sync_to_async(self.client.force_login)(self.user)
+        endpoint = reverse("listing_create")
+        response = await self.client.get(endpoint)
+        self.assertTemplateUsed(response, "jeonse/listing_create.html")
+
+        post_data = {
+            "jeonse_deposit_amount": 100000000,
+            "wolse_deposit_amount": 0,
+            "wolse_monthly_payment": 0,
+            "gwanlibi_monthly_payment": 1,
+            "annual_interest_rate": 3,
+            "total_area": 1,
+            "number_of_rooms": 1,
+            "number_of_bathrooms": 1,
+        }
+        response = await self.client.post(endpoint, post_data)
+        self.assertRedirects(
+            response, reverse("listing_list"), fetch_redirect_response=False
+        )
+        listing = await self.user.listings.alatest("pk")
+        self.assertEqual(listing.total_monthly_payment, 250001)
+
+        response = await self.client.post(endpoint, {})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors)
+
+    async def test_conditional_get_and_fragment_cache(self):
+        await sync_to_async(cache.clear)()
+        await sync_to_async(self.client.force_login)(self.user)
+        endpoint = reverse("listing_list")
+        response = await self.client.get(endpoint, {"sort": "total_area"})
+        self.assertIn("HX-Request", response["Vary"])
+        self.assertTrue(response.has_header("Last-Modified"))
+        response = await self.client.get(
+            endpoint,
+            {"sort": "total_area"},
+            headers={"If-None-Match": response["ETag"]},
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("HX-Request", response["Vary"])
+
+        outcomes = []
+        for _ in range(2):
+            response = await self.client.get(
+                endpoint, {"sort": "total_area"}, headers={"HX-Request": "true"}
+            )
+            outcomes.append(response["X-Table-Cache"])
+        self.assertEqual(outcomes, ["miss", "hit"])
+
+        detail = reverse("listing_detail", kwargs={"pk": self.listings[0].pk})
+        etag = (await self.client.get(detail))["ETag"]
+        response = await self.client.get(detail, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_same_routes_as_sync(self):
+        from jeonse import async_urls, urls
+
+        self.assertEqual(
+            [(str(p.pattern), p.name) for p in async_urls.urlpatterns],
+            [(str(p.pattern), p.name) for p in urls.urlpatterns],
+        )
+
+
+class TestListingExport(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        for i in range(5):
+            Listing.objects.create(
+                creator=self.user, total_area=10 * i, comment=f"<역세권 {i}>"
+            )
+        other = get_user_model().objects.create_user(
+            username="other", email="other@gmail.com", password="testpassword"
+        )
+        Listing.objects.create(creator=other, total_area=100)
+        self.client.force_login(self.user)
+        self.endpoint = reverse("listing_export")
+
+    def test_csv(self):
+        response = self.client.get(
+            self.endpoint, {"total_area_min": 10, "sort": "-total_area"}
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows[0][:2], ["ID", "전세금"])
+        self.assertEqual([row[7] for row in rows[1:]], ["40.0", "30.0", "20.0", "10.0"])
+        self.assertEqual(rows[1][10], "<역세권 4>")
+
+    def test_xlsx(self):
+        response = self.client.get(self.endpoint, {"format": "xlsx"})
+        self.assertTrue(response.streaming)
+        workbook = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+        self.assertIn("xl/workbook.xml", workbook.namelist())
+        sheet = ElementTree.fromstring(workbook.read("xl/worksheets/sheet1.xml"))
+        namespace = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+        rows = sheet.findall(f"{namespace}sheetData/{namespace}row")
+        self.assertEqual(len(rows), 6)
+        cells = rows[1].findall(f"{namespace}c")
+        self.assertEqual(cells[7].find(f"{namespace}v").text, "0.0")
+        self.assertEqual("".join(cells[10].itertext()), "<역세권 0>")
+
+    def test_unknown_format(self):
+        response = self.client.get(self.endpoint, {"format": "pdf"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_links_keep_filters(self):
+        response = self.client.get(
+            reverse("listing_list"),
+            {"total_area_min": 10, "cursor": "abc"},
+            HTTP_HX_REQUEST="true",
+        )
+        self.assertContains(response, "/export/?total_area_min=10&amp;format=csv")
+        self.assertContains(response, "/export/?total_area_min=10&amp;format=xlsx")
+
+
+class TestListingApi(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.listings = [
+            Listing.objects.create(
+                creator=self.user, total_area=i % 4, number_of_rooms=i % 3
+            )
+            for i in range(12)
+        ]
+        self.client.force_login(self.user)
+
+    def test_list(self):
+        endpoint = reverse("api_listing_list")
+        params = {"number_of_rooms_min": 1, "sort": "-total_area", "per_page": 3}
+        seen = []
+        with mock.patch.object(Listing, "from_db", side_effect=AssertionError):
+            response = self.client.get(endpoint, params)
+            self.assertFalse(response.templates)
+            while True:
+                data = response.json()
+                seen += [(row["total_area"], row["id"]) for row in data["results"]]
+                if not data["next"]:
+                    break
+                response = self.client.get(data["next"])
+
+        expected = sorted(
+            (
+                (listing.total_area, listing.pk)
+                for listing in self.listings
+                if listing.number_of_rooms >= 1
+            ),
+            reverse=True,
+        )
+        self.assertEqual(seen, expected)
+        self.assertIsNone(data["count"])
+
+        data = self.client.get(endpoint, {"sort": "creator"}).json()
+        self.assertEqual(data["count"], 12)
+        self.assertEqual(len(data["results"]), 12)
+        self.assertEqual(self.client.get(data["next"] or endpoint).status_code, 200)
+
+    def test_sort_by_cost_rank(self):
+        for i, listing in enumerate(self.listings):
+            listing.total_area = i + 1
+            listing.jeonse_deposit_amount = 10000000 * (i % 5 + 1)
+            listing.save()
+        endpoint = reverse("api_listing_list")
+        for sort in ["value_percentile", "-value_percentile"]:
+            response = self.client.get(endpoint, {"sort": sort, "per_page": 5})
+            pages = []
+            while True:
+                data = response.json()
+                pages.append([row["id"] for row in data["results"]])
+                if not data["next"]:
+                    break
+                response = self.client.get(data["next"])
+            ranks = dict(Listing.objects.values_list("id", "cost_rank"))
+            seen = [pk for page in pages for pk in page]
+            self.assertEqual(len(pages), 3)
+            self.assertEqual(sorted(seen), sorted(ranks))
+            self.assertEqual(
+                [ranks[pk] for pk in seen],
+                sorted(ranks.values(), reverse=sort.startswith("-")),
+            )
+            while data["previous"]:
+                data = self.client.get(data["previous"]).json()
+                pages.pop()
+                self.assertEqual([row["id"] for row in data["results"]], pages[-1])
+            self.assertEqual(len(pages), 1)
+
+    def test_detail(self):
+        listing = self.listings[0]
+        endpoint = reverse("api_listing_detail", kwargs={"pk": listing.pk})
+        response = self.client.get(endpoint)
+        self.assertEqual(response.json()["id"], listing.pk)
+        self.assertEqual(response.json()["total_area"], listing.total_area)
+
+        response = self.client.get(reverse("api_listing_detail", kwargs={"pk": 0}))
+        self.assertEqual(response.status_code, 404)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(endpoint).status_code, 403)
+        other = get_user_model().objects.create_user(
+            username="other", email="other@gmail.com", password="testpassword"
+        )
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(endpoint).status_code, 403)
+
+
+class TestInterestRateSweep(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.jeonse = Listing.objects.create(
+            creator=self.user,
+            jeonse_deposit_amount=120000000,
+            gwanlibi_monthly_payment=100000,
+        )
+        self.wolse = Listing.objects.create(
+            creator=self.user,
+            wolse_deposit_amount=12000000,
+            wolse_monthly_payment=500000,
+        )
+        self.odd = Listing.objects.create(
+            creator=self.user,
+            jeonse_deposit_amount=123456789,
+            wolse_deposit_amount=987654,
+            wolse_monthly_payment=333,
+            gwanlibi_monthly_payment=77,
+        )
+        self.client.force_login(self.user)
+
+    def test_matrix_matches_total_monthly_payment(self):
+        # At 75% the monthly factor is exactly 1/16, so these land on .5 and
+        # exercise round-half-to-even.
+        for deposit in (8, 24, 40, 56):
+            Listing.objects.create(creator=self.user, jeonse_deposit_amount=deposit)
+        rates = rate_range(0, 7.3, 49) + [75.0]
+        sweep = InterestRateSweep(self.user.listings.all(), rates)
+        listings = list(self.user.listings.order_by("pk"))
+        self.assertEqual(list(sweep.pks), [listing.pk for listing in listings])
+        for rate, row in zip(rates, sweep.matrix):
+            for listing, payment in zip(listings, row):
+                listing.annual_interest_rate = rate
+                self.assertEqual(payment, listing._total_monthly_payment())
+
+    def test_ranking_and_break_even(self):
+        queryset = self.user.listings.exclude(pk=self.odd.pk)
+        sweep = InterestRateSweep(queryset, rate_range(0, 10, 11))
+        self.assertEqual(sweep.ranking(0), [self.jeonse.pk, self.wolse.pk])
+        self.assertEqual(sweep.ranking(10, limit=1), [self.wolse.pk])
+        self.assertEqual(sweep.break_even_rates(), [round(40 / 9, 6)])
+
+        sweep = InterestRateSweep(queryset.filter(pk=self.jeonse.pk), [1.0, 2.0])
+        self.assertEqual(sweep.break_even_rates(), [])
+
+    def test_view(self):
+        endpoint = reverse("listing_sensitivity")
+        response = self.client.get(endpoint, {"jeonse_deposit_amount_max": 120000000})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["sweep"]), 2)
+        self.assertEqual(len(response.context["rows"]), 21)
+        self.assertContains(response, f"{round(40 / 9, 6)}%")
+
+        response = self.client.get(endpoint, {"contract_type": "jeonse"})
+        self.assertEqual(len(response.context["sweep"]), 1)
+
+        response = self.client.get(endpoint, {"steps": 51})
+        self.assertNotIn("rows", response.context)
+        self.assertTrue(response.context["form"].errors)
+
+
+class TestListingSearch(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.client.force_login(self.user)
+
+    def search(self, text, queryset=None, **params):
+        if queryset is None:
+            queryset = self.user.listings.all()
+        filterset = ListingFilter({"search": text, **params}, queryset=queryset)
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return list(filterset.qs.values_list("pk", flat=True))
+
+    def test_index_follows_writes(self):
+        listing = Listing.objects.create(creator=self.user, comment="역세권 남향")
+        self.assertEqual(self.search("남향"), [listing.pk])
+
+        listing.comment = "북향"
+        listing.save()
+        self.assertEqual(self.search("남향"), [])
+        self.assertEqual(self.search("북향"), [listing.pk])
+
+        self.user.listings.update(comment="남향이라 밝음")
+        self.assertEqual(self.search("남향"), [listing.pk])
+
+        [bulk] = Listing.objects.bulk_create(
+            [Listing(creator=self.user, comment="역세권 신축")]
+        )
+        self.assertEqual(self.search("역세권"), [bulk.pk])
+
+        self.user.listings.all().delete()
+        self.assertEqual(self.search("남향"), [])
+        self.assertEqual(self.search("역세권"), [])
+
+    def test_ranked_and_combined_with_filters(self):
+        weak = Listing.objects.create(
+            creator=self.user, total_area=84, comment="역세권 도보 15분, 조용한 동네"
+        )
+        strong = Listing.objects.create(
+            creator=self.user, total_area=59, comment="역세권 역세권 초역세권"
+        )
+        Listing.objects.create(creator=self.user, total_area=84, comment="남향")
+        Listing.objects.create(creator=self.user, total_area=84)
+        self.assertEqual(self.search("역세권"), [strong.pk, weak.pk])
+        self.assertEqual(self.search("역세권", total_area_min=80), [weak.pk])
+        self.assertEqual(self.search("역세권 조용"), [weak.pk])
+        self.assertEqual(self.search('"'), [])
+        self.assertEqual(len(self.search("  ")), 4)
+
+        other = get_user_model().objects.create_user(
+            username="other", email="other@gmail.com", password="testpassword"
+        )
+        Listing.objects.create(creator=other, comment="역세권")
+        self.assertEqual(self.search("역세권"), [strong.pk, weak.pk])
+
+    def test_views_page_in_rank_order(self):
+        listings = [
+            Listing.objects.create(creator=self.user, comment="남향 " * (i % 4 + 1))
+            for i in range(7)
+        ]
+        expected = sorted(
+            listings, key=lambda listing: (-len(listing.comment), listing.pk)
+        )
+        data = self.client.get(
+            reverse("api_listing_list"), {"search": "남향", "per_page": 3}
+        ).json()
+        seen = [row["id"] for row in data["results"]]
+        while data["next"]:
+            data = self.client.get(data["next"]).json()
+            seen += [row["id"] for row in data["results"]]
+        self.assertEqual(seen, [listing.pk for listing in expected])
+
+        response = self.client.get(
+            reverse("listing_list"), {"search": "남향", "sort": "id"}
+        )
+        rows = [row.record.pk for row in response.context["table"].page.object_list]
+        self.assertEqual(rows, sorted(listing.pk for listing in listings))
+
+        response = self.client.get(reverse("listing_export"), {"search": "남향"})
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        ids = [int(row[0]) for row in list(csv.reader(StringIO(content)))[1:]]
+        self.assertEqual(ids, [listing.pk for listing in expected])
+
+    def test_triggers_reinstalled_after_migrate(self):
+        # What SQLite does to the triggers when a migration rebuilds the table.
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER jeonse_listing_fts_insert")
+        emit_post_migrate_signal(verbosity=0, interactive=False, db="default")
+        listing = Listing.objects.create(creator=self.user, comment="남향")
+        self.assertEqual(self.search("남향"), [listing.pk])
+
+
+class TestMapSearch(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.client.force_login(self.user)
+        # Gangnam station, Yeoksam station about 800 m east, and City Hall.
+        self.gangnam = Listing.objects.create(
+            creator=self.user, district="강남구", latitude=37.4979, longitude=127.0276
+        )
+        self.yeoksam = Listing.objects.create(
+            creator=self.user, district="강남구", latitude=37.5006, longitude=127.0364
+        )
+        self.city_hall = Listing.objects.create(
+            creator=self.user, district="중구", latitude=37.5663, longitude=126.9779
+        )
+        Listing.objects.create(creator=self.user)
+
+    def indexed(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, (min_creator + max_creator) / 2, min_lat, min_lng"
+                f" FROM {LISTING_RTREE_TABLE}"
+            )
+            return {
+                row[0]: (row[1], round(row[2], 4), round(row[3], 4))
+                for row in cursor.fetchall()
+            }
+
+    def assertIndexCurrent(self):
+        self.assertEqual(
+            self.indexed(),
+            {
+                pk: (creator_id, round(latitude, 4), round(longitude, 4))
+                for pk, creator_id, latitude, longitude in Listing.objects.filter(
+                    latitude__isnull=False, longitude__isnull=False
+                ).values_list("pk", "creator_id", "latitude", "longitude")
+            },
+        )
+
+    def search(self, **params):
+        filterset = ListingFilter(
+            params, queryset=self.user.listings.all(), request=self.request()
+        )
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return sorted(filterset.qs.values_list("pk", flat=True))
+
+    def request(self):
+        request = HttpRequest()
+        request.user = self.user
+        return request
+
+    def test_index_follows_writes(self):
+        self.assertIndexCurrent()
+        self.gangnam.latitude = 37.51
+        self.gangnam.save()
+        self.yeoksam.longitude = None
+        self.yeoksam.save()
+        self.assertIndexCurrent()
+        self.user.listings.filter(latitude__isnull=True).update(
+            latitude=37.55, longitude=127.0
+        )
+        self.assertIndexCurrent()
+        Listing.objects.bulk_create(
+            [Listing(creator=self.user, latitude=37.5, longitude=127.1)]
+        )
+        self.city_hall.delete()
+        self.assertIndexCurrent()
+        self.user.listings.all().delete()
+        self.assertEqual(self.indexed(), {})
+
+    def test_bbox_and_radius_filters(self):
+        gangnam = [self.gangnam.pk, self.yeoksam.pk]
+        self.assertEqual(self.search(bbox="37.49,127.02,37.51,127.04"), gangnam)
+        self.assertEqual(
+            self.search(bbox="37.49,127.02,37.51,127.04", district="중구"), []
+        )
+        self.assertEqual(
+            self.search(bbox="37.4,126.9,37.6,127.1", district="중구"),
+            [self.city_hall.pk],
+        )
+        self.assertEqual(
+            self.search(near="37.4979,127.0276", radius=0.5), [self.gangnam.pk]
+        )
+        self.assertEqual(self.search(near="37.4979,127.0276"), gangnam)
+        self.assertEqual(
+            self.search(
+                near="37.4979,127.0276", radius=10, bbox="37.49,127.03,37.51,127.04"
+            ),
+            [self.yeoksam.pk],
+        )
+
+        other = get_user_model().objects.create_user(
+            username="other", email="other@gmail.com", password="testpassword"
+        )
+        Listing.objects.create(creator=other, latitude=37.4979, longitude=127.0276)
+        self.assertEqual(self.search(bbox="37.49,127.02,37.51,127.04"), gangnam)
+
+        for bbox in [
+            "37.51,127.02,37.49,127.04",
+            "37.49,127.02",
+            "a,b,c,d",
+            "91,0,92,1",
+        ]:
+            filterset = ListingFilter({"bbox": bbox}, queryset=Listing.objects.all())
+            self.assertFalse(filterset.is_valid())
+
+    def test_map_endpoint(self):
+        url = reverse("api_listing_map")
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(
+                url, {"bbox": "37.4,126.9,37.6,127.1", "district": "강남구"}
+            ).json()
+        self.assertFalse(data["truncated"])
+        self.assertEqual(
+            sorted(row["id"] for row in data["results"]),
+            [self.gangnam.pk, self.yeoksam.pk],
+        )
+        self.assertEqual(data["results"][0]["district"], "강남구")
+        [query] = [q["sql"] for q in queries if LISTING_RTREE_TABLE in q["sql"]]
+        self.assertNotIn("ORDER BY", query)
+
+        with mock.patch("jeonse.api_views.MAP_MAX_MARKERS", 2):
+            data = self.client.get(url, {"bbox": "37.4,126.9,37.6,127.1"}).json()
+        self.assertTrue(data["truncated"])
+        self.assertEqual(len(data["results"]), 2)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("bbox", response.json()["errors"])
+        response = self.client.get(url, {"bbox": "37.6,126.9,37.4,127.1"})
+        self.assertEqual(response.status_code, 400)
+
+        self.client.logout()
+        response = self.client.get(url, {"bbox": "37.4,126.9,37.6,127.1"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_triggers_reinstalled_after_migrate(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {LISTING_RTREE_TABLE}_insert")
+        emit_post_migrate_signal(verbosity=0, interactive=False, db="default")
+        listing = Listing.objects.create(
+            creator=self.user, latitude=37.5, longitude=127.0
+        )
+        self.assertIn(listing.pk, self.indexed())
+
+
+class TestColdStart(TestCase):
+    def test_first_request_defers_admin_and_allauth(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "db.sqlite3")
+            run = profile_boot(path, prepare_database(path), reverse("listing_list"))
+        self.assertEqual(run["status"], [200, 200])
+        self.assertEqual(list(run["phases"]), PHASES)
+        loaded = {
+            row["module"] for row in run["imports"] if row["phase"] != "second_request"
+        }
+        self.assertIn("jeonse.views", loaded)
+        for module in [
+            "settings.admin_urls",
+            "django.contrib.auth.admin",
+            "allauth.account.views",
+            "xml.sax",
+        ]:
+            self.assertNotIn(module, loaded)
+
+    def test_admin_and_login_load_on_demand(self):
+        response = self.client.get("/admin/")
+        self.assertRedirects(response, "/admin/login/?next=/admin/")
+        self.assertEqual(reverse("admin:index"), "/admin/")
+        response = self.client.get(reverse("account_login"))
+        self.assertContains(response, 'name="login"')
+
+    def test_profile_command_and_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "boot.json")
+            out = StringIO()
+            call_command("profile_startup", runs=1, output=output, stdout=out)
+            self.assertIn("first response", out.getvalue())
+            with open(output) as fh:
+                report = json.load(fh)
+            self.assertGreater(report["phases"]["setup"]["imports"], 0)
+            self.assertTrue(report["slowest_imports"])
+
+            report["phases"]["first_request"]["imports"] = 0
+            with open(output, "w") as fh:
+                json.dump(report, fh)
+            with self.assertRaisesMessage(CommandError, "first_request imports"):
+                call_command(
+                    "profile_startup",
+                    runs=1,
+                    baseline=output,
+                    threshold=100,
+                    stdout=StringIO(),
+                )
+
+
+class TestBenchData(TestCase):
+    def test_generator_is_deterministic(self):
+        users = create_bench_users(3)
+
+        def fields(seed):
+            return [
+                (listing.creator_id, listing.jeonse_deposit_amount, listing.comment)
+                for listing in generate_listings(users, 50, seed)
+            ]
+
+        self.assertEqual(fields(1), fields(1))
+        self.assertNotEqual(fields(1), fields(2))
+        creators = [creator for creator, _, _ in fields(1)]
+        self.assertEqual(creators.count(users[0].pk), 5)
+        self.assertTrue(
+            self.client.login(username=bench_email(2), password=BENCH_PASSWORD)
+        )
+
+
+class TestServerTiming(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.listing = Listing.objects.create(creator=self.user)
+        self.client.force_login(self.user)
+        request_metrics.reset()
+
+    def server_timing(self, response):
+        metrics = {}
+        for metric in response["Server-Timing"].split(", "):
+            name, duration, description = metric.split(";")
+            metrics[name] = (float(duration.split("=")[1]), description)
+        return metrics
+
+    def test_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("listing_list"))
+        metrics = self.server_timing(response)
+        self.assertEqual(list(metrics), ["db", "view", "template", "table", "total"])
+        self.assertEqual(metrics["db"][1], f'desc="{len(queries)} queries"')
+        self.assertLessEqual(metrics["table"][0], metrics["template"][0])
+        self.assertLessEqual(metrics["template"][0], metrics["total"][0])
+
+        response = self.client.get(self.listing.get_absolute_url())
+        self.assertEqual(
+            list(self.server_timing(response)), ["db", "view", "template", "total"]
+        )
+        response = self.client.get(reverse("api_listing_list"))
+        self.assertEqual(list(self.server_timing(response)), ["db", "view", "total"])
+
+    @override_settings(ROOT_URLCONF="jeonse.async_urls")
+    async def test_async_header(self):
+        client = self.async_client_class()
+        await sync_to_async(client.force_login)(self.user)
+        response = await client.get(reverse("listing_list"))
+        metrics = self.server_timing(response)
+        self.assertIn("table", metrics)
+        self.assertNotEqual(metrics["db"][1], 'desc="0 queries"')
+
+    def test_metrics(self):
+        for _ in range(3):
+            self.client.get(reverse("listing_list"))
+        self.client.get(self.listing.get_absolute_url())
+        self.client.get("/missing/")
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response["Content-Type"].split(";")[0], "text/plain")
+        body = response.content.decode()
+        self.assertIn(
+            'jeonse_request_duration_seconds_count{view="listing_list"} 3', body
+        )
+        self.assertIn(
+            'jeonse_request_duration_seconds_bucket{view="listing_list",le="+Inf"} 3',
+            body,
+        )
+        self.assertIn(
+            'jeonse_request_duration_seconds_count{view="listing_detail"} 1', body
+        )
+        self.assertIn('jeonse_request_duration_seconds_count{view="unmatched"} 1', body)
+        self.assertIn('jeonse_request_sql_queries_total{view="listing_list"}', body)
+        self.assertIn('jeonse_listing_table_cache_total{outcome="hit"}', body)
+
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 403)
+
+
+class TestSQLiteBackend(TestCase):
+    def test_pragmas(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = DatabaseWrapper(
+                {
+                    **connection.settings_dict,
+                    "NAME": os.path.join(directory, "db.sqlite3"),
+                    "OPTIONS": {"pragmas": {"cache_size": -2000}},
+                },
+                "pragmas",
+            )
+            try:
+                with database.cursor() as cursor:
+                    values = {}
+                    for name in ["journal_mode", "synchronous", "busy_timeout"]:
+                        cursor.execute(f"PRAGMA {name}")
+                        values[name] = cursor.fetchone()[0]
+                    cursor.execute("PRAGMA cache_size")
+                    values["cache_size"] = cursor.fetchone()[0]
+            finally:
+                database.close()
+        self.assertEqual(
+            values,
+            {
+                "journal_mode": "wal",
+                "synchronous": 1,
+                "busy_timeout": DEFAULT_PRAGMAS["busy_timeout"],
+                "cache_size": -2000,
+            },
+        )
+
+    def test_stress(self):
+        out = StringIO()
+        call_command("stress_sqlite", writers=4, readers=4, operations=20, stdout=out)
+        rows = [line.split() for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual([row[:2] for row in rows], [["write", "80"], ["read", "80"]])
+        self.assertEqual([row[-1] for row in rows], ["0", "0"])
+
+
+class TestReplicaRouting(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        connections.settings["replica"] = {
+            **connection.settings_dict,
+            "NAME": os.path.join(directory.name, "replica.sqlite3"),
+            "TEST": {},
+        }
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(connections.settings.pop, "replica")
+        self.addCleanup(connections.__delitem__, "replica")
+        self.addCleanup(connections["replica"].close)
+        replicas = override_settings(DATABASE_REPLICAS=["replica"])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+        call_command("migrate", database="replica", verbosity=0)
+
+        self.user, self.other = create_bench_users(2)
+        self.listing = Listing.objects.create(
+            creator=self.user, jeonse_deposit_amount=100_000_000, total_area=30
+        )
+        self.replicate(self.user, self.other, self.listing)
+
+    def replicate(self, *objs):
+        # The test database is in memory and inside a transaction, so it
+        # cannot be copied with sync_replicas.
+        for obj in objs:
+            obj.save(using="replica", force_insert=True)
+        # Replication sends no signals: drop the pins these saves made.
+        cache.clear()
+
+    def get(self, url):
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.get(url)
+        return response, len(replica)
+
+    def test_reads_from_replica(self):
+        self.client.force_login(self.user)
+        response, replica_queries = self.get(reverse("listing_list"))
+        self.assertContains(response, self.listing.get_absolute_url())
+        self.assertGreater(replica_queries, 0)
+
+        # Written outside a request, e.g. by a job, and not replicated yet:
+        # the creator is pinned until the replicas have caught up.
+        with self.captureOnCommitCallbacks(execute=True):
+            listing = Listing.objects.create(
+                creator=self.user, jeonse_deposit_amount=200_000_000, total_area=40
+            )
+        response, replica_queries = self.get(listing.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(replica_queries, 0)
+        self.client.force_login(self.other)
+        _, replica_queries = self.get(reverse("listing_list"))
+        self.assertGreater(replica_queries, 0)
+
+        cache.clear()
+        self.client.force_login(self.user)
+        response, _ = self.get(listing.get_absolute_url())
+        self.assertEqual(response.status_code, 404)
+
+        self.replicate(listing)
+        response, replica_queries = self.get(listing.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(replica_queries, 0)
+
+    def test_writer_reads_own_writes(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("listing_create"),
+            {
+                "jeonse_deposit_amount": 150_000_000,
+                "wolse_deposit_amount": 0,
+                "wolse_monthly_payment": 0,
+                "gwanlibi_monthly_payment": 100_000,
+                "annual_interest_rate": 4,
+                "total_area": 35,
+                "number_of_rooms": 2,
+                "number_of_bathrooms": 1,
+                "comment": "새 매물",
+            },
+        )
+        self.assertRedirects(response, reverse("listing_list"))
+        listing = Listing.objects.latest("pk")
+
+        response, replica_queries = self.get(listing.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(replica_queries, 0)
+
+        # Other users still read from the replica.
+        self.client.force_login(self.other)
+        response, replica_queries = self.get(reverse("listing_list"))
+        self.assertGreater(replica_queries, 0)
+
+    def test_counters_seeded_from_primary(self):
+        Listing.objects.create(creator=self.user, total_area=40)
+        ListingCounter.objects.filter(user=self.user).delete()
+        cache.clear()
+        request = HttpRequest()
+        request.method = "GET"
+        request.user = self.user
+        routing = RequestRouting(request)
+        token = routing.start()
+        try:
+            self.assertEqual(self.user.listings.count(), 1)
+            self.assertEqual(ListingCounter.objects.count_for(self.user), 2)
+        finally:
+            routing.stop(token)
+        self.assertEqual(ListingCounter.objects.get(user=self.user).count, 2)
+
+
+class TestCachedAuth(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        Listing.objects.create(creator=self.user, total_area=30)
+        self.client.login(email="testuser@gmail.com", password="testpassword")
+        self.endpoint = reverse("listing_list")
+        self.assertEqual(self.client.get(self.endpoint).status_code, 200)
+
+    def test_no_auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.endpoint, {"sort": "total_area"})
+        self.assertEqual(response.status_code, 200)
+        tables = ["django_session", get_user_model()._meta.db_table]
+        for query in queries:
+            self.assertFalse(any(table in query["sql"] for table in tables))
+
+    def test_listings_changed_at(self):
+        etag = self.client.get(self.endpoint)["ETag"]
+        Listing.objects.create(creator=self.user, total_area=40)
+        response = self.client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_password_change(self):
+        self.user.set_password("newpassword")
+        self.user.save()
+        self.assertEqual(self.client.get(self.endpoint).status_code, 302)
+
+    def test_deactivation(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.endpoint).status_code, 302)
+
+    def test_logout(self):
+        session_key = self.client.session.session_key
+        self.client.post(reverse("account_logout"))
+        self.assertEqual(self.client.get(self.endpoint).status_code, 302)
+        self.assertFalse(SessionStore().exists(session_key))
+
+    def test_shared_cache_check(self):
+        errors = run_checks(tags=[Tags.caches], include_deployment_checks=True)
+        self.assertEqual([error.id for error in errors], ["jeonse.E001"])
+        self.assertEqual(run_checks(tags=[Tags.caches]), [])
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": self.enterContext(tempfile.TemporaryDirectory()),
+                }
+            }
+        ):
+            errors = run_checks(tags=[Tags.caches], include_deployment_checks=True)
+        self.assertEqual(errors, [])
+
+
+class TestStaticAssets(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        static_root = override_settings(STATIC_ROOT=directory.name)
+        static_root.enable()
+        self.addCleanup(static_root.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    def get_asset(self, url, accept_encoding=""):
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_vendored_and_fingerprinted(self):
+        content = self.client.get(reverse("account_login")).content.decode()
+        self.assertNotIn("cdn.jsdelivr.net", content)
+        self.assertNotIn("unpkg.com", content)
+        url = re.search(r'src="(/static/[^"]*/htmx\.min\.[0-9a-f]{12}\.js)"', content)
+        self.assertIsNotNone(url)
+        source = finders.find("jeonse/vendor/htmx-1.9.10/htmx.min.js")
+        with open(source, "rb") as f:
+            original = f.read()
+
+        response, body = self.get_asset(url[1])
+        self.assertEqual(body, original)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(
+            response["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+        response, body = self.get_asset(url[1], "gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(body), original)
+
+        if brotli is not None:
+            response, body = self.get_asset(url[1], "gzip, deflate, br")
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertEqual(brotli.decompress(body), original)
+
+        response, _ = self.get_asset("/static/jeonse/vendor/htmx-1.9.10/htmx.min.js")
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+        response = self.client.get("/static/../settings/settings.py")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(THROTTLE_RATES={"listing_list": "3/m", "account_login": "2/m"})
+class TestThrottle(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="testuser@gmail.com", password="testpassword"
+        )
+        self.other = get_user_model().objects.create_user(
+            username="other", email="other@gmail.com", password="testpassword"
+        )
+        self.client.force_login(self.user)
+        self.endpoint = reverse("listing_list")
+
+    def burst(self, client, count, url=None, **extra):
+        return [
+            client.get(url or self.endpoint, **extra).status_code for _ in range(count)
+        ]
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("30/m"), (30, 2.0))
+        self.assertEqual(parse_rate("2/second"), (2, 0.5))
+        self.assertEqual(parse_rate("24/d"), (24, 3600.0))
+
+    def test_take_token(self):
+        with mock.patch("jeonse.throttle.time") as clock:
+            clock.time.return_value = 1000.0
+            self.assertEqual([take_token("bucket", 3, 20.0) for _ in range(4)][3], 20)
+            clock.time.return_value = 1015.0
+            self.assertEqual(take_token("bucket", 3, 20.0), 5)
+            clock.time.return_value = 1020.0
+            self.assertEqual(take_token("bucket", 3, 20.0), 0)
+            self.assertEqual(take_token("bucket", 3, 20.0), 20)
+            # Idle for longer than it takes to refill: one burst, no more.
+            clock.time.return_value = 2000.0
+            self.assertEqual([take_token("bucket", 3, 20.0) for _ in range(3)], [0] * 3)
+            self.assertEqual(take_token("bucket", 3, 20.0), 20)
+
+    def test_burst(self):
+        with mock.patch("jeonse.throttle.time") as clock:
+            clock.time.return_value = 1000.0
+            self.assertEqual(self.burst(self.client, 5), [200] * 3 + [429] * 2)
+            response = self.client.get(self.endpoint, HTTP_HX_REQUEST="true")
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response["Retry-After"], "20")
+
+            clock.time.return_value = 1020.0
+            self.assertEqual(self.burst(self.client, 2), [200, 429])
+            clock.time.return_value = 1100.0
+            self.assertEqual(self.burst(self.client, 4), [200] * 3 + [429])
+
+    def test_buckets_per_user_and_view(self):
+        self.assertEqual(self.burst(self.client, 4), [200] * 3 + [429])
+        self.assertEqual(
+            self.burst(self.client, 5, reverse("listing_stats")), [200] * 5
+        )
+        other = self.client_class()
+        other.force_login(self.other)
+        self.assertEqual(self.burst(other, 3), [200] * 3)
+
+    def test_buckets_per_ip(self):
+        self.client.logout()
+        login = reverse("account_login")
+        self.assertEqual(
+            self.burst(self.client, 3, login, REMOTE_ADDR="10.0.0.1"),
+            [200, 200, 429],
+        )
+        response = self.client.post(
+            login,
+            {"login": "testuser@gmail.com", "password": "testpassword"},
+            REMOTE_ADDR="10.0.0.1",
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(self.client.session.get("_auth_user_id"))
+        self.assertEqual(
+            self.burst(self.client, 2, login, REMOTE_ADDR="10.0.0.2"), [200, 200]
+        )
+
+    def test_fast_path(self):
+        with mock.patch("jeonse.middleware.take_token") as take:
+            self.assertEqual(self.client.get(reverse("listing_stats")).status_code, 200)
+        take.assert_not_called()
+
+    async def test_async_burst(self):
+        client = self.async_client_class()
+        await sync_to_async(client.force_login)(self.user)
+        statuses = [(await client.get(self.endpoint)).status_code for _ in range(4)]
+        self.assertEqual(statuses, [200] * 3 + [429])
+        with mock.patch("jeonse.middleware.take_token") as take:
+            response = await client.get(reverse("listing_stats"))
+        self.assertEqual(response.status_code, 200)
+        take.assert_not_called()
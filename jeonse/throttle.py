@@ -0,0 +1,38 @@
+import math
+import time
+
+from django.core.cache import cache
+
+RATE_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    "30/m" as (30, 2.0): a bucket of 30 tokens that refills one token every
+    2 seconds.
+    """
+    count, period = rate.split("/")
+    count = int(count)
+    return count, RATE_PERIODS[period[0]] / count
+
+
+def take_token(key, size, interval):
+    """
+    Take a token from the bucket stored at key. Returns 0 when there was one,
+    or else the seconds until there will be.
+
+    The bucket is stored as a single timestamp, the time at which it will be
+    full again: a full bucket is any time in the past, and each token taken
+    moves it interval seconds later. This is the token bucket as GCRA, so a
+    bucket costs one cache get and one set, expires as soon as it is full, and
+    needs no refill. Two workers taking from the same bucket at once can both
+    succeed with the same token, which only lets a burst overshoot by the
+    number of workers.
+    """
+    now = time.time()
+    full_at = max(cache.get(key, now), now) + interval
+    wait = full_at - now - size * interval
+    if wait > 0:
+        return wait
+    cache.set(key, full_at, math.ceil(full_at - now))
+    return 0
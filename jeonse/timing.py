@@ -0,0 +1,78 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """
+    Where one request's time went. Spans of the same name don't nest, so a
+    template rendered from inside another template is not counted twice.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.spans = {}
+        self.active = set()
+
+    def start(self):
+        return _current.set(self)
+
+    @staticmethod
+    def stop(token):
+        _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    timings = _current.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(name)
+        elapsed = time.perf_counter() - started
+        timings.spans[name] = timings.spans.get(name, 0.0) + elapsed
+
+
+def record_sql(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql_count += 1
+        timings.sql_time += time.perf_counter() - started
+
+
+def install_sql_timing(connection):
+    # connection_created fires on every reconnect of the same wrapper.
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed("template"):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing every render for Server-Timing."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
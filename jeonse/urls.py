@@ -1,13 +1,82 @@
-from allauth.account import views as allauth_views
 from django.urls import path
+from django.utils.module_loading import import_string
 
-from jeonse.views import ListingCreateView, ListingDetailView, ListingListView
+from jeonse.api_views import (
+    ListingApiDetailView,
+    ListingApiListView,
+    ListingMapView,
+)
+from jeonse.views import (
+    JobCancelView,
+    JobDownloadView,
+    JobStatusView,
+    ListingCreateView,
+    ListingDetailView,
+    ListingExportView,
+    ListingListView,
+    ListingSensitivityView,
+    ListingStatsView,
+    MetricsView,
+)
 
-urlpatterns = [
-    path("accounts/login/", allauth_views.LoginView.as_view(), name="account_login"),
-    path("accounts/logout/", allauth_views.LogoutView.as_view(), name="account_logout"),
-    path("accounts/signup/", allauth_views.SignupView.as_view(), name="account_signup"),
+
+def lazy_view(dotted_path):
+    """
+    The class-based view at dotted_path, imported on its first request rather
+    than when the URLconf loads, for views a worker's first request is
+    unlikely to need.
+    """
+    view = None
+
+    def lazy(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view()
+        return view(request, *args, **kwargs)
+
+    return lazy
+
+
+# allauth's views pull in its forms and django.contrib.auth's; logged in users
+# never need them.
+account_urlpatterns = [
+    path(
+        "accounts/login/",
+        lazy_view("allauth.account.views.LoginView"),
+        name="account_login",
+    ),
+    path(
+        "accounts/logout/",
+        lazy_view("allauth.account.views.LogoutView"),
+        name="account_logout",
+    ),
+    path(
+        "accounts/signup/",
+        lazy_view("allauth.account.views.SignupView"),
+        name="account_signup",
+    ),
+]
+
+urlpatterns = account_urlpatterns + [
     path("", ListingListView.as_view(), name="listing_list"),
     path("<int:pk>/", ListingDetailView.as_view(), name="listing_detail"),
     path("create/", ListingCreateView.as_view(), name="listing_create"),
+    path("export/", ListingExportView.as_view(), name="listing_export"),
+    path("stats/", ListingStatsView.as_view(), name="listing_stats"),
+    path(
+        "sensitivity/",
+        ListingSensitivityView.as_view(),
+        name="listing_sensitivity",
+    ),
+    path("jobs/", JobStatusView.as_view(), name="job_status"),
+    path("jobs/<int:pk>/cancel/", JobCancelView.as_view(), name="job_cancel"),
+    path("jobs/<int:pk>/download/", JobDownloadView.as_view(), name="job_download"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("api/listings/", ListingApiListView.as_view(), name="api_listing_list"),
+    path("api/listings/map/", ListingMapView.as_view(), name="api_listing_map"),
+    path(
+        "api/listings/<int:pk>/",
+        ListingApiDetailView.as_view(),
+        name="api_listing_detail",
+    ),
 ]
@@ -1,41 +1,283 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
-from django.views.generic import CreateView, DetailView
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.generic import CreateView, DetailView, FormView, TemplateView
 from django_filters.views import FilterView
 from django_tables2 import SingleTableView
 
-from jeonse.filters import ListingFilter
-from jeonse.forms import ListingForm
-from jeonse.mixins import UserIsAuthenticatedMixin, UserIsCreatorMixin
-from jeonse.models import Listing
-from jeonse.tables import ListingTable
+from jeonse.cache import (
+    get_table_fragment,
+    record_table_cache,
+    set_table_fragment,
+    table_fragment_key,
+)
+from jeonse.exports import EXPORT_FORMATS, export_header, export_rows
+from jeonse.filters import ListingFilter, filter_listings, filter_params
+from jeonse.forms import JobForm, ListingForm, SensitivityForm
+from jeonse.jobs import job_file
+from jeonse.metrics import request_metrics
+from jeonse.mixins import (
+    ConditionalGetMixin,
+    UserIsAuthenticatedMixin,
+    UserIsCreatorMixin,
+)
+from jeonse.models import Job, Listing, ListingCounter, ListingStats
+from jeonse.paginators import KeysetPaginator, keyset_ordering
+from jeonse.sensitivity import InterestRateSweep
+from jeonse.stats import summarize
+from jeonse.tables import ListingTable, order_listings
 
 
-class ListingListView(UserIsAuthenticatedMixin, FilterView, SingleTableView):
+class ListingListView(
+    UserIsAuthenticatedMixin, ConditionalGetMixin, FilterView, SingleTableView
+):
     model = Listing
     template_name = "jeonse/listing_list.html"
     table_class = ListingTable
     filterset_class = ListingFilter
+    paginator_class = KeysetPaginator
+
+    def get_etag(self):
+        params = sorted(self.request.GET.lists())
+        marker = self.request.user.listings_changed_at
+        raw = f"{self.request.user.pk}:{marker}:{bool(self.request.htmx)}:{params}"
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def get_last_modified(self):
+        return self.request.user.listings_changed_at
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        patch_vary_headers(response, ["HX-Request"])
+        return response
+
+    def get(self, request, *args, **kwargs):
+        if not request.htmx:
+            return super().get(request, *args, **kwargs)
+
+        key = table_fragment_key(request)
+        content = get_table_fragment(key)
+        if content is not None:
+            outcome = "hit"
+            response = HttpResponse(content)
+        else:
+            outcome = "miss"
+            response = super().get(request, *args, **kwargs)
+            response.render()
+            if response.status_code == 200:
+                set_table_fragment(key, response.content)
+        record_table_cache(outcome)
+        response["X-Table-Cache"] = outcome
+        return response
 
     def get_queryset(self):
         return self.request.user.listings.all()
 
+    def get_table_pagination(self, table):
+        paginate = super().get_table_pagination(table)
+        paginate["cursor"] = self.request.GET.get("cursor")
+        paginate["count"] = self.get_listing_count()
+        return paginate
+
+    def get_listing_count(self):
+        bucket = self.filterset.counter_bucket()
+        if bucket is None:
+            return None
+        return ListingCounter.objects.count_for(self.request.user, bucket)
+
     def get_template_names(self):
         if self.request.htmx:
             return ["htmx/listing_list.html"]
         return super().get_template_names()
 
 
-class ListingDetailView(UserIsAuthenticatedMixin, UserIsCreatorMixin, DetailView):
+class ListingStatsView(UserIsAuthenticatedMixin, ConditionalGetMixin, TemplateView):
+    """
+    Summary of the user's whole portfolio, from their running ListingStats;
+    loaded by the listing page and reloaded when it creates a listing.
+    """
+
+    template_name = "htmx/listing_stats.html"
+
+    def get_etag(self):
+        marker = self.request.user.listings_changed_at
+        return f"stats-{self.request.user.pk}-{marker}"
+
+    def get_last_modified(self):
+        return self.request.user.listings_changed_at
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        stats = ListingStats.objects.for_user(self.request.user)
+        context.update(count=stats["count"], rows=summarize(stats))
+        return context
+
+
+class ListingDetailView(
+    UserIsAuthenticatedMixin, UserIsCreatorMixin, ConditionalGetMixin, DetailView
+):
     model = Listing
     template_name = "jeonse/listing_detail.html"
 
+    def get_last_modified(self):
+        return self.get_object().updated_at
+
+    def get_etag(self):
+        listing = self.get_object()
+        return f"listing-{listing.pk}-{listing.updated_at.timestamp()}"
+
 
 class ListingCreateView(UserIsAuthenticatedMixin, CreateView):
+    """
+    Also the inline form of the listing page: for htmx, a valid post answers
+    with a blank form, plus the new row and listing count as out-of-band
+    swaps, instead of redirecting to a freshly queried table.
+    """
+
     model = Listing
     form_class = ListingForm
     template_name = "jeonse/listing_create.html"
     success_url = reverse_lazy("listing_list")
 
+    def get_template_names(self):
+        if self.request.htmx:
+            return ["htmx/listing_create.html"]
+        return super().get_template_names()
+
     def form_valid(self, form):
         form.instance.creator = self.request.user
-        return super().form_valid(form)
+        if not self.request.htmx:
+            return super().form_valid(form)
+        self.object = form.save()
+
+        # The table's filters are posted along; the row is only shown if the
+        # new listing passes them.
+        filterset, queryset = filter_listings(
+            self.request,
+            self.request.user.listings.all(),
+            filter_params(self.request.POST),
+        )
+        table = ListingTable(queryset.filter(pk=self.object.pk))
+        bucket = filterset.counter_bucket()
+        count = None
+        if bucket is not None:
+            count = ListingCounter.objects.count_for(self.request.user, bucket)
+        response = render(
+            self.request,
+            "htmx/listing_created.html",
+            {"form": self.get_form_class()(), "table": table, "count": count},
+        )
+        response["HX-Trigger"] = "listingsChanged"
+        return response
+
+
+class ListingExportView(UserIsAuthenticatedMixin, View):
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get("format", "csv")
+        try:
+            chunks, content_type = EXPORT_FORMATS[export_format]
+        except KeyError:
+            raise Http404("Unknown export format")
+
+        _, queryset = filter_listings(request, request.user.listings.all())
+        queryset = keyset_ordering(order_listings(request, queryset))
+
+        response = StreamingHttpResponse(
+            chunks(export_header(), export_rows(queryset)), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="listings.{export_format}"'
+        )
+        return response
+
+
+class ListingSensitivityView(UserIsAuthenticatedMixin, TemplateView):
+    template_name = "jeonse/listing_sensitivity.html"
+    ranking_size = 5
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        data = {
+            name: field.initial for name, field in SensitivityForm.base_fields.items()
+        }
+        data.update(self.request.GET.dict())
+        form = SensitivityForm(data)
+        filterset, queryset = filter_listings(
+            self.request, self.request.user.listings.all()
+        )
+        context.update(form=form, filter=filterset)
+        if not form.is_valid():
+            return context
+
+        sweep = InterestRateSweep(queryset, form.rates())
+        rows = zip(
+            sweep.rates, sweep.cheapest(sweep.jeonse), sweep.cheapest(sweep.wolse)
+        )
+        context["sweep"] = sweep
+        context["rows"] = [
+            (rate, jeonse, wolse, sweep.ranking(index, self.ranking_size))
+            for index, (rate, jeonse, wolse) in enumerate(rows)
+        ]
+        context["break_even_rates"] = sweep.break_even_rates()
+        return context
+
+
+class JobStatusView(UserIsAuthenticatedMixin, FormView):
+    """
+    The user's recent background jobs, polled by htmx while any of them is
+    still queued or running, and the form that starts new ones.
+    """
+
+    form_class = JobForm
+    template_name = "htmx/job_status.html"
+    recent_jobs = 5
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        jobs = list(self.request.user.jobs.order_by("-created_at")[: self.recent_jobs])
+        context["jobs"] = jobs
+        context["polling"] = any(job.is_active for job in jobs)
+        return context
+
+    def form_valid(self, form):
+        form.enqueue(self.request.user)
+        return redirect("job_status" if self.request.htmx else "listing_list")
+
+
+class JobCancelView(UserIsAuthenticatedMixin, View):
+    def post(self, request, *args, **kwargs):
+        get_object_or_404(request.user.jobs, pk=kwargs["pk"]).cancel()
+        return redirect("job_status" if request.htmx else "listing_list")
+
+
+class JobDownloadView(UserIsAuthenticatedMixin, View):
+    def get(self, request, *args, **kwargs):
+        job = get_object_or_404(
+            request.user.jobs,
+            pk=kwargs["pk"],
+            kind=Job.Kind.EXPORT,
+            status=Job.Status.SUCCEEDED,
+        )
+        try:
+            f = open(job_file(job.result["file"]), "rb")
+        except FileNotFoundError:
+            raise Http404("Export file is gone")
+        return FileResponse(
+            f, as_attachment=True, filename=f"listings.{job.params['format']}"
+        )
+
+
+class MetricsView(View):
+    def get(self, request, *args, **kwargs):
+        if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+            raise PermissionDenied
+        return HttpResponse(
+            request_metrics.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
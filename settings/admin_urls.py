@@ -0,0 +1,7 @@
+from django.contrib import admin
+
+# Loaded on the first request under /admin/, see settings/urls.py. With
+# SimpleAdminConfig installed, the apps' admin modules are discovered here too.
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,12 +28,14 @@ DEBUG = True
 
 ALLOWED_HOSTS = ["localhost", "25ba-14-52-118-121.ngrok-free.app"]
 
-CSRF_TRUSTED_ORIGINS = ["localhost", "https://25ba-14-52-118-121.ngrok-free.app"]
+CSRF_TRUSTED_ORIGINS = ["http://localhost", "https://25ba-14-52-118-121.ngrok-free.app"]
 
 # Application definition
 
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    # The admin's modules are discovered by settings/admin_urls.py, on the
+    # first admin request, rather than at startup.
+    "django.contrib.admin.apps.SimpleAdminConfig",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
@@ -47,11 +50,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers every other middleware.
+    "jeonse.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "jeonse.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "jeonse.middleware.ThrottleMiddleware",
+    "jeonse.middleware.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
@@ -61,7 +69,7 @@ ROOT_URLCONF = "settings.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "jeonse.timing.TimedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -77,17 +85,103 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "settings.wsgi.application"
 
+# Serve the listing views from jeonse.async_views. settings/asgi.py turns this
+# on so that ASGI workers don't spend a sync_to_async thread per request.
+ASYNC_VIEWS = os.environ.get("JEONSE_ASYNC_VIEWS") == "1"
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# jeonse.backends.sqlite3 is Django's SQLite backend with WAL and tuned pragmas
+# (see DEFAULT_PRAGMAS there) and write transactions that queue for the lock.
+# Connections are kept for CONN_MAX_AGE seconds instead of reopened per request.
+# JEONSE_DATABASE points at another file, e.g. profile_startup's throwaway one.
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": "jeonse.backends.sqlite3",
+        "NAME": os.environ.get("JEONSE_DATABASE", BASE_DIR / "db.sqlite3"),
+        "CONN_MAX_AGE": int(os.environ.get("JEONSE_CONN_MAX_AGE", 600)),
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Read replicas: a comma separated list of SQLite files in JEONSE_READ_REPLICAS.
+# Listing reads of GET requests go to one of them, everything else to
+# "default". Copy the primary over them with `manage.py sync_replicas`.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.environ.get("JEONSE_READ_REPLICAS", "").split(","))
+):
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "NAME": name,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{number}")
+
+DATABASE_ROUTERS = ["jeonse.routers.PrimaryReplicaRouter"]
+
+# How long a user's listing reads stay on the primary after they write, to
+# cover replication lag.
+REPLICA_PIN_SECONDS = 30
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Sessions, logged in users, replica pins and throttle buckets are kept here,
+# so every worker process must share it. JEONSE_CACHE_DIR selects a file based
+# cache the processes of one host share; use Redis or Memcached across hosts.
+# The local memory cache is for development and tests: `manage.py check
+# --deploy` fails with it.
+
+if os.environ.get("JEONSE_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["JEONSE_CACHE_DIR"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
     }
+
+LISTING_TABLE_CACHE_TIMEOUT = 300
+
+# Sessions and logged in users are read from the cache, falling back to the
+# database, so an authenticated request makes no auth queries. Logout and user
+# changes invalidate them in this cache only, hence a shared CACHES.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Token buckets per URL name: "N/m" lets each user, or each IP when logged out,
+# make N requests at once, refilled at N a minute (also /s, /h and /d). Kept in
+# the cache, so workers share their buckets when they share a cache. The IP is
+# REMOTE_ADDR: behind a proxy, have the server set it to the client's address.
+THROTTLE_RATES = {
+    "listing_list": "120/m",
+    "listing_create": "30/m",
+    "account_login": "10/m",
 }
 
+# Clients allowed to scrape the Prometheus metrics at /metrics/. The numbers
+# are per process; scrape each worker.
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+
+
+# Background jobs (exports, imports, recalculations) are queued in the Job
+# table and run by `manage.py run_jobs`. Failed jobs are retried after
+# JOB_RETRY_DELAY seconds, doubling per attempt; a running job that has not
+# reported progress for JOB_HEARTBEAT_TIMEOUT seconds is given to another
+# worker. Uploaded imports and finished exports are kept in JOB_FILES_DIR.
+JOB_FILES_DIR = BASE_DIR / "jobfiles"
+JOB_RETRY_DELAY = 10
+JOB_HEARTBEAT_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -125,6 +219,19 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# `manage.py collectstatic` writes content-hashed copies of every file, with
+# gzip and brotli variants, here; StaticFilesMiddleware serves them with
+# far-future cache headers. Bootstrap and htmx are vendored in
+# jeonse/static/jeonse/vendor, so no page depends on a CDN.
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "jeonse.staticfiles.CompressedManifestStaticFilesStorage"
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -134,9 +241,10 @@ AUTH_USER_MODEL = "jeonse.CustomUser"
 
 # django-allauth settings
 # https://django-allauth.readthedocs.io/en/latest/installation.html
+# The Cached* backends resolve the logged in user from the cache.
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",
-    "allauth.account.auth_backends.AuthenticationBackend",
+    "jeonse.auth.CachedModelBackend",
+    "jeonse.auth.CachedAuthenticationBackend",
 ]
 
 # https://django-allauth.readthedocs.io/en/latest/configuration.html
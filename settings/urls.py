@@ -14,10 +14,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import include, path
+
+from django.conf import settings
+from django.urls import URLResolver, include, path
+from django.urls.resolvers import RoutePattern
+
+jeonse_urls = "jeonse.async_urls" if settings.ASYNC_VIEWS else "jeonse.urls"
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
-    path("", include("jeonse.urls")),
+    # Unlike include(), a resolver given the module's name imports it when a
+    # request under admin/ is resolved or an "admin:" URL is reversed, so the
+    # admin's views and ModelAdmins stay out of a worker's first request.
+    URLResolver(
+        RoutePattern("admin/"),
+        "settings.admin_urls",
+        app_name="admin",
+        namespace="admin",
+    ),
+    path("", include(jeonse_urls)),
 ]